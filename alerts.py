@@ -0,0 +1,180 @@
+# alerts.py
+"""
+Yangi e'lonlar haqida ogohlantirishlar.
+
+Obuna — talab qilinadigan termlar to'plami: kalit so'zlar (w:), ko'nikmalar (s:),
+joylashuv so'zlari (l:) va manba (src:). E'lon obunaga mos, agar obunaning
+barcha termlari e'lon termlari ichida bo'lsa. Teskari indeks har obunani
+bitta "langar" termi (indeksdagi eng kam uchraydigan) ostida saqlaydi: yangi
+e'lon uchun faqat langari e'londa bor obunalar tekshiriladi — ish hajmi
+foydalanuvchilar soniga emas, mos kelishi mumkin bo'lgan obunalarga bog'liq.
+"""
+import asyncio
+import re
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+
+MAX_SUBSCRIPTIONS = 10
+# Bitta xabarda eng ko'pi bilan shuncha yangi e'lon
+MAX_JOBS_PER_ALERT = 5
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def job_match_terms(job: Dict[str, Any], source: Optional[str]) -> Set[str]:
+    terms = {"w:" + w for w in _words(job.get("name", "") + " " + _TAG_RE.sub(" ", job.get("description_html") or ""))}
+    for skill in (job.get("skills") or "").split(";"):
+        skill = skill.strip().lower()
+        if skill:
+            terms.add("s:" + skill)
+            terms.update("w:" + w for w in _words(skill))
+    terms.update("l:" + w for w in _words(job.get("location", "")))
+    if source:
+        terms.add("src:" + source)
+    return terms
+
+
+def subscription_terms(sub: Dict[str, Any]) -> Set[str]:
+    terms = {"w:" + w for kw in sub.get("keywords") or [] for w in _words(kw)}
+    terms.update("s:" + s.strip().lower() for s in sub.get("skills") or [] if s.strip())
+    terms.update("l:" + w for w in _words(sub.get("location") or ""))
+    if sub.get("source"):
+        terms.add("src:" + sub["source"])
+    return terms
+
+
+def parse_subscription(text: str, sources: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """
+    "/subscribe python django skill:sql loc:tashkent src:hh" -> obuna lug'ati.
+    Hech qanday shart bo'lmasa yoki manba noma'lum bo'lsa None.
+    """
+    sub: Dict[str, Any] = {"keywords": [], "skills": [], "location": None, "source": None}
+    for token in text.split():
+        prefix, _, value = token.partition(":")
+        if value and prefix in ("skill", "s"):
+            sub["skills"].append(value.replace("_", " "))
+        elif value and prefix in ("loc", "l"):
+            sub["location"] = " ".join(filter(None, [sub["location"], value]))
+        elif value and prefix == "src":
+            if value not in sources:
+                return None
+            sub["source"] = value
+        else:
+            sub["keywords"].append(token)
+    return sub if subscription_terms(sub) else None
+
+
+def describe_subscription(sub: Dict[str, Any]) -> str:
+    parts = list(sub.get("keywords") or [])
+    parts += ["skill:" + s for s in sub.get("skills") or []]
+    if sub.get("location"):
+        parts.append("loc:" + sub["location"])
+    if sub.get("source"):
+        parts.append("src:" + sub["source"])
+    return " ".join(parts)
+
+
+class SubscriptionIndex:
+    def __init__(self):
+        self._subs: Dict[str, Tuple[int, Set[str]]] = {}  # kalit -> (tg_id, termlar)
+        self._anchor: Dict[str, str] = {}  # kalit -> langar term
+        self._index: Dict[str, Set[str]] = defaultdict(set)  # langar term -> kalitlar
+        self.stats = {"jobs": 0, "candidates": 0, "matches": 0}
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def load(self, users: Dict[str, Any]) -> None:
+        for prof in users.values():
+            for sub in prof.get("subscriptions") or []:
+                self.add(f"{prof['tg_id']}:{sub['id']}", prof["tg_id"], sub)
+
+    def add(self, key: str, tg_id: int, sub: Dict[str, Any]) -> None:
+        self.remove(key)
+        terms = subscription_terms(sub)
+        if not terms:
+            return
+        # eng kam obuna osilgan term — nomzodlar ro'yxati qisqa bo'ladi
+        anchor = min(terms, key=lambda term: (len(self._index.get(term, ())), term.startswith("src:"), term))
+        self._subs[key] = (tg_id, terms)
+        self._anchor[key] = anchor
+        self._index[anchor].add(key)
+
+    def remove(self, key: str) -> None:
+        anchor = self._anchor.pop(key, None)
+        self._subs.pop(key, None)
+        if anchor is not None:
+            self._index[anchor].discard(key)
+            if not self._index[anchor]:
+                del self._index[anchor]
+
+    def match(self, job: Dict[str, Any], source: Optional[str]) -> Set[int]:
+        """E'longa mos obunasi bor foydalanuvchilar (tg_id)."""
+        terms = job_match_terms(job, source)
+        users: Set[int] = set()
+        self.stats["jobs"] += 1
+        for term in terms:
+            for key in self._index.get(term, ()):
+                self.stats["candidates"] += 1
+                tg_id, required = self._subs[key]
+                if tg_id not in users and required <= terms:
+                    users.add(tg_id)
+        self.stats["matches"] += len(users)
+        return users
+
+
+def collect_matches(index: SubscriptionIndex, jobs: Iterable[Dict[str, Any]],
+                    source: Optional[str]) -> Dict[int, List[Dict[str, Any]]]:
+    """tg_id -> shu foydalanuvchiga mos yangi e'lonlar (delta tartibida)."""
+    by_user: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for job in jobs:
+        for tg_id in index.match(job, source):
+            by_user[tg_id].append(job)
+    return by_user
+
+
+class AlertQueue:
+    """
+    Yetkazish navbati: bitta delta bo'yicha foydalanuvchiga bitta element
+    (mos e'lonlar ro'yxati). Iste'molchi `send` ni ketma-ket chaqiradi.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._queue: "asyncio.Queue[Tuple[int, List[Dict[str, Any]]]]" = asyncio.Queue(maxsize=maxsize)
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0}
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def push(self, tg_id: int, jobs: List[Dict[str, Any]]) -> bool:
+        try:
+            self._queue.put_nowait((tg_id, jobs[:MAX_JOBS_PER_ALERT]))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def push_matches(self, index: SubscriptionIndex, jobs: Iterable[Dict[str, Any]], source: Optional[str]) -> int:
+        by_user = collect_matches(index, jobs, source)
+        for tg_id, matched in by_user.items():
+            self.push(tg_id, matched)
+        return len(by_user)
+
+    async def run(self, send: Callable[[int, List[Dict[str, Any]]], Awaitable[None]], pause: float = 0.05) -> None:
+        while True:
+            tg_id, jobs = await self._queue.get()
+            try:
+                await send(tg_id, jobs)
+                self.stats["sent"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"alert to {tg_id} failed: {e!r}")
+            finally:
+                self._queue.task_done()
+            await asyncio.sleep(pause)
@@ -0,0 +1,163 @@
+# blobstore.py
+"""
+Tavsiflar (description_html) uchun siqilgan blob ombori.
+
+Har bir tavsif alohida zlib bilan siqiladi (ixtiyoriy umumiy lug'at — zdict —
+korpusdan o'rgatiladi) va bitta uzluksiz blobga yoziladi; u64 offsetlar
+jadvali i-tavsifning chegaralarini beradi. O'qishda oldida kichik LRU turadi.
+
+    python blobstore.py bench data/jobs.csv [--sizes 0,16,128,1024]
+"""
+import argparse
+import csv
+import random
+import re
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+# zlib oynasi 32 KB — undan katta lug'atning boshi baribir ishlatilmaydi
+MAX_DICT_SIZE = 32 * 1024
+COMPRESS_LEVEL = 9
+
+_PIECE_RE = re.compile(r"<[^>]+>|[^<\s]+(?:\s+[^<\s]+){0,3}")
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICT_SIZE) -> bytes:
+    """
+    Oddiy lug'at o'qitish: eng ko'p uchraydigan teglar va 1..4 so'zli bo'laklar
+    (chastota * uzunlik bo'yicha) yig'iladi. Eng foydalilari oxiriga qo'yiladi —
+    zlib yaqinroq masofalarni arzonroq kodlaydi.
+    """
+    counts: Counter = Counter()
+    for text in samples:
+        counts.update(set(_PIECE_RE.findall(text)))
+    scored = sorted(
+        ((n * len(piece.encode("utf-8")), piece) for piece, n in counts.items() if n > 1),
+        reverse=True,
+    )
+    picked: List[bytes] = []
+    total = 0
+    for _, piece in scored:
+        data = piece.encode("utf-8")
+        if total + len(data) > size:
+            continue
+        picked.append(data)
+        total += len(data)
+    return b"".join(reversed(picked))
+
+
+class BlobWriter:
+    def __init__(self, zdict: bytes = b""):
+        self.zdict = zdict
+        self.offsets = array("Q", [0])
+        self.blob = bytearray()
+        self.raw_size = 0
+
+    def add(self, text: str) -> int:
+        data = text.encode("utf-8")
+        self.raw_size += len(data)
+        comp = zlib.compressobj(COMPRESS_LEVEL, zdict=self.zdict) if self.zdict else zlib.compressobj(COMPRESS_LEVEL)
+        self.blob.extend(comp.compress(data) + comp.flush())
+        self.offsets.append(len(self.blob))
+        return len(self.offsets) - 2
+
+
+class DescriptionBlobStore:
+    """
+    Siqilgan tavsiflarni o'qiydi. `blob` va `offsets` — bytes/memoryview
+    (masalan, mmap qilingan snapshot bo'lagi), nusxa olinmaydi.
+    """
+
+    def __init__(self, blob, offsets, zdict: bytes = b"", cache_size: int = 256):
+        self._blob = blob
+        self._offsets = offsets
+        self._zdict = bytes(zdict)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def get(self, idx: int) -> str:
+        text = self._cache.get(idx)
+        if text is not None:
+            self._cache.move_to_end(idx)
+            self.hits += 1
+            return text
+        self.misses += 1
+        text = self._decode(idx)
+        if self.cache_size > 0:
+            self._cache[idx] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def get_uncached(self, idx: int) -> str:
+        """get() kabi, lekin LRU va hits/misses ga tegmaydi (butun katalog bo'ylab o'tishlar uchun)."""
+        text = self._cache.get(idx)
+        return text if text is not None else self._decode(idx)
+
+    def _decode(self, idx: int) -> str:
+        data = self._blob[self._offsets[idx]:self._offsets[idx + 1]]
+        dec = zlib.decompressobj(zdict=self._zdict) if self._zdict else zlib.decompressobj()
+        return (dec.decompress(data) + dec.flush()).decode("utf-8")
+
+    def description(self, idx: int, _length: int = 0) -> str:
+        # csv_stream.LazyJob bilan bir xil interfeys
+        return self.get(idx)
+
+    def cache_bytes(self) -> int:
+        return sum(sys.getsizeof(text) for text in self._cache.values())
+
+
+# ------------------ Benchmark ------------------
+def benchmark(texts: List[str], cache_sizes: List[int], lookups: int = 20000,
+              use_dict: bool = True) -> List[Tuple[int, int, float, float]]:
+    """
+    Zipf taqsimotidagi so'rovlar bilan: (cache_size, kesh xotirasi, o'rtacha mks, hit %).
+    """
+    zdict = train_dictionary(texts[:2000]) if use_dict else b""
+    writer = BlobWriter(zdict)
+    for text in texts:
+        writer.add(text)
+    print(f"raw={writer.raw_size / 1e6:.2f}MB blob={len(writer.blob) / 1e6:.2f}MB "
+          f"offsets={len(writer.offsets) * 8 / 1e6:.2f}MB dict={len(zdict) / 1024:.1f}KB")
+    rnd = random.Random(0)
+    weights = [1.0 / (rank + 1) for rank in range(len(texts))]
+    keys = rnd.choices(range(len(texts)), weights=weights, k=lookups)
+    results = []
+    for size in cache_sizes:
+        store = DescriptionBlobStore(bytes(writer.blob), writer.offsets, zdict, cache_size=size)
+        started = time.perf_counter()
+        for idx in keys:
+            store.get(idx)
+        took = (time.perf_counter() - started) / lookups * 1e6
+        results.append((size, store.cache_bytes(), took, 100.0 * store.hits / lookups))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="blobstore.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="kesh hajmlari bo'yicha xotira/kechikish")
+    bench.add_argument("csv_path")
+    bench.add_argument("--sizes", default="0,16,128,1024,8192")
+    bench.add_argument("--no-dict", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.csv_path, "r", encoding="utf-8") as f:
+        texts = [row.get("description_html") or "" for row in csv.DictReader(f)]
+    sizes = [int(x) for x in args.sizes.split(",")]
+    print(f"{'cache':>7} {'cache MB':>9} {'avg us':>8} {'hit %':>6}")
+    for size, mem, took, hit in benchmark(texts, sizes, use_dict=not args.no_dict):
+        print(f"{size:>7} {mem / 1e6:>9.2f} {took:>8.2f} {hit:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
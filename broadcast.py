@@ -0,0 +1,329 @@
+# broadcast.py
+"""
+Chiquvchi xabarlar dvigateli: umumiy token bucket (~30 xabar/s), har bir chat
+uchun alohida oraliq (shaxsiy chat 1/s, guruh ~20/daq), TelegramRetryAfter
+bo'lsa butun oqim to'xtab turadi va xabar qayta yuboriladi.
+
+Ommaviy yuborishlar (broadcast) diskda saqlanadi: <id>.json — matn va
+qabul qiluvchilar, <id>.log — har bir qabul qiluvchi natijasi (JSONL, qo'shib
+yoziladi). Qayta ishga tushganda log o'qiladi va yuborilmaganlardan davom etadi
+(kamida bir marta: log yozilmay qolgan oxirgi xabar qayta ketishi mumkin).
+"error: ..." bilan tugaganlar keyingi aylanishlarda qayta uriniladi — ish
+MAX_ROUNDS aylanishgacha tugallanmagan hisoblanadi.
+
+Bot API o'rniga soxta sessiya bilan sinash:
+
+    python broadcast.py simulate --users 2000 [--rate 30] [--blocked 0.05]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+    TelegramNotFound, TelegramRetryAfter, TelegramServerError,
+)
+
+MAX_ATTEMPTS = 5
+MAX_ROUNDS = 5
+CHAT_INTERVAL = 1.0
+GROUP_INTERVAL = 3.0
+
+
+class TokenBucket:
+    """`rate` token/soniya, `capacity` gacha yig'iladi; pause() — RetryAfter uchun."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+
+class ChatLimiter:
+    """Har bir chat uchun xabarlar orasidagi minimal vaqt."""
+
+    def __init__(self, interval: float = CHAT_INTERVAL, group_interval: float = GROUP_INTERVAL,
+                 max_tracked: int = 50000):
+        self.interval = interval
+        self.group_interval = group_interval
+        self.max_tracked = max_tracked
+        self._next: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        now = time.monotonic()
+        if len(self._next) > self.max_tracked:
+            self._next = {cid: ts for cid, ts in self._next.items() if ts > now}
+        start = max(now, self._next.get(chat_id, 0.0))
+        # manfiy id — guruh/kanal
+        self._next[chat_id] = start + (self.group_interval if chat_id < 0 else self.interval)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def delay(self, chat_id: int, seconds: float) -> None:
+        self._next[chat_id] = max(self._next.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
+class BroadcastEngine:
+    def __init__(self, bot: Bot, directory: str, rate: float = 30.0, concurrency: int = 8,
+                 chat_interval: float = CHAT_INTERVAL, group_interval: float = GROUP_INTERVAL):
+        self.bot = bot
+        self.directory = directory
+        self.bucket = TokenBucket(rate)
+        self.chats = ChatLimiter(chat_interval, group_interval)
+        self.concurrency = concurrency
+        self.stats = {"sent": 0, "retry_after": 0, "retries": 0, "failed": 0}
+        self._wakeup = asyncio.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    # ------------------ Single send ------------------
+    async def send(self, chat_id: int, text: str, **kwargs):
+        """Limitlarga rioya qilib yuboradi; RetryAfter va vaqtinchalik xatolarda qayta urinadi."""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await self.chats.wait(chat_id)
+            await self.bucket.acquire()
+            try:
+                message = await self.bot.send_message(chat_id, text, **kwargs)
+                self.stats["sent"] += 1
+                return message
+            except TelegramRetryAfter as e:
+                # flood limit butun bot uchun — hamma kutadi
+                self.stats["retry_after"] += 1
+                self.bucket.pause(e.retry_after)
+                self.chats.delay(chat_id, e.retry_after)
+            except (TelegramNetworkError, TelegramServerError):
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+        self.stats["failed"] += 1
+        raise TelegramAPIError(method=None, message=f"gave up after {MAX_ATTEMPTS} attempts")
+
+    # ------------------ Persistent broadcasts ------------------
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".json")
+
+    def _log_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".log")
+
+    def create(self, text: str, recipients: Iterable[int], kind: str = "announcement",
+               parse_mode: Optional[str] = None) -> str:
+        job_id = f"{time.time_ns()}"
+        meta = {
+            "id": job_id, "kind": kind, "text": text, "parse_mode": parse_mode,
+            "recipients": list(dict.fromkeys(recipients)),
+            "created_at": time.time(), "finished_at": None,
+        }
+        self._write_meta(meta)
+        self._wakeup.set()
+        return job_id
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        path = self._meta_path(meta["id"])
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def results(self, job_id: str) -> Dict[int, str]:
+        """chat_id -> holat (ok / blocked / failed: ... / error: ...). Oxirgi yozuv ustun."""
+        done: Dict[int, str] = {}
+        try:
+            with open(self._log_path(job_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue  # uzilib qolgan oxirgi qator
+                    done[row["chat_id"]] = row["status"]
+        except OSError:
+            pass
+        return done
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        meta = self.load(job_id)
+        if meta is None:
+            return None
+        counts: Dict[str, int] = {}
+        for status in self.results(job_id).values():
+            key = status.split(":", 1)[0]
+            counts[key] = counts.get(key, 0) + 1
+        return {"id": job_id, "total": len(meta["recipients"]), "finished": meta["finished_at"] is not None, **counts}
+
+    def job_ids(self, unfinished: bool = False) -> List[str]:
+        ids = sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith(".json"))
+        if unfinished:
+            ids = [job_id for job_id in ids if (self.load(job_id) or {}).get("finished_at") is None]
+        return ids
+
+    def _log_ends_with_newline(self, job_id: str) -> bool:
+        with open(self._log_path(job_id), "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    async def _deliver(self, meta: Dict[str, Any], chat_id: int) -> str:
+        try:
+            # parse_mode berilmasa bot standarti (DefaultBotProperties) ishlaydi
+            kwargs = {"parse_mode": meta["parse_mode"]} if meta.get("parse_mode") else {}
+            await self.send(chat_id, meta["text"], **kwargs)
+            return "ok"
+        except TelegramForbiddenError:
+            return "blocked"
+        except (TelegramBadRequest, TelegramNotFound) as e:
+            return f"failed: {e.message}"
+        except TelegramAPIError as e:
+            return f"error: {e.message}"
+
+    async def process(self, job_id: str) -> Dict[str, Any]:
+        meta = self.load(job_id)
+        done = self.results(job_id)
+        # oldingi ishga tushirishda "error" bo'lganlar qayta uriniladi
+        pending = deque(cid for cid in meta["recipients"]
+                        if not done.get(cid) or done[cid].startswith("error"))
+        with open(self._log_path(job_id), "a", encoding="utf-8") as log:
+            if log.tell() and not self._log_ends_with_newline(job_id):
+                # uzilib qolgan oxirgi qator birinchi yangi yozuvni yutib yubormasin
+                log.write("\n")
+
+            async def worker():
+                while pending:
+                    chat_id = pending.popleft()
+                    status = await self._deliver(meta, chat_id)
+                    log.write(json.dumps({"chat_id": chat_id, "status": status, "at": time.time()}) + "\n")
+                    log.flush()
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        meta["rounds"] = meta.get("rounds", 0) + 1
+        retryable = any(status.startswith("error") for status in self.results(job_id).values())
+        # vaqtinchalik xatolar qolsa ish ochiq qoladi va run() uni keyingi aylanishda oladi
+        if not retryable or meta["rounds"] >= MAX_ROUNDS:
+            meta["finished_at"] = time.time()
+        self._write_meta(meta)
+        return self.status(job_id)
+
+    async def run(self, poll: float = 5.0) -> None:
+        while True:
+            self._wakeup.clear()
+            for job_id in self.job_ids(unfinished=True):
+                try:
+                    summary = await self.process(job_id)
+                    print(f"broadcast {job_id}: {summary}")
+                except Exception as e:
+                    print(f"broadcast {job_id} failed: {e!r}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=poll)
+            except asyncio.TimeoutError:
+                pass
+
+
+# ------------------ Fake Bot API session ------------------
+def fake_session(rate: float = 30.0, blocked: Iterable[int] = (), latency: float = 0.02):
+    """
+    Bot API ni taqlid qiluvchi aiogram sessiyasi: sekundiga `rate` dan ko'p
+    so'rov yoki bitta chatga 1/s dan tez yuborilsa 429 (retry_after), `blocked`
+    chatlar uchun 403 qaytaradi. Tarmoqqa chiqmaydi.
+    """
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import SendMessage
+
+    class FakeBotSession(BaseSession):
+        def __init__(self):
+            super().__init__()
+            self.blocked = set(blocked)
+            self.sent: List[int] = []
+            self.flood_errors = 0
+            self._window: deque = deque()
+            self._last_chat: Dict[int, float] = {}
+
+        async def make_request(self, bot, method, timeout=None):
+            await asyncio.sleep(latency)
+            now = time.monotonic()
+            while self._window and now - self._window[0] > 1.0:
+                self._window.popleft()
+            chat_id = getattr(method, "chat_id", 0)
+            if len(self._window) >= rate or now - self._last_chat.get(chat_id, -10.0) < 1.0:
+                self.flood_errors += 1
+                body = {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                        "parameters": {"retry_after": 1}}
+                return self.check_response(bot, method, 429, json.dumps(body))
+            self._window.append(now)
+            if chat_id in self.blocked:
+                body = {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+                return self.check_response(bot, method, 403, json.dumps(body))
+            self._last_chat[chat_id] = now
+            self.sent.append(chat_id)
+            result: Any = True
+            if isinstance(method, SendMessage):
+                result = {"message_id": len(self.sent), "date": int(time.time()),
+                          "chat": {"id": chat_id, "type": "private"}, "text": method.text}
+            return self.check_response(bot, method, 200, json.dumps({"ok": True, "result": result})).result
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            if False:
+                yield b""
+
+        async def close(self):
+            pass
+
+    return FakeBotSession()
+
+
+async def simulate(users: int, rate: float, blocked_ratio: float, directory: str) -> None:
+    blocked = set(range(1, int(users * blocked_ratio) + 1))
+    session = fake_session(rate=rate, blocked=blocked)
+    bot = Bot(token="42:SIMULATED", session=session)
+    engine = BroadcastEngine(bot, directory, rate=rate * 0.95)
+    job_id = engine.create("Hello!", range(1, users + 1))
+    started = time.perf_counter()
+    summary = await engine.process(job_id)
+    took = time.perf_counter() - started
+    print(f"{summary} in {took:.1f}s -> {users / took:.1f} msg/s, "
+          f"429s={session.flood_errors}, engine={engine.stats}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="broadcast.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sim = sub.add_parser("simulate", help="soxta Bot API sessiyasiga ommaviy yuborish")
+    sim.add_argument("--users", type=int, default=2000)
+    sim.add_argument("--rate", type=float, default=30.0)
+    sim.add_argument("--blocked", type=float, default=0.05)
+    sim.add_argument("--dir", default="/tmp/maabhr-broadcast-sim")
+    args = parser.parse_args(argv)
+    asyncio.run(simulate(args.users, args.rate, args.blocked, args.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# cart_export.py
+"""
+Savatni bitta hujjat (CSV yoki HTML) sifatida eksport qilish.
+
+Qatorlar chiqish buferiga birma-bir yoziladi — xotirada faqat natija baytlari
+va joriy qator turadi, oraliq satr ro'yxatlari yig'ilmaydi. Bloklovchi ish,
+shuning uchun main.py uni alohida oqimda chaqiradi.
+
+Maydonlar saytlardan yig'ilgan, ishonchsiz: HTML da havola faqat http(s)
+bo'lsa bosiladigan qilinadi, CSV da formula sifatida o'qiladigan katakchalar
+(=, +, -, @ bilan boshlanuvchi) oldiga apostrof qo'yiladi.
+"""
+import csv
+import html
+import io
+from typing import Iterable, Tuple
+from urllib.parse import urlsplit
+
+EXPORT_FORMATS = ("csv", "html")
+EXPORT_FIELDS = ("name", "company", "location", "link")
+
+Row = Tuple[str, str, str, str]
+
+_HTML_HEAD = (
+    "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title>\n"
+    "<style>body{{font-family:sans-serif}}table{{border-collapse:collapse}}"
+    "td,th{{border:1px solid #ccc;padding:4px 8px;text-align:left}}</style>\n"
+    "</head><body>\n<h2>{title}</h2>\n<table>\n<tr><th>#</th>{header}</tr>\n"
+)
+_HTML_TAIL = "</table>\n</body></html>\n"
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value: str) -> str:
+    value = value or ""
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def safe_link(link: str) -> str:
+    """http(s) havola yoki bo'sh satr (javascript:, data: va h.k. tashlanadi)."""
+    link = (link or "").strip()
+    return link if urlsplit(link).scheme.lower() in ("http", "https") else ""
+
+
+def write_csv(out: io.BufferedIOBase, rows: Iterable[Row]) -> int:
+    # utf-8-sig: Excel kirill/o'zbek harflarini to'g'ri ochadi
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in rows:
+        writer.writerow([csv_cell(value) for value in row])
+        count += 1
+    text.detach()
+    return count
+
+
+def write_html(out: io.BufferedIOBase, rows: Iterable[Row], title: str) -> int:
+    text = io.TextIOWrapper(out, encoding="utf-8", write_through=True)
+    esc = lambda value: html.escape(value or "")
+    text.write(_HTML_HEAD.format(title=esc(title), header="".join(f"<th>{f}</th>" for f in EXPORT_FIELDS)))
+    count = 0
+    for count, (name, company, location, link) in enumerate(rows, start=1):
+        href = safe_link(link)
+        cell = f"<a href=\"{esc(href)}\">{esc(link)}</a>" if href else esc(link)
+        text.write(f"<tr><td>{count}</td><td>{esc(name)}</td><td>{esc(company)}</td>"
+                   f"<td>{esc(location)}</td><td>{cell}</td></tr>\n")
+    text.write(_HTML_TAIL)
+    text.detach()
+    return count
+
+
+def export_cart(rows: Iterable[Row], fmt: str, title: str = "Cart") -> Tuple[bytes, int]:
+    """(hujjat baytlari, qatorlar soni)."""
+    out = io.BytesIO()
+    if fmt == "html":
+        count = write_html(out, rows, title)
+    else:
+        count = write_csv(out, rows)
+    return out.getvalue(), count
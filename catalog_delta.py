@@ -0,0 +1,108 @@
+# catalog_delta.py
+"""
+Katalogni qayta yuklashda manba faylining yangi holatini oldingisi bilan
+solishtiradi: har bir e'lon uchun barqaror kontent xeshi (blake2b) hisoblanadi
+va job_id bo'yicha insert / update / delete delta chiqariladi. Indekslar
+(o'xshash ishlar, dublikat klasterlari) butun katalog o'rniga shu delta
+bo'yicha yangilanadi.
+"""
+import hashlib
+import time
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+from csv_stream import LazyJob, read_jobs_csv
+
+HASH_FIELDS = ("name", "company", "location", "skills", "link")
+
+
+def row_hash(job: Dict[str, Any]) -> int:
+    """
+    Jarayonlar orasida barqaror xesh (Python hash() dan farqli o'laroq).
+    Tavsif barcha rejimlarda (CSV, oqim, snapshot) Telegram HTML ga
+    o'tkazilgan ko'rinishida xeshlanadi — rejim almashganda yozuvlar
+    o'zgargan deb belgilanmaydi. LazyJob tavsifi description_uncached orqali
+    olinadi va kartochkalar LRU sini siqib chiqarmaydi. Snapshot manbalari
+    uchun xeshlar build_catalog da yoziladi va yuklashda hisoblanmaydi.
+    """
+    if isinstance(job, LazyJob):
+        description = job.description_uncached()
+    else:
+        description = job.get("description_html") or ""
+    h = hashlib.blake2b(digest_size=8)
+    for name in HASH_FIELDS:
+        h.update((job.get(name) or "").encode("utf-8"))
+        h.update(b"\x1f")
+    h.update(description.encode("utf-8"))
+    return int.from_bytes(h.digest(), "little")
+
+
+class CatalogDelta:
+    """Bitta manba bo'yicha o'zgarishlar: yangi va o'zgargan yozuvlar, o'chirilgan id lar."""
+
+    __slots__ = ("inserted", "updated", "deleted")
+
+    def __init__(self, inserted: Optional[List[Dict[str, Any]]] = None,
+                 updated: Optional[List[Dict[str, Any]]] = None,
+                 deleted: Optional[List[int]] = None):
+        self.inserted = inserted or []
+        self.updated = updated or []
+        self.deleted = deleted or []
+
+    @property
+    def changed(self) -> List[Dict[str, Any]]:
+        return self.inserted + self.updated
+
+    def __len__(self) -> int:
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self) -> str:
+        return f"CatalogDelta(+{len(self.inserted)} ~{len(self.updated)} -{len(self.deleted)})"
+
+
+def diff_catalog(previous: Dict[int, int], jobs: Iterable[Dict[str, Any]],
+                 row_hashes: Optional[Sequence[int]] = None,
+                 job_ids: Optional[Sequence[int]] = None) -> Tuple[CatalogDelta, Dict[int, int]]:
+    """
+    previous: job_id -> xesh (oldingi yuklash). Qaytaradi: (delta, yangi xeshlar).
+    row_hashes — oldindan hisoblangan xeshlar (jobs tartibida), masalan ishchi jarayondan
+    yoki snapshotdan. job_ids ham berilsa (snapshot), jobs dan faqat yangi va
+    o'zgargan qatorlar olinadi — qolganlari yaratilmaydi.
+    Fayl ichida takrorlangan job_id lardan birinchisi hisobga olinadi
+    (find_job_by_id ham birinchisini qaytaradi).
+    """
+    delta = CatalogDelta()
+    hashes: Dict[int, int] = {}
+    if job_ids is not None and row_hashes is not None:
+        for i, (jid, digest) in enumerate(zip(job_ids, row_hashes)):
+            if jid in hashes:
+                continue
+            hashes[jid] = digest
+            old = previous.get(jid)
+            if old is None:
+                delta.inserted.append(jobs[i])
+            elif old != digest:
+                delta.updated.append(jobs[i])
+        delta.deleted = [jid for jid in previous if jid not in hashes]
+        return delta, hashes
+    for i, job in enumerate(jobs):
+        jid = job["job_id"]
+        if jid in hashes:
+            continue
+        digest = hashes[jid] = row_hashes[i] if row_hashes is not None else row_hash(job)
+        old = previous.get(jid)
+        if old is None:
+            delta.inserted.append(job)
+        elif old != digest:
+            delta.updated.append(job)
+    delta.deleted = [jid for jid in previous if jid not in hashes]
+    return delta, hashes
+
+
+def load_csv_catalog(path: str) -> Tuple[List[Dict[str, Any]], List[int], float]:
+    """
+    Ishchi jarayon uchun: CSV ni o'qiydi (HTML normalizatsiyasi bilan) va qator
+    xeshlarini hisoblaydi. Natija oddiy lug'atlar — jarayonlar orasida uzatiladi.
+    """
+    started = time.perf_counter()
+    jobs = read_jobs_csv(path)
+    return jobs, [row_hash(job) for job in jobs], time.perf_counter() - started
@@ -0,0 +1,358 @@
+# cluster.py
+"""
+Bir nechta ishchi jarayon: old jarayon webhook so'rovlarini qabul qiladi va
+update ni from_user.id xeshi bo'yicha N ta ishchidan biriga mahalliy unix
+socket orqali uzatadi. Bitta foydalanuvchining update lari doim bitta
+ishchiga tushadi va u yerda kelgan tartibda ishlanadi (executor.py); turli
+foydalanuvchilar turli yadrolarda parallel ishlaydi.
+
+Ishchilar katalogni faqat o'qiydi (fayllar / SHARED_CATALOG_DIR), yozish esa
+har biri o'z foydalanuvchi bo'lagiga: users.json -> users.{i}of{N}.json
+(main.py WORKER_SHARD / WORKER_COUNT bo'yicha yo'llarni tanlaydi).
+
+    python cluster.py serve --workers 4            # WEBHOOK_* va BOT_TOKEN env dan
+    python cluster.py bench --workers 1,2,4 [--updates 2000] [--cpu-ms 5]
+"""
+import argparse
+import asyncio
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import struct
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+_FRAME = struct.Struct(">I")
+DRAIN_TIMEOUT = 25.0
+# main.py handlerlari ishlatadigan update turlari (old jarayon dp ni import qilmaydi)
+ALLOWED_UPDATES = ["message", "callback_query", "chat_member"]
+SOCKET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "run")
+
+
+# ------------------ Sharding ------------------
+def shard_of(user_id: int, count: int) -> int:
+    return zlib.crc32(str(user_id).encode("ascii")) % count
+
+
+def update_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """Update ichidagi birinchi obyektning `from` (yoki `user`) id si."""
+    member = (update.get("chat_member") or {}).get("new_chat_member")
+    if member:
+        # kanal a'zoligi o'zgarishi — admin emas, shu foydalanuvchi ishchisiga
+        return member["user"]["id"]
+    for key, value in update.items():
+        if key != "update_id" and isinstance(value, dict):
+            user = value.get("from") or value.get("user")
+            if isinstance(user, dict) and "id" in user:
+                return user["id"]
+            chat = value.get("chat")
+            if isinstance(chat, dict) and "id" in chat:
+                return chat["id"]
+    return None
+
+
+def shard_path(path: str, shard: int, count: int) -> str:
+    if count <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard}of{count}{ext}"
+
+
+def build_user_shard(path: str, shard: int, count: int) -> str:
+    """
+    Ishchi bo'lak faylini birinchi marta yaratadi: asl users.json va boshqa
+    N dagi eski bo'lak fayllaridan shu bo'lakka tegishli profillar olinadi
+    (eski bo'laklar o'zaro kesishmaydi, ular asl fayldan yangiroq).
+    """
+    target = shard_path(path, shard, count)
+    if count <= 1 or os.path.exists(target):
+        return target
+    root, ext = os.path.splitext(path)
+    sources = [path] if os.path.exists(path) else []
+    sources += sorted(glob.glob(f"{glob.escape(root)}.*of*{ext}"))
+    users: Dict[str, Any] = {}
+    for src in sources:
+        try:
+            with open(src, "r", encoding="utf-8") as f:
+                users.update(json.load(f))
+        except (OSError, ValueError):
+            continue
+    mine = {key: prof for key, prof in users.items() if shard_of(int(prof.get("tg_id", key)), count) == shard}
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(mine, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, target)
+    return target
+
+
+# ------------------ IPC framing ------------------
+def write_frame(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    writer.write(_FRAME.pack(len(payload)) + payload)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    try:
+        header = await reader.readexactly(_FRAME.size)
+        return await reader.readexactly(_FRAME.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return None
+
+
+# ------------------ Worker side ------------------
+async def serve_worker(dp, bot, sock_path: str, executor=None, drain_timeout: float = DRAIN_TIMEOUT) -> None:
+    """
+    Old jarayondan kelgan update larni executor (per-user FIFO) orqali dp ga
+    uzatadi. Navbat to'lsa socket o'qilmaydi — old jarayon ham sekinlashadi.
+    Bekor qilinganda navbatdagilari tugatiladi.
+    """
+    from aiogram.types import Update
+
+    from executor import UpdateExecutor
+
+    executor = executor or UpdateExecutor()
+
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                update = Update.model_validate(json.loads(frame), context={"bot": bot})
+                await executor.submit_update(update, lambda u=update: dp.feed_update(bot, u))
+        except asyncio.CancelledError:
+            pass  # to'xtash: qabul qilinganlari executor.drain da tugatiladi
+        finally:
+            writer.close()
+
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+    server = await asyncio.start_unix_server(on_connection, path=sock_path)
+    await dp.emit_startup(bot=bot)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.close()
+        await executor.drain(drain_timeout)
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+
+def worker_process(shard: int, count: int, sock_path: str, entry: str) -> None:
+    # env modul import qilinishidan oldin — main.py yo'llarni shundan tanlaydi
+    os.environ["WORKER_SHARD"] = str(shard)
+    os.environ["WORKER_COUNT"] = str(count)
+    module = importlib.import_module(entry)
+
+    # old jarayon o'lsa (SIGKILL ham) ishchi yetim qolmaydi: sentinel o'qiladigan bo'ladi
+    parent = multiprocessing.parent_process()
+    asyncio.run(run_until_signal(module.run_worker(sock_path), parent.sentinel if parent else None))
+
+
+async def run_until_signal(coro, sentinel: Optional[int] = None) -> None:
+    """
+    SIGTERM/SIGINT (yoki `sentinel` fd o'qiladigan bo'lsa) vazifani bekor qiladi —
+    finally bloklari (navbatni tugatish, ishchilarni to'xtatish) ishlaydi.
+    """
+    task = asyncio.create_task(coro)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, task.cancel)
+    if sentinel is not None:
+        loop.add_reader(sentinel, task.cancel)
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if sentinel is not None:
+            loop.remove_reader(sentinel)
+
+
+# ------------------ Front side ------------------
+class Front:
+    def __init__(self, sockets: List[str], secret: Optional[str] = None, connect_timeout: float = 30.0):
+        self.sockets = sockets
+        self.secret = secret
+        self.connect_timeout = connect_timeout
+        self._writers: List[Optional[asyncio.StreamWriter]] = [None] * len(sockets)
+        self.routed = [0] * len(sockets)
+
+    async def _writer(self, shard: int) -> asyncio.StreamWriter:
+        writer = self._writers[shard]
+        if writer is None or writer.is_closing():
+            # ishchi endi ishga tushayotgan bo'lishi mumkin
+            deadline = time.monotonic() + self.connect_timeout
+            while True:
+                try:
+                    _, writer = await asyncio.open_unix_connection(self.sockets[shard])
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise ConnectionError(f"worker {shard} is not listening")
+                    await asyncio.sleep(0.1)
+            self._writers[shard] = writer
+        return writer
+
+    async def route(self, body: bytes) -> int:
+        update = json.loads(body)
+        user_id = update_user_id(update)
+        shard = shard_of(user_id, len(self.sockets)) if user_id is not None else 0
+        writer = await self._writer(shard)
+        write_frame(writer, body)
+        await writer.drain()
+        self.routed[shard] += 1
+        return shard
+
+    async def handle(self, request: web.Request) -> web.Response:
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if self.secret and not secrets.compare_digest(token, self.secret):
+            return web.Response(status=401, text="Unauthorized")
+        try:
+            await self.route(await request.read())
+        except (ConnectionError, OSError):
+            # Telegram 5xx dan keyin qayta yuboradi
+            return web.Response(status=503)
+        return web.json_response({})
+
+    def app(self, path: str) -> web.Application:
+        app = web.Application()
+        app.router.add_post(path, self.handle)
+        return app
+
+    async def close(self) -> None:
+        for writer in self._writers:
+            if writer is not None:
+                writer.close()
+
+
+def start_workers(count: int, entry: str, socket_dir: str = SOCKET_DIR) -> List[Any]:
+    os.makedirs(socket_dir, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    for shard in range(count):
+        sock = os.path.join(socket_dir, f"worker-{shard}.sock")
+        proc = ctx.Process(target=worker_process, args=(shard, count, sock, entry), name=f"worker-{shard}")
+        proc.start()
+        procs.append((proc, sock))
+    return procs
+
+
+def stop_workers(procs: List[Any], timeout: float = DRAIN_TIMEOUT + 5) -> None:
+    for proc, _ in procs:
+        proc.terminate()  # SIGTERM -> ishchi boshlangan update larni tugatadi
+    for proc, _ in procs:
+        proc.join(timeout)
+        if proc.is_alive():
+            proc.kill()
+
+
+async def run_front(count: int, host: str, port: int, path: str, secret: Optional[str],
+                    entry: str = "main", webhook_url: Optional[str] = None, token: Optional[str] = None) -> None:
+    procs = start_workers(count, entry)
+    front = Front([sock for _, sock in procs], secret)
+    runner = web.AppRunner(front.app(path))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        if webhook_url and token:
+            from aiogram import Bot
+            async with Bot(token) as bot:
+                await bot.set_webhook(webhook_url.rstrip("/") + path, secret_token=secret,
+                                      allowed_updates=ALLOWED_UPDATES)
+        print(f"front: {count} workers, listening on {host}:{port}{path}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await front.close()
+        await asyncio.to_thread(stop_workers, procs)
+
+
+# ------------------ Benchmark ------------------
+async def run_worker(sock_path: str) -> None:
+    """Benchmark ishchisi: har update da `BENCH_CPU_MS` CPU ish va javob xabari."""
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Message
+
+    cpu = float(os.environ.get("BENCH_CPU_MS", "5")) / 1000
+    session = AiohttpSession(api=TelegramAPIServer.from_base(os.environ["BENCH_API"]))
+    bot = Bot("42:BENCH", session=session)
+    dp = Dispatcher()
+
+    @dp.message()
+    async def echo(msg: Message):
+        until = time.perf_counter() + cpu
+        while time.perf_counter() < until:
+            pass
+        await msg.answer(msg.text)
+
+    await serve_worker(dp, bot, sock_path)
+
+
+async def bench(workers: int, updates: int, api_port: int = 18083) -> Dict[str, float]:
+    from webhook import FakeBotAPI, _update
+
+    fake = FakeBotAPI()
+    api_runner = web.AppRunner(fake.app())
+    await api_runner.setup()
+    await web.TCPSite(api_runner, "127.0.0.1", api_port).start()
+    os.environ["BENCH_API"] = f"http://127.0.0.1:{api_port}"
+    procs = start_workers(workers, "cluster", os.path.join("/tmp", f"maabhr-bench-{os.getpid()}"))
+    front = Front([sock for _, sock in procs])
+    try:
+        for shard in range(workers):
+            await front._writer(shard)
+        started = time.perf_counter()
+        for n in range(1, updates + 1):
+            await front.route(json.dumps(_update(n)).encode())
+        while len(fake.sent_at) < updates and time.perf_counter() - started < 300:
+            await asyncio.sleep(0.02)
+        took = time.perf_counter() - started
+    finally:
+        await front.close()
+        await asyncio.to_thread(stop_workers, procs)
+        await api_runner.cleanup()
+    return {"workers": workers, "handled": len(fake.sent_at), "seconds": took,
+            "updates_per_s": len(fake.sent_at) / took}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="cluster.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="old jarayon + N ishchi (webhook rejimi)")
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    b = sub.add_parser("bench", help="N ishchi bilan o'tkazuvchanlik (soxta Bot API)")
+    b.add_argument("--workers", default="1,2,4")
+    b.add_argument("--updates", type=int, default=2000)
+    b.add_argument("--cpu-ms", type=float, default=5.0, help="har update dagi CPU ish (ms)")
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from dotenv import load_dotenv
+        load_dotenv()
+        # SIGTERM/SIGINT -> run_front finally: ishchilar to'xtatiladi (aks holda yetim qoladi)
+        asyncio.run(run_until_signal(run_front(
+            args.workers, os.getenv("WEBHOOK_HOST", "0.0.0.0"), int(os.getenv("WEBHOOK_PORT", "8080")),
+            os.getenv("WEBHOOK_PATH", "/tg/webhook"), os.getenv("WEBHOOK_SECRET", "").strip() or None,
+            webhook_url=os.getenv("WEBHOOK_URL", "").strip() or None, token=os.getenv("BOT_TOKEN"),
+        )))
+        print("Front stopped.")
+    else:
+        os.environ["BENCH_CPU_MS"] = str(args.cpu_ms)
+        print(f"cpu cores: {os.cpu_count()}")
+        for n in (int(x) for x in args.workers.split(",")):
+            result = asyncio.run(bench(n, args.updates))
+            print(json.dumps({k: round(v, 2) for k, v in result.items()}))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -0,0 +1,144 @@
+# compaction.py
+"""
+Katalogdan yo'qolgan e'lonlarni kuzatish va foydalanuvchi profillarini tozalash.
+
+JobExpiry — job_id barcha kataloglardan yo'qolgan vaqtni (missing_since) saqlaydi;
+e'lon shu vaqtdan GRACE soniya o'tgach o'lgan hisoblanadi (vaqtinchalik bo'sh
+fayl yoki muvaffaqiyatsiz yuklash savatlarni o'chirib yubormasligi uchun).
+ProfileCompactor — fonda, kichik partiyalar bilan savat/yoqmaganlar ro'yxatidan
+o'lgan id larni olib tashlaydi va partiyalar orasida uxlaydi.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, Any, Iterable, List, Optional
+
+PROFILE_LISTS = ("cart", "disliked")
+
+
+class JobExpiry:
+    def __init__(self, path: Optional[str], grace: float):
+        self.path = path
+        self.grace = grace
+        self.missing_since: Dict[int, float] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.missing_since = {int(k): v for k, v in json.load(f).items()}
+            except (OSError, ValueError):
+                self.missing_since = {}
+
+    def observe(self, seen: Iterable[int], gone: Iterable[int], is_live: Callable[[int], bool],
+                now: Optional[float] = None) -> None:
+        """Katalog deltasidan: qayta paydo bo'lganlar tiklanadi, hech qayerda qolmaganlar belgilanadi."""
+        now = time.time() if now is None else now
+        changed = False
+        for jid in seen:
+            if self.missing_since.pop(jid, None) is not None:
+                changed = True
+        for jid in gone:
+            if jid not in self.missing_since and not is_live(jid):
+                self.missing_since[jid] = now
+                changed = True
+        if changed:
+            self.save()
+
+    def expires_at(self, jid: int) -> Optional[float]:
+        since = self.missing_since.get(jid)
+        return None if since is None else since + self.grace
+
+    def is_dead(self, jid: int, is_live: Callable[[int], bool], now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        if is_live(jid):
+            self.missing_since.pop(jid, None)
+            return False
+        if jid not in self.missing_since:
+            # birinchi marta ko'rilmoqda (masalan, qayta ishga tushgandan keyin) — hisob shu paytdan
+            self.missing_since[jid] = now
+            return False
+        return now >= self.missing_since[jid] + self.grace
+
+    def forget(self, job_ids: Iterable[int]) -> None:
+        # hech bir profilda qolmagan id larni kuzatish shart emas
+        for jid in job_ids:
+            self.missing_since.pop(jid, None)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({str(k): v for k, v in self.missing_since.items()}, f)
+        os.replace(tmp, self.path)
+
+
+class ProfileCompactor:
+    """
+    load_users/save_users bilan ishlaydi. Har partiya (yuklash -> o'zgartirish -> saqlash)
+    await siz bajariladi, shuning uchun handlerlarning o'zgarishlari bilan to'qnashmaydi;
+    partiyalar orasida `pause` soniya uxlab, interaktiv so'rovlarga navbat beradi.
+    """
+
+    def __init__(self, expiry: JobExpiry, is_live: Callable[[int], bool],
+                 load_users: Callable[[], Dict[str, Any]], save_users: Callable[[Dict[str, Any]], None],
+                 refresh: Optional[Callable[[], Awaitable[bool]]] = None,
+                 batch_size: int = 200, pause: float = 0.5):
+        self.expiry = expiry
+        self.is_live = is_live
+        self.load_users = load_users
+        self.save_users = save_users
+        # kataloglarni yangilaydi (korutina — yuklash event loopdan tashqarida); False qaytarsa (masalan, katalog bo'sh) tozalash o'tkazib yuboriladi
+        self.refresh = refresh
+        self.batch_size = batch_size
+        self.pause = pause
+        self.stats = {"runs": 0, "profiles": 0, "removed": 0, "batches": 0}
+
+    def compact_batch(self, keys: List[str], now: float) -> int:
+        users = self.load_users()
+        removed = 0
+        for key in keys:
+            prof = users.get(key)
+            if not prof:
+                continue
+            for field in PROFILE_LISTS:
+                ids = prof.get(field) or []
+                alive = [jid for jid in ids if not self.expiry.is_dead(jid, self.is_live, now)]
+                if len(alive) != len(ids):
+                    removed += len(ids) - len(alive)
+                    prof[field] = alive
+        if removed:
+            self.save_users(users)
+        return removed
+
+    async def run_once(self) -> int:
+        if self.refresh is not None and not await self.refresh():
+            return 0
+        now = time.time()
+        keys = list(self.load_users().keys())
+        removed = 0
+        for start in range(0, len(keys), self.batch_size):
+            removed += self.compact_batch(keys[start:start + self.batch_size], now)
+            self.stats["batches"] += 1
+            await asyncio.sleep(self.pause)
+        # profillarda endi uchramaydigan o'lik id larni kuzatishdan chiqaramiz
+        referenced = set()
+        for prof in self.load_users().values():
+            for field in PROFILE_LISTS:
+                referenced.update(prof.get(field) or [])
+        self.expiry.forget([jid for jid in list(self.expiry.missing_since) if jid not in referenced])
+        self.expiry.save()
+        self.stats["runs"] += 1
+        self.stats["profiles"] += len(keys)
+        self.stats["removed"] += removed
+        return removed
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                removed = await self.run_once()
+                if removed:
+                    print(f"compaction: removed {removed} stale ids")
+            except Exception as e:
+                print(f"compaction failed: {e!r}")
+            await asyncio.sleep(interval)
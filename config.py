@@ -22,6 +22,8 @@ HH_CSV = os.path.join(DATA_DIR, "hh.csv")
 LINKEDIN_CSV = os.path.join(DATA_DIR, "linkedin.csv")
 OLX_CSV = os.path.join(DATA_DIR, "olx.csv")
 ISHUZ_CSV = os.path.join(DATA_DIR, "ishuz.csv")
+# `python snapshot.py build-catalog` natijasi
+CATALOG_SNAPSHOT = os.path.join(DATA_DIR, "catalog.bin")
 
 # Savat limiti
 CART_LIMIT = 2000
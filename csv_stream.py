@@ -0,0 +1,195 @@
+# csv_stream.py
+import csv
+import mmap
+import os
+import sys
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from telegram_html import to_telegram_html
+
+# Xotirada qoladigan (ro'yxat ko'rinishi uchun kerakli) ustunlar
+RESIDENT_FIELDS = ("name", "company", "location", "skills", "link")
+LAZY_FIELD = "description_html"
+
+
+class CsvRowStore:
+    """
+    CSV fayl ustidagi mmap: qator boshlanish offseti va uzunligi bo'yicha
+    kerakli ustunni talab qilinganda o'qiydi. Telegram HTML ga o'tkazilgan
+    tavsiflar kichik LRU da turadi — tez-tez ochiladigan kartochka har safar
+    qayta normalizatsiya qilinmaydi.
+    """
+
+    def __init__(self, path: str, cache_size: int = 256):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.header: List[str] = []
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        # katalog qayta yuklanganda eski store ga LazyJob nusxalari (masalan,
+        # DedupIndex dagi) hali murojaat qilishi mumkin — shuning uchun darhol
+        # emas, oxirgi havola yo'qolganda yopiladi
+        self._finalizer = weakref.finalize(self, CsvRowStore._release, self._mm, self._file)
+
+    def raw_row(self, offset: int, length: int) -> List[str]:
+        text = self._mm[offset:offset + length].decode("utf-8")
+        return next(csv.reader([text]), [])
+
+    def field(self, offset: int, length: int, name: str) -> str:
+        try:
+            col = self.header.index(name)
+        except ValueError:
+            return ""
+        row = self.raw_row(offset, length)
+        return row[col] if col < len(row) else ""
+
+    def description_uncached(self, offset: int, length: int) -> str:
+        # xesh uchun: o'sha normalizatsiya, lekin LRU ni butun katalog bilan to'ldirmaydi
+        text = self._cache.get(offset)
+        return text if text is not None else to_telegram_html(self.field(offset, length, LAZY_FIELD))
+
+    def description(self, offset: int, length: int) -> str:
+        text = self._cache.get(offset)
+        if text is not None:
+            self._cache.move_to_end(offset)
+            return text
+        text = to_telegram_html(self.field(offset, length, LAZY_FIELD))
+        if self.cache_size > 0:
+            self._cache[offset] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    @staticmethod
+    def _release(mm: Optional[mmap.mmap], file) -> None:
+        if mm is not None:
+            mm.close()
+        file.close()
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+class LazyJob(dict):
+    """
+    Ish yozuvi: description_html xotirada saqlanmaydi, har safar so'ralganda
+    _store.description(offset, length) orqali o'qiladi (CsvRowStore — mmap
+    qilingan CSV, snapshot.SnapshotReader — satrlar jadvali).
+    Nusxa olish uchun copy.copy() dan foydalaning — dict(job) faqat
+    rezident maydonlarni ko'chiradi.
+    """
+
+    __slots__ = ("_store", "_offset", "_length")
+
+    def _description(self) -> str:
+        return self._store.description(self._offset, self._length)
+
+    def description_uncached(self) -> str:
+        # kontent xeshi uchun: read_jobs_csv dagi bilan bir xil normalizatsiya qilingan tavsif
+        return self._store.description_uncached(self._offset, self._length)
+
+    def __getitem__(self, key):
+        if key == LAZY_FIELD and not dict.__contains__(self, key):
+            return self._description()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key == LAZY_FIELD and not dict.__contains__(self, key):
+            return self._description()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key) -> bool:
+        return key == LAZY_FIELD or dict.__contains__(self, key)
+
+
+def read_jobs_csv(path: str) -> List[Dict[str, Any]]:
+    """Kichik CSV ni to'liq o'qiydi; tavsif Telegram HTML ga shu yerda bir marta o'tkaziladi."""
+    jobs = []
+    if not os.path.exists(path):
+        return jobs
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                job_id = int((row.get("job_id") or "").strip())
+            except ValueError:
+                continue
+            jobs.append({
+                "job_id": job_id,
+                "name": row.get("name", ""),
+                "company": row.get("company", ""),
+                "location": row.get("location", ""),
+                "skills": row.get("skills", ""),
+                # ingest paytida Telegram HTML ga o'tkaziladi va kesiladi
+                "description_html": to_telegram_html(row.get("description_html", "")),
+                "link": row.get("link", "")
+            })
+    return jobs
+
+
+def _records(mm: mmap.mmap):
+    # Qo'shtirnoq ichidagi yangi qatorlarni hisobga olib, (offset, uzunlik) juftlari
+    offset = 0
+    start = 0
+    quotes = 0
+    size = len(mm)
+    while offset < size:
+        line = mm.readline()
+        quotes += line.count(b'"')
+        offset += len(line)
+        if quotes % 2 == 0:
+            yield start, offset - start
+            start = offset
+            quotes = 0
+    if start < size:
+        yield start, size - start
+
+
+def stream_jobs_csv(path: str, store: Optional[CsvRowStore] = None, cache_size: int = 256) -> List[Dict[str, Any]]:
+    """
+    CSV ni oqim bilan o'qiydi: har bir qatorning bayt offseti yoziladi,
+    xotirada faqat RESIDENT_FIELDS qoladi, tavsif esa kerak bo'lganda yuklanadi.
+    """
+    store = store or CsvRowStore(path, cache_size=cache_size)
+    jobs: List[Dict[str, Any]] = []
+    if store._mm is None:
+        return jobs
+    store._mm.seek(0)
+    spans: List[tuple] = []
+
+    def texts():
+        for offset, length in _records(store._mm):
+            spans.append((offset, length))
+            yield store._mm[offset:offset + length].decode("utf-8")
+
+    # bitta csv.reader barcha yozuvlar uchun; spans[-1] — joriy qator offseti
+    reader = csv.reader(texts())
+    store.header = [h.strip() for h in next(reader, [])]
+    spans.clear()
+    cols = {name: i for i, name in enumerate(store.header)}
+    for row in reader:
+        offset, length = spans.pop()
+        if not row:
+            continue
+        try:
+            job_id = int(row[cols["job_id"]].strip())
+        except Exception:
+            continue
+        job = LazyJob(job_id=job_id)
+        for name in RESIDENT_FIELDS:
+            i = cols.get(name)
+            job[name] = row[i] if i is not None and i < len(row) else ""
+        # takrorlanuvchi kompaniya/joylashuv satrlari bitta nusxada saqlanadi
+        job["company"] = sys.intern(job["company"])
+        job["location"] = sys.intern(job["location"])
+        job._store, job._offset, job._length = store, offset, length
+        jobs.append(job)
+    return jobs
+
@@ -0,0 +1,198 @@
+# dedup.py
+import copy
+import hashlib
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Imzo uzunligi = BANDS * ROWS. O'xshashlik chegarasi taxminan (1/BANDS) ** (1/ROWS) ≈ 0.7
+BANDS = 16
+ROWS = 4
+NUM_HASHES = BANDS * ROWS
+# Bir bucketga tushgan nomzodlar imzo bo'yicha shu chegaradan o'tsa — dublikat
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_EMPTY = (1 << 64) - 1
+
+
+def _shingles(job: Dict[str, Any]) -> set:
+    text = " ".join([
+        job.get("name") or "",
+        job.get("company") or "",
+        _TAG_RE.sub(" ", job.get("description_html") or ""),
+    ]).lower()
+    words = _WORD_RE.findall(text)
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(job: Dict[str, Any]) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash: har bir shingle bir marta xeshlanadi va NUM_HASHES
+    ta savatdan biriga tushadi (savatdagi minimum saqlanadi). Bo'sh savatlar
+    o'ngdagi birinchi to'la savatdan to'ldiriladi (densification).
+    Narx — O(shingle soni), NUM_HASHES ga bog'liq emas.
+    """
+    sig = [_EMPTY] * NUM_HASHES
+    for sh in _shingles(job):
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "little")
+        b, v = h % NUM_HASHES, h // NUM_HASHES
+        if v < sig[b]:
+            sig[b] = v
+    if all(v == _EMPTY for v in sig):
+        return tuple(sig)
+    for i in range(NUM_HASHES):
+        if sig[i] == _EMPTY:
+            j, step = i, 0
+            while sig[j] == _EMPTY:
+                j = (j + 1) % NUM_HASHES
+                step += 1
+            # qo'shni savat qiymatini siljish bilan olamiz, shunda savatlar bir xil bo'lib qolmaydi
+            sig[i] = sig[j] + step * NUM_HASHES
+    return tuple(sig)
+
+
+def signatures(jobs: Iterable[Dict[str, Any]]) -> Dict[int, Tuple[int, ...]]:
+    """job_id -> MinHash imzo; DedupIndex.apply ga oldindan (boshqa oqimda) hisoblab berish uchun."""
+    return {job["job_id"]: minhash(job) for job in jobs}
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_HASHES
+
+
+class DedupIndex:
+    """
+    Dublikat klasterlarining inkremental varianti: imzolar, LSH bucketlar va
+    o'xshashlik qirralari saqlanadi, manba deltasi (catalog_delta.CatalogDelta)
+    kelganda faqat tegilgan klasterlar qayta yig'iladi. Kalit — (manba, job_id).
+    Bucketda yangi a'zo faqat bucket boshi bilan solishtiriladi — juftma-juft
+    taqqoslash yo'q; bosh o'chirilsa qolganlar yangi bosh bilan qayta bog'lanadi.
+    """
+
+    def __init__(self, sources: List[str]):
+        self._rank = {name: i for i, name in enumerate(sources)}
+        self._jobs: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._sigs: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[str, int]]] = {}
+        self._edges: Dict[Tuple[str, int], set] = {}
+        self._cluster: Dict[Tuple[str, int], Tuple[str, int]] = {}  # a'zo -> klaster boshi
+        self._members: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+        self._best_key: Dict[Tuple[str, int], Tuple[str, int]] = {}
+        self._canonical: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in sources}
+        self.sources: set = set()
+
+    def apply(self, source: str, delta, sigs: Optional[Dict[int, Tuple[int, ...]]] = None) -> None:
+        """sigs — delta.changed uchun signatures() natijasi; berilmasa shu yerda hisoblanadi."""
+        # keyin ro'yxatdan o'tgan manbalar oxirida turadi
+        self._rank.setdefault(source, len(self._rank))
+        self._canonical.setdefault(source, {})
+        self.sources.add(source)
+        dirty: set = set()
+        for jid in delta.deleted:
+            self._remove((source, jid), dirty)
+        for job in delta.updated:
+            self._remove((source, job["job_id"]), dirty)
+        for j in delta.changed:
+            job = copy.copy(j)
+            job["source"] = source
+            self._add((source, job["job_id"]), job, dirty, sigs.get(job["job_id"]) if sigs else None)
+        self._recluster(dirty)
+
+    def parts(self, sources: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Kanonik e'lonlar, manba bo'yicha job_id tartibida (MergedJobsView uchun).
+        sources berilsa faqat shu manbalar (klasterlar baribir hammasi bo'yicha).
+        """
+        names = sources if sources is not None else list(self._canonical)
+        return [[by_id[jid] for jid in sorted(by_id)] for by_id in (self._canonical.get(n, {}) for n in names)]
+
+    # ------------------ Internals ------------------
+    def _order(self, key: Tuple[str, int]) -> Tuple[int, int]:
+        return self._rank.get(key[0], len(self._rank)), key[1]
+
+    def _link(self, a, b) -> None:
+        self._edges[a].add(b)
+        self._edges[b].add(a)
+
+    def _touch(self, key, dirty: set) -> None:
+        head = self._cluster.get(key)
+        dirty.update(self._members.get(head, (key,)))
+
+    def _add(self, key, job: Dict[str, Any], dirty: set, sig: Optional[Tuple[int, ...]] = None) -> None:
+        if sig is None:
+            sig = minhash(job)
+        self._jobs[key], self._sigs[key], self._edges[key] = job, sig, set()
+        dirty.add(key)
+        if sig[0] == _EMPTY:
+            return
+        for band in range(BANDS):
+            bucket = self._buckets.setdefault((band, sig[band * ROWS:(band + 1) * ROWS]), [])
+            if bucket and estimate_similarity(self._sigs[bucket[0]], sig) >= SIMILARITY_THRESHOLD:
+                self._link(bucket[0], key)
+                self._touch(bucket[0], dirty)
+            bucket.append(key)
+
+    def _remove(self, key, dirty: set) -> None:
+        if key not in self._jobs:
+            return
+        self._touch(key, dirty)
+        sig = self._sigs.pop(key)
+        del self._jobs[key]
+        for other in self._edges.pop(key):
+            self._edges[other].discard(key)
+        if sig[0] != _EMPTY:
+            for band in range(BANDS):
+                bkey = (band, sig[band * ROWS:(band + 1) * ROWS])
+                bucket = self._buckets[bkey]
+                was_head = bucket[0] == key
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[bkey]
+                elif was_head:
+                    # yangi bosh bilan qayta bog'lash (ortiqcha qirralar zarar qilmaydi)
+                    head = bucket[0]
+                    for other in bucket[1:]:
+                        if estimate_similarity(self._sigs[head], self._sigs[other]) >= SIMILARITY_THRESHOLD:
+                            self._link(head, other)
+                    for other in bucket:
+                        self._touch(other, dirty)
+
+    def _recluster(self, dirty: set) -> None:
+        # tegilgan klasterlar to'liq dirty ichida (_touch), shuning uchun
+        # ularning komponentlari ham faqat dirty a'zolardan iborat bo'ladi
+        for key in dirty:
+            head = self._cluster.pop(key, None)
+            if head is not None and head in self._members:
+                del self._members[head]
+                best = self._best_key.pop(head)
+                self._canonical[best[0]].pop(best[1], None)
+        seen: set = set()
+        for start in dirty:
+            if start in seen or start not in self._jobs:
+                continue
+            component, stack = [], [start]
+            seen.add(start)
+            while stack:
+                key = stack.pop()
+                component.append(key)
+                for other in self._edges[key]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            component.sort(key=self._order)
+            head = component[0]
+            for key in component:
+                self._cluster[key] = head
+            self._members[head] = component
+            # tavsifi eng to'liq a'zo, teng bo'lsa tartibda birinchisi
+            best = min(component, key=lambda k: (-len(self._jobs[k].get("description_html") or ""), self._order(k)))
+            self._best_key[head] = best
+            canonical = copy.copy(self._jobs[best])
+            canonical["sources"] = [
+                {"source": k[0], "job_id": k[1], "link": self._jobs[k].get("link", "")} for k in component
+            ]
+            self._canonical[best[0]][best[1]] = canonical
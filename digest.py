@@ -0,0 +1,144 @@
+# digest.py
+"""
+Kunlik dayjest: mos yangi e'lonlar foydalanuvchi bo'yicha yig'iladi va kuniga
+bir marta bitta xabar (sahifalangan) sifatida yuboriladi.
+
+Yig'ish ixcham: har foydalanuvchi uchun array("Q") — (manba indeksi << 40) | job_id.
+Yuborish oynasi (start_hour dan window soniya) `buckets` ta bo'lakka bo'linadi;
+foydalanuvchi bo'lagi tg_id ning barqaror xeshidan olinadi, shuning uchun
+yuborishlar oyna bo'ylab tekis taqsimlanadi va Bot API ga bir vaqtda urilmaydi.
+"""
+import asyncio
+import json
+import os
+import time
+import zlib
+from array import array
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+MAX_DIGEST_ITEMS = 100
+DIGEST_PAGE_SIZE = 5
+_ID_BITS = 40
+_ID_MASK = (1 << _ID_BITS) - 1
+DAY = 24 * 3600
+
+
+def user_bucket(tg_id: int, buckets: int) -> int:
+    return zlib.crc32(str(tg_id).encode("ascii")) % buckets
+
+
+class DigestScheduler:
+    def __init__(self, path: Optional[str], start_hour: float = 9.0, window: float = 2 * 3600,
+                 buckets: int = 60, tz_offset: float = 0.0):
+        self.path = path
+        self.start_hour = start_hour
+        self.window = window
+        self.buckets = max(1, buckets)
+        self.tz_offset = tz_offset  # soat, UTC ga nisbatan (Toshkent: 5)
+        self.enabled: Set[int] = set()
+        self.sources: List[str] = []
+        self.pending: Dict[int, array] = {}
+        # oxirgi yuborilgan dayjest (sahifalash tugmalari shundan o'qiydi)
+        self.delivered: Dict[int, array] = {}
+        self.last_slot = 0.0
+        self.stats = {"sent": 0, "failed": 0, "slots": 0}
+        self._load()
+
+    # ------------------ Accumulation ------------------
+    def set_enabled(self, tg_id: int, on: bool) -> None:
+        if on:
+            self.enabled.add(tg_id)
+        else:
+            self.enabled.discard(tg_id)
+            self.pending.pop(tg_id, None)
+
+    def _pack(self, source: str, job_id: int) -> int:
+        if source not in self.sources:
+            self.sources.append(source)
+        return (self.sources.index(source) << _ID_BITS) | (job_id & _ID_MASK)
+
+    def unpack(self, packed: int) -> Tuple[str, int]:
+        return self.sources[packed >> _ID_BITS], packed & _ID_MASK
+
+    def add(self, tg_id: int, source: str, job_ids: Iterable[int]) -> None:
+        items = self.pending.setdefault(tg_id, array("Q"))
+        for jid in job_ids:
+            packed = self._pack(source, jid)
+            if len(items) < MAX_DIGEST_ITEMS and packed not in items:
+                items.append(packed)
+
+    def page(self, tg_id: int, page: int) -> Tuple[List[Tuple[str, int]], int, int]:
+        """(shu sahifadagi (manba, job_id) lar, jami, sahifalar soni)."""
+        items = self.delivered.get(tg_id) or array("Q")
+        pages = max(1, (len(items) + DIGEST_PAGE_SIZE - 1) // DIGEST_PAGE_SIZE)
+        page = max(0, min(page, pages - 1))
+        chunk = items[page * DIGEST_PAGE_SIZE:(page + 1) * DIGEST_PAGE_SIZE]
+        return [self.unpack(p) for p in chunk], len(items), pages
+
+    # ------------------ Scheduling ------------------
+    def slot_time(self, day_start: float, bucket: int) -> float:
+        return day_start + self.start_hour * 3600 + bucket * self.window / self.buckets
+
+    def next_slot(self, now: float) -> Tuple[float, int]:
+        """last_slot dan keyingi birinchi (vaqt, bo'lak); o'tib ketgan bugungi bo'laklar ham qaytadi."""
+        offset = self.tz_offset * 3600
+        today = (now + offset) // DAY * DAY - offset
+        for day_start in (today - DAY, today, today + DAY):
+            for bucket in range(self.buckets):
+                ts = self.slot_time(day_start, bucket)
+                # kechagi o'tkazib yuborilganlar qayta yuborilmaydi
+                if ts > self.last_slot and ts > now - DAY / 2:
+                    return ts, bucket
+        return self.slot_time(today + 2 * DAY, 0), 0
+
+    def due(self, bucket: int) -> List[int]:
+        return [tg_id for tg_id in self.pending
+                if tg_id in self.enabled and user_bucket(tg_id, self.buckets) == bucket]
+
+    async def run(self, send: Callable[[int], Awaitable[None]], pause: float = 0.05,
+                  clock: Callable[[], float] = time.time) -> None:
+        while True:
+            ts, bucket = self.next_slot(clock())
+            delay = ts - clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            for tg_id in self.due(bucket):
+                self.delivered[tg_id] = self.pending.pop(tg_id)
+                try:
+                    await send(tg_id)
+                    self.stats["sent"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    print(f"digest to {tg_id} failed: {e!r}")
+                await asyncio.sleep(pause)
+            self.last_slot = ts
+            self.stats["slots"] += 1
+            self.save()
+
+    # ------------------ Persistence ------------------
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.sources = data.get("sources", [])
+        self.last_slot = data.get("last_slot", 0.0)
+        self.pending = {int(k): array("Q", v) for k, v in data.get("pending", {}).items()}
+        self.delivered = {int(k): array("Q", v) for k, v in data.get("delivered", {}).items()}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "sources": self.sources,
+            "last_slot": self.last_slot,
+            "pending": {str(k): v.tolist() for k, v in self.pending.items()},
+            "delivered": {str(k): v.tolist() for k, v in self.delivered.items()},
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
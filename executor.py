@@ -0,0 +1,185 @@
+# executor.py
+"""
+Update larni bajarish qatlami: umumiy parallellik chegarasi va har foydalanuvchi
+uchun FIFO navbat.
+
+Bitta foydalanuvchining update lari kelgan tartibda, ketma-ket bajariladi
+(FSM holati va savat yozuvlari aralashmaydi); turli foydalanuvchilar
+`concurrency` tagacha parallel. Navbatdagi update lar soni `max_pending` ga
+yetsa submit() kutadi — polling sikli (yoki webhook / IPC o'quvchisi) to'xtab
+turadi va yuk xotirada to'planmaydi. Chiqish: navbat chuqurligi, faol
+vazifalar, kutish vaqti (update kelganidan bajarilish boshlanguncha).
+
+`target` — update qaysi xabarni qayta chizishini qaytaruvchi funksiya (masalan,
+navigatsiya callbacklari uchun (chat_id, message_id)). Bitta foydalanuvchi
+update lari ketma-ket bajarilgani uchun bir xabarga tahrirlar hech qachon
+ustma-ust tushmaydi; has_queued() orqali handler o'z tahririni, shu xabarni
+baribir qayta chizadigan yangiroq update navbatda turgan bo'lsa, tashlab
+yuborishi mumkin (message_state.EditCoalescer).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+
+DRAIN_TIMEOUT = 25.0
+
+Job = Callable[[], Awaitable[Any]]
+Target = Callable[[Update], Optional[Hashable]]
+
+
+def update_key(update: Update) -> Hashable:
+    """Foydalanuvchi (yoki chat) id; topilmasa update o'zi alohida navbat."""
+    event = update.event
+    member = getattr(event, "new_chat_member", None)
+    if member is not None:
+        return member.user.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return chat.id
+    return ("update", update.update_id)
+
+
+class UpdateExecutor:
+    def __init__(self, concurrency: int = 32, max_pending: int = 1000, target: Optional[Target] = None):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.target = target
+        self._queues: Dict[Hashable, Deque[Tuple[float, Job, Optional[Hashable]]]] = {}
+        self._targets: Dict[Hashable, int] = {}  # target -> navbatda (boshlanmagan) update lar
+        self._ready: Deque[Hashable] = deque()  # navbati bor, hozir bajarilmayotgan foydalanuvchilar
+        self._running: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending = 0
+        self._space = asyncio.Event()
+        self._space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self.stats = {"submitted": 0, "processed": 0, "failed": 0, "max_depth": 0,
+                      "backpressure": 0, "blocked_s": 0.0, "max_wait_s": 0.0}
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def has_queued(self, target: Hashable) -> bool:
+        """Shu target uchun hali boshlanmagan update bormi."""
+        return target in self._targets
+
+    async def submit_update(self, update: Update, job: Job) -> None:
+        target = self.target(update) if self.target is not None else None
+        await self.submit(update_key(update), job, target)
+
+    async def submit(self, key: Optional[Hashable], job: Job, target: Optional[Hashable] = None) -> None:
+        """Navbatga qo'yadi; navbat to'la bo'lsa joy bo'shaguncha kutadi."""
+        if self._pending >= self.max_pending:
+            self.stats["backpressure"] += 1
+            started = time.monotonic()
+            while self._pending >= self.max_pending:
+                self._space.clear()
+                await self._space.wait()
+            self.stats["blocked_s"] += time.monotonic() - started
+        self._queues.setdefault(key, deque()).append((time.monotonic(), job, target))
+        if target is not None:
+            self._targets[target] = self._targets.get(target, 0) + 1
+        self._pending += 1
+        self._idle.clear()
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._pending)
+        if key not in self._running and len(self._queues[key]) == 1:
+            self._ready.append(key)
+        self._pump()
+
+    def _pump(self) -> None:
+        while self._ready and len(self._running) < self.concurrency:
+            key = self._ready.popleft()
+            self._running.add(key)
+            task = asyncio.create_task(self._run(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        enqueued_at, job, target = queue.popleft()
+        if target is not None:
+            left = self._targets.pop(target) - 1
+            if left:
+                self._targets[target] = left
+        wait = time.monotonic() - enqueued_at
+        self._waits.append(wait)
+        self.stats["max_wait_s"] = max(self.stats["max_wait_s"], wait)
+        try:
+            await job()
+            self.stats["processed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"update for {key} failed: {e!r}")
+        finally:
+            self._pending -= 1
+            self._running.discard(key)
+            if queue:
+                # navbat oxiriga — bitta faol foydalanuvchi boshqalarni to'sib qo'ymaydi
+                self._ready.append(key)
+            else:
+                del self._queues[key]
+            if self._pending < self.max_pending:
+                self._space.set()
+            if not self._pending:
+                self._idle.set()
+            self._pump()
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def summary(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "depth": self._pending, "active": len(self._running), "users_queued": len(self._queues),
+            "wait_avg_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "wait_p95_ms": waits[int(len(waits) * 0.95) - 1] * 1000 if waits else 0.0,
+            **self.stats,
+        }
+
+
+async def poll_updates(dp: Dispatcher, bot: Bot, executor: UpdateExecutor, polling_timeout: int = 10,
+                       allowed_updates: Optional[List[str]] = None, drain_timeout: float = DRAIN_TIMEOUT) -> None:
+    """
+    dp.start_polling o'rniga: update lar executor orqali bajariladi, navbat
+    to'lganda keyingi getUpdates yuborilmaydi (Telegram ularni o'zida saqlab turadi).
+    """
+    if allowed_updates is None:
+        allowed_updates = dp.resolve_used_update_types()
+    kwargs = {"request_timeout": int(bot.session.timeout + polling_timeout)} if bot.session.timeout else {}
+    offset: Optional[int] = None
+    delay = 1.0
+    await dp.emit_startup(bot=bot)
+    try:
+        while True:
+            try:
+                updates = await bot(GetUpdates(offset=offset, timeout=polling_timeout,
+                                               allowed_updates=allowed_updates), **kwargs)
+            except Exception as e:
+                print(f"getUpdates failed: {e!r}; retry in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 1.0
+            for update in updates:
+                offset = update.update_id + 1
+                await executor.submit_update(update, lambda u=update: dp.feed_update(bot, u))
+    finally:
+        await executor.drain(drain_timeout)
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
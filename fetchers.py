@@ -0,0 +1,494 @@
+# fetchers.py
+"""
+Manbalardan (hh / linkedin / olx / ishuz) ishlarni yig'ib, load_jobs o'qiydigan
+CSV sxemasida yozadi. Har bir manba — alohida adapter; barcha so'rovlar bitta
+aiohttp sessiyasi (ulanishlar puli) orqali, host bo'yicha parallellik va tezlik
+cheklovlari bilan, ETag / If-Modified-Since shartli so'rovlari bilan yuboriladi.
+
+    python fetchers.py fetch [--source hh ...] [--pages 5] [--base-url hh=http://127.0.0.1:8080]
+                             [--record data/recorded]
+    python fetchers.py serve-recorded data/recorded [--port 8080]
+
+serve-recorded — yozib olingan sahifalarni beradigan lokal server; adapterlar
+--base-url bilan unga yo'naltirilsa, butun zanjirni tarmoqsiz tekshirish mumkin.
+"""
+import abc
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+import zlib
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+import aiohttp
+
+CSV_FIELDS = ["job_id", "name", "company", "location", "skills", "description_html", "link"]
+USER_AGENT = "maabhr-ingest/1.0"
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 16 * 1024
+
+
+# ------------------ Limits ------------------
+class HostLimiter:
+    """Bitta host uchun: bir vaqtdagi so'rovlar soni va sekundiga so'rovlar (oddiy interval)."""
+
+    def __init__(self, concurrency: int, rate: float):
+        self._sem = asyncio.Semaphore(concurrency)
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        if self._interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next - now
+                self._next = max(now, self._next) + self._interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+
+
+class ConditionalCache:
+    """
+    url -> {etag, last_modified, rows}. 304 javobida sahifa qayta tahlil
+    qilinmaydi — oldingi qatorlar ishlatiladi.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def headers(self, url: str) -> Dict[str, str]:
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+# ------------------ Adapters ------------------
+def stable_job_id(external_id: Any, link: str) -> int:
+    # tashqi raqamli id bo'lsa — o'shani, aks holda havoladan barqaror id
+    try:
+        return int(str(external_id))
+    except (TypeError, ValueError):
+        return zlib.crc32(link.encode("utf-8")) & 0x7FFFFFFF
+
+
+class SourceAdapter(abc.ABC):
+    """Manba adapteri: sahifa URL lari va sahifani CSV qatorlariga aylantirish."""
+
+    name = ""
+    base_url = ""
+    concurrency = 2
+    rate = 2.0  # so'rov/soniya, host bo'yicha
+    streaming = False  # True bo'lsa tana bo'laklab parse_chunks() ga beriladi
+
+    def __init__(self, base_url: Optional[str] = None, pages: int = 5):
+        self.base_url = (base_url or self.base_url).rstrip("/")
+        self.pages = pages
+
+    @abc.abstractmethod
+    def page_urls(self) -> List[str]:
+        ...
+
+    @abc.abstractmethod
+    def parse(self, body: bytes) -> Iterable[Dict[str, Any]]:
+        ...
+
+    async def parse_chunks(self, chunks: AsyncIterator[bytes]) -> List[Dict[str, Any]]:
+        body = b"".join([chunk async for chunk in chunks])
+        return list(self.parse(body))
+
+
+class HHAdapter(SourceAdapter):
+    # hh.ru ochiq API: area=97 — O'zbekiston
+    name = "hh"
+    base_url = "https://api.hh.ru"
+    rate = 5.0
+
+    def page_urls(self) -> List[str]:
+        return [f"{self.base_url}/vacancies?area=97&per_page=100&page={n}" for n in range(self.pages)]
+
+    def parse(self, body: bytes) -> Iterable[Dict[str, Any]]:
+        for item in json.loads(body).get("items", []):
+            snippet = item.get("snippet") or {}
+            link = item.get("alternate_url") or ""
+            yield {
+                "job_id": stable_job_id(item.get("id"), link),
+                "name": item.get("name") or "",
+                "company": (item.get("employer") or {}).get("name") or "",
+                "location": (item.get("area") or {}).get("name") or "",
+                "skills": ";".join(s.get("name", "") for s in item.get("key_skills") or []),
+                "description_html": "".join(
+                    f"<p>{snippet[k]}</p>" for k in ("requirement", "responsibility") if snippet.get(k)
+                ),
+                "link": link,
+            }
+
+
+class OlxAdapter(SourceAdapter):
+    # olx.uz: "Ish" (category_id=6) e'lonlari JSON API
+    name = "olx"
+    base_url = "https://www.olx.uz"
+
+    def page_urls(self) -> List[str]:
+        return [f"{self.base_url}/api/v1/offers/?category_id=6&offset={40 * n}&limit=40" for n in range(self.pages)]
+
+    def parse(self, body: bytes) -> Iterable[Dict[str, Any]]:
+        for item in json.loads(body).get("data", []):
+            link = item.get("url") or ""
+            location = item.get("location") or {}
+            yield {
+                "job_id": stable_job_id(item.get("id"), link),
+                "name": item.get("title") or "",
+                "company": (item.get("user") or {}).get("name") or "",
+                "location": ", ".join(
+                    (location.get(k) or {}).get("name", "") for k in ("region", "city") if location.get(k)
+                ),
+                "skills": "",
+                "description_html": item.get("description") or "",
+                "link": link,
+            }
+
+
+# Yopuvchi tegi bo'lmaydigan elementlar — maydon chuqurligiga qo'shilmaydi
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+
+class _CardParser(HTMLParser):
+    """
+    Ro'yxat sahifasidagi kartochkalar uchun oqimli parser. `card_class`
+    elementi yangi kartochkani boshlaydi; `fields` — class nomi -> maydon.
+    Havola kartochka ichidagi birinchi <a href> dan olinadi va `base_url`
+    ga nisbatan to'liq URL ga aylantiriladi (Telegram URL tugmalari uchun).
+    """
+
+    def __init__(self, card_class: str, fields: Dict[str, str], id_attr: str = "", base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.card_class = card_class
+        self.fields = fields
+        self.id_attr = id_attr
+        self.base_url = base_url
+        self.rows: List[Dict[str, Any]] = []
+        self._card: Optional[Dict[str, Any]] = None
+        self._field: Optional[str] = None
+        self._depth = 0
+        # matn bo'laklari teg chegarasigacha yig'iladi: feed() bo'laklari so'zni bo'lib yuborishi mumkin
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if self.card_class in classes:
+            self._flush()
+            self._card = {"external_id": attrs.get(self.id_attr, "") if self.id_attr else "", "link": ""}
+        if self._card is None:
+            return
+        if tag == "a" and not self._card["link"] and attrs.get("href"):
+            self._card["link"] = urljoin(self.base_url + "/", attrs["href"]).split("?")[0]
+        for cls, field in self.fields.items():
+            if cls in classes:
+                self._field, self._depth = field, 0
+        if self._field and tag not in VOID_TAGS:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if self._field and tag not in VOID_TAGS:
+            self._depth -= 1
+            if self._depth <= 0:
+                self._field = None
+
+    def handle_data(self, data):
+        if self._card is not None and self._field:
+            self._text.append(data)
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        text = "".join(self._text).strip()
+        self._text.clear()
+        if text and self._card is not None and self._field:
+            self._card[self._field] = (self._card.get(self._field, "") + " " + text).strip()
+
+    def _flush(self):
+        self._flush_text()
+        if self._card and self._card.get("name"):
+            ext = self._card["external_id"].rsplit(":", 1)[-1]
+            self.rows.append({
+                "job_id": stable_job_id(ext or None, self._card["link"]),
+                "name": self._card.get("name", ""),
+                "company": self._card.get("company", ""),
+                "location": self._card.get("location", ""),
+                "skills": self._card.get("skills", ""),
+                "description_html": self._card.get("description_html", ""),
+                "link": self._card["link"],
+            })
+        self._card = None
+
+    def finish(self) -> List[Dict[str, Any]]:
+        self.close()
+        self._flush()
+        return self.rows
+
+
+class _HTMLCardsAdapter(SourceAdapter):
+    streaming = True
+    card_class = ""
+    fields: Dict[str, str] = {}
+    id_attr = ""
+
+    async def parse_chunks(self, chunks: AsyncIterator[bytes]) -> List[Dict[str, Any]]:
+        # tana to'liq yig'ilmaydi: har bo'lak kelishi bilan parserga beriladi
+        parser = _CardParser(self.card_class, self.fields, self.id_attr, self.base_url)
+        decoder = _Utf8Decoder()
+        async for chunk in chunks:
+            parser.feed(decoder.decode(chunk))
+        parser.feed(decoder.decode(b"", final=True))
+        return parser.finish()
+
+    def parse(self, body: bytes) -> Iterable[Dict[str, Any]]:
+        parser = _CardParser(self.card_class, self.fields, self.id_attr, self.base_url)
+        parser.feed(body.decode("utf-8", errors="replace"))
+        return parser.finish()
+
+
+class LinkedInAdapter(_HTMLCardsAdapter):
+    # mehmon (login talab qilmaydigan) qidiruv API si, 25 tadan kartochka
+    name = "linkedin"
+    base_url = "https://www.linkedin.com"
+    concurrency = 1
+    rate = 0.5
+    card_class = "base-card"
+    id_attr = "data-entity-urn"
+    fields = {
+        "base-search-card__title": "name",
+        "base-search-card__subtitle": "company",
+        "job-search-card__location": "location",
+    }
+
+    def page_urls(self) -> List[str]:
+        return [
+            f"{self.base_url}/jobs-guest/jobs/api/seeMoreJobPostings/search?location=Uzbekistan&start={25 * n}"
+            for n in range(self.pages)
+        ]
+
+
+class IshUzAdapter(_HTMLCardsAdapter):
+    name = "ishuz"
+    base_url = "https://ish.uz"
+    card_class = "vacancy-card"
+    fields = {
+        "vacancy-card__title": "name",
+        "vacancy-card__company": "company",
+        "vacancy-card__location": "location",
+        "vacancy-card__skills": "skills",
+        "vacancy-card__description": "description_html",
+    }
+
+    def page_urls(self) -> List[str]:
+        return [f"{self.base_url}/vacancies?page={n + 1}" for n in range(self.pages)]
+
+
+class _Utf8Decoder:
+    def __init__(self):
+        import codecs
+        self._dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        return self._dec.decode(data, final)
+
+
+ADAPTERS = {cls.name: cls for cls in (HHAdapter, LinkedInAdapter, OlxAdapter, IshUzAdapter)}
+
+
+# ------------------ Fetching ------------------
+def record_key(url: str) -> str:
+    # yozib olingan sahifa fayli nomi: host hisobga olinmaydi (stand-in server uchun)
+    parts = urlsplit(url)
+    return quote(parts.path + ("?" + parts.query if parts.query else ""), safe="")
+
+
+class Ingestor:
+    def __init__(self, session: aiohttp.ClientSession, cache: ConditionalCache,
+                 record_dir: Optional[str] = None):
+        self.session = session
+        self.cache = cache
+        self.record_dir = record_dir
+        self._limiters: Dict[Tuple[str, int, float], HostLimiter] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _limiter(self, url: str, adapter: SourceAdapter) -> HostLimiter:
+        key = (urlsplit(url).netloc, adapter.concurrency, adapter.rate)
+        if key not in self._limiters:
+            self._limiters[key] = HostLimiter(adapter.concurrency, adapter.rate)
+        return self._limiters[key]
+
+    async def fetch_page(self, adapter: SourceAdapter, url: str) -> Optional[List[Dict[str, Any]]]:
+        """Sahifa qatorlari; xatoda oxirgi muvaffaqiyatli natija, u ham bo'lmasa None."""
+        stats = self.stats.setdefault(adapter.name, {"fetched": 0, "not_modified": 0, "errors": 0})
+        async with self._limiter(url, adapter):
+            try:
+                async with self.session.get(url, headers=self.cache.headers(url)) as resp:
+                    if resp.status == 304:
+                        stats["not_modified"] += 1
+                        return self.cache.entries[url]["rows"]
+                    resp.raise_for_status()
+                    chunks = resp.content.iter_chunked(CHUNK_SIZE)
+                    if self.record_dir:
+                        chunks = self._recording(url, chunks)
+                    if adapter.streaming:
+                        rows = await adapter.parse_chunks(chunks)
+                    else:
+                        rows = list(adapter.parse(b"".join([c async for c in chunks])))
+                    stats["fetched"] += 1
+                    self.cache.entries[url] = {
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                        "rows": rows,
+                    }
+                    return rows
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                stats["errors"] += 1
+                print(f"[{adapter.name}] {url}: {e!r}")
+                # tarmoq xatosida oxirgi muvaffaqiyatli natija saqlanadi
+                entry = self.cache.entries.get(url)
+                return entry["rows"] if entry else None
+
+    async def _recording(self, url: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        os.makedirs(self.record_dir, exist_ok=True)
+        with open(os.path.join(self.record_dir, record_key(url)), "wb") as f:
+            async for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    async def ingest(self, adapter: SourceAdapter, csv_path: str) -> Optional[int]:
+        """
+        Yozilgan qatorlar soni. Biror sahifa olinmagan va keshda ham bo'lmasa
+        CSV yozilmaydi (None): to'liq bo'lmagan ro'yxat qayta yuklashda
+        yo'qolgan ishlar sifatida muddati o'tgan deb hisoblanardi.
+        """
+        pages = await asyncio.gather(*(self.fetch_page(adapter, url) for url in adapter.page_urls()))
+        failed = sum(rows is None for rows in pages)
+        if failed:
+            print(f"[{adapter.name}] {failed}/{len(pages)} pages failed, keeping {csv_path}")
+            return None
+        return write_jobs_csv(csv_path, (row for rows in pages for row in rows))
+
+
+def write_jobs_csv(path: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """Qatorlarni CSV ga yozadi (tmp + os.replace, job_id bo'yicha takrorlar tashlanadi)."""
+    seen = set()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            if row["job_id"] in seen:
+                continue
+            seen.add(row["job_id"])
+            writer.writerow(row)
+    os.replace(tmp, path)
+    return len(seen)
+
+
+def default_targets() -> Dict[str, str]:
+    from sources import SOURCES
+    return SOURCES.paths()
+
+
+async def run_ingest(adapters: List[SourceAdapter], targets: Dict[str, str],
+                     cache_path: Optional[str] = None, record_dir: Optional[str] = None) -> Dict[str, Optional[int]]:
+    cache = ConditionalCache(cache_path)
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={"User-Agent": USER_AGENT}) as session:
+        ingestor = Ingestor(session, cache, record_dir)
+        counts = await asyncio.gather(*(ingestor.ingest(a, targets[a.name]) for a in adapters))
+    cache.save()
+    for name, stats in ingestor.stats.items():
+        print(f"[{name}] {stats}")
+    return {a.name: n for a, n in zip(adapters, counts)}
+
+
+# ------------------ Stand-in server ------------------
+def make_recorded_app(directory: str):
+    """Yozib olingan sahifalarni beradi; ETag = kontent xeshi, If-None-Match -> 304."""
+    from aiohttp import web
+
+    async def handler(request: "web.Request") -> "web.StreamResponse":
+        path = os.path.join(directory, record_key(str(request.rel_url)))
+        if not os.path.exists(path):
+            raise web.HTTPNotFound()
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_route("GET", "/{tail:.*}", handler)
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="fetchers.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fetch = sub.add_parser("fetch", help="manbalardan CSV larni yangilash")
+    fetch.add_argument("--source", action="append", choices=sorted(ADAPTERS))
+    fetch.add_argument("--pages", type=int, default=5)
+    fetch.add_argument("--base-url", action="append", default=[], help="manba=URL (masalan, stand-in server)")
+    fetch.add_argument("--record", help="javoblarni shu papkaga yozib olish")
+    fetch.add_argument("--cache", help="ETag/Last-Modified kesh fayli (default: data/fetch_cache.json)")
+    serve = sub.add_parser("serve-recorded", help="yozib olingan sahifalarni beruvchi lokal server")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve-recorded":
+        from aiohttp import web
+        web.run_app(make_recorded_app(args.directory), host="127.0.0.1", port=args.port)
+        return
+
+    from config import DATA_DIR
+    base_urls = dict(item.split("=", 1) for item in args.base_url)
+    targets = default_targets()
+    names = args.source or [name for name in targets if name in ADAPTERS]
+    adapters = [ADAPTERS[name](base_urls.get(name), pages=args.pages) for name in names]
+    cache_path = args.cache or os.path.join(DATA_DIR, "fetch_cache.json")
+    counts = asyncio.run(run_ingest(adapters, targets, cache_path, args.record))
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
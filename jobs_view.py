@@ -0,0 +1,133 @@
+# jobs_view.py
+import bisect
+import heapq
+from collections import Counter, OrderedDict
+from collections.abc import Sequence
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Tuple
+
+# Bitta ko'rinish uchun saqlanadigan birlashtirish nuqtalari soni
+MAX_CHECKPOINTS = 512
+# without() natijalari (dislike to'plami bo'yicha) keshining hajmi
+MAX_DERIVED_VIEWS = 256
+
+
+class MergedJobsView(Sequence):
+    """
+    Bir nechta manba ro'yxatlarini (har biri `key` bo'yicha saralangan) bitta
+    virtual ketma-ketlik sifatida ko'rsatadi. Elementlar heap orqali k-way
+    birlashtirish bilan faqat so'ralgan bo'lak uchun hisoblanadi.
+
+    Har bir o'qilgan bo'lak chegarasida manbalardagi kursorlar saqlanadi,
+    shuning uchun keyingi sahifa oldingi sahifa oxiridan davom etadi:
+    ketma-ket varaqlash sahifa hajmiga proporsional.
+    """
+
+    def __init__(self, parts: List[List[Dict[str, Any]]], key: Callable[[Dict[str, Any]], Any],
+                 exclude: Iterable[int] = (), _id_counts: List[Counter] = None):
+        self._parts = parts
+        self._key = key
+        self._exclude = frozenset(exclude)
+        self._id_counts = _id_counts if _id_counts is not None else [
+            Counter(j["job_id"] for j in part) for part in parts
+        ]
+        total = sum(len(p) for p in parts)
+        hidden = sum(c[jid] for c in self._id_counts for jid in self._exclude if jid in c)
+        self._len = total - hidden
+        self._cp_pos: List[int] = [0]
+        self._cp_cursors: List[Tuple[int, ...]] = [(0,) * len(parts)]
+        self._derived: "OrderedDict[frozenset, MergedJobsView]" = OrderedDict()
+
+    def without(self, job_ids: Iterable[int]) -> "MergedJobsView":
+        """Berilgan job_id lar yashirilgan ko'rinish (natija keshlanadi)."""
+        exclude = self._exclude | frozenset(job_ids)
+        if exclude == self._exclude:
+            return self
+        view = self._derived.get(exclude)
+        if view is None:
+            view = MergedJobsView(self._parts, self._key, exclude, _id_counts=self._id_counts)
+            self._derived[exclude] = view
+            if len(self._derived) > MAX_DERIVED_VIEWS:
+                self._derived.popitem(last=False)
+        else:
+            self._derived.move_to_end(exclude)
+        return view
+
+    # ------------------ Sequence ------------------
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        cursors = list(self._cp_cursors[0])
+        heap = self._heap(cursors)
+        while heap:
+            yield self._pop(heap, cursors)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            if stop <= start:
+                return []
+            return self._range(start, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("MergedJobsView index out of range")
+        return self._range(index, index + 1, remember=False)[0]
+
+    # ------------------ Internals ------------------
+    def _heap(self, cursors: List[int]) -> List[Tuple[Any, int]]:
+        heap = []
+        for i, part in enumerate(self._parts):
+            self._skip_excluded(i, cursors)
+            if cursors[i] < len(part):
+                heap.append((self._key(part[cursors[i]]), i))
+        heapq.heapify(heap)
+        return heap
+
+    def _skip_excluded(self, i: int, cursors: List[int]) -> None:
+        part = self._parts[i]
+        while cursors[i] < len(part) and part[cursors[i]]["job_id"] in self._exclude:
+            cursors[i] += 1
+
+    def _pop(self, heap: List[Tuple[Any, int]], cursors: List[int]) -> Dict[str, Any]:
+        _, i = heap[0]
+        part = self._parts[i]
+        job = part[cursors[i]]
+        cursors[i] += 1
+        self._skip_excluded(i, cursors)
+        if cursors[i] < len(part):
+            heapq.heapreplace(heap, (self._key(part[cursors[i]]), i))
+        else:
+            heapq.heappop(heap)
+        return job
+
+    def _range(self, start: int, stop: int, remember: bool = True) -> List[Dict[str, Any]]:
+        # eng yaqin saqlangan nuqtadan boshlab birlashtiramiz
+        idx = bisect.bisect_right(self._cp_pos, start) - 1
+        pos, cursors = self._cp_pos[idx], list(self._cp_cursors[idx])
+        heap = self._heap(cursors)
+        while pos < start:
+            self._pop(heap, cursors)
+            pos += 1
+        if remember:
+            self._remember(start, cursors)
+        out = [self._pop(heap, cursors) for _ in range(stop - start)]
+        if remember:
+            self._remember(stop, cursors)
+        return out
+
+    def _remember(self, pos: int, cursors: List[int]) -> None:
+        idx = bisect.bisect_left(self._cp_pos, pos)
+        if idx < len(self._cp_pos) and self._cp_pos[idx] == pos:
+            return
+        if len(self._cp_pos) >= MAX_CHECKPOINTS:
+            if idx <= 1:
+                return
+            # limit to'lgan: oldingi nuqta o'rniga yangisi (ketma-ket varaqlash uchun)
+            idx -= 1
+            del self._cp_pos[idx]
+            del self._cp_cursors[idx]
+        self._cp_pos.insert(idx, pos)
+        self._cp_cursors.insert(idx, tuple(cursors))
@@ -1,17 +1,22 @@
 # main.py
 import asyncio
 import csv
+import html
 import json
 import os
 import re
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Callable, Dict, Any, Iterator, List, Mapping, Optional, Tuple
 
 from aiogram import Bot, Dispatcher, F
-from aiogram.filters import CommandStart
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.types import (
-    Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton,
-    ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+    Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile, ChatMemberUpdated,
+    ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove, Update
 )
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
@@ -19,33 +24,129 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from aiogram.client.default import DefaultBotProperties
 from dotenv import load_dotenv
 
+import ranking
+from alerts import (
+    AlertQueue, MAX_SUBSCRIPTIONS, SubscriptionIndex, collect_matches, describe_subscription, parse_subscription,
+)
+from broadcast import BroadcastEngine
+from cart_export import EXPORT_FORMATS, export_cart
+from catalog_delta import CatalogDelta, diff_catalog, load_csv_catalog, row_hash
+from cluster import build_user_shard, run_until_signal, serve_worker, shard_path
+from compaction import JobExpiry, ProfileCompactor
+from csv_stream import read_jobs_csv, stream_jobs_csv
+from dedup import DedupIndex, signatures as dedup_signatures
+from executor import UpdateExecutor, poll_updates
+from digest import DigestScheduler
+from jobs_view import MergedJobsView
+from membership import MEMBER_STATUSES, MembershipCache
+from message_state import EditCoalescer, MessageStateCache
+from outbound import BULK, OutboundScheduler, with_priority
+from shared_catalog import SharedCatalog
+from sources import SOURCES
+from snapshot import SnapshotJobs, SnapshotReader, open_snapshot
+from similar import SimilarJobsIndex
+from webhook import run_webhook
+
 # ------------------ Load env ------------------
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 CHANNEL_USERNAME = os.getenv("CHANNEL_USERNAME", "").strip() or None
 CHANNEL_ID_ENV = os.getenv("CHANNEL_ID", "").strip()
 CHANNEL_ID = int(CHANNEL_ID_ENV) if CHANNEL_ID_ENV else None
+# Kanal a'zoligi keshi (soniya): a'zo bo'lganlar / bo'lmaganlar
+MEMBERSHIP_POSITIVE_TTL = float(os.getenv("MEMBERSHIP_POSITIVE_TTL", "600"))
+MEMBERSHIP_NEGATIVE_TTL = float(os.getenv("MEMBERSHIP_NEGATIVE_TTL", "10"))
+# Webhook rejimi: WEBHOOK_URL berilsa polling o'rniga aiohttp server ishga tushadi
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip() or None
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/tg/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip() or None
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+# cluster.py ishchisi sifatida: foydalanuvchilar bo'lagi (yozuvlar faqat o'z bo'lagiga)
+WORKER_SHARD = int(os.getenv("WORKER_SHARD", "0"))
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))
+# /broadcast ga ruxsat berilgan Telegram id lar (vergul bilan)
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if x}
 
 # ------------------ Paths ------------------
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
-USERS_JSON = os.path.join(DATA_DIR, "users.json")
+USERS_JSON = shard_path(os.path.join(DATA_DIR, "users.json"), WORKER_SHARD, WORKER_COUNT)
 # Asosiy jobs.csv
 JOBS_CSV = os.path.join(DATA_DIR, "jobs.csv")
-# Yangi manbalar uchun fayllar
-HH_CSV = os.path.join(DATA_DIR, "hh.csv")
-LINKEDIN_CSV = os.path.join(DATA_DIR, "linkedin.csv")
-OLX_CSV = os.path.join(DATA_DIR, "olx.csv")
-ISHUZ_CSV = os.path.join(DATA_DIR, "ishuz.csv")
+# Manba fayllari (hh, linkedin, ...) — sources.SOURCES (yo'llar config.py da)
 
 PASSWORDS_CSV = os.path.join(DATA_DIR, "passwords.csv")
+# Binar katalog (python snapshot.py build-catalog)
+CATALOG_SNAPSHOT = os.path.join(DATA_DIR, "catalog.bin")
+# Bir nechta worker bo'lsa: yagona yuklovchi e'lon qiladigan umumiy katalog
+# (python shared_catalog.py publish --dir ...). Bo'sh bo'lsa — CATALOG_SNAPSHOT ishlatiladi.
+SHARED_CATALOG_DIR = os.getenv("SHARED_CATALOG_DIR", "").strip() or None
 
 # Cart limit
 CART_LIMIT = 2000
 
+# Shu hajmdan katta CSV fayllar oqim rejimida o'qiladi (tavsiflar mmap'dan, talab bo'yicha)
+STREAMING_CSV_MIN_BYTES = int(os.getenv("STREAMING_CSV_MIN_BYTES", str(8 * 1024 * 1024)))
+
+# Snapshotdan o'qilgan tavsiflar uchun LRU hajmi (blobstore.py bench bilan tanlangan)
+DESCRIPTION_CACHE_SIZE = int(os.getenv("DESCRIPTION_CACHE_SIZE", "256"))
+
+# "O'xshash ishlar" tugmasi uchun qo'shnilar soni
+SIMILAR_TOP_K = 5
+
+# Kataloglardan yo'qolgan e'lonlar shuncha soniyadan keyin savat/yoqmaganlardan tozalanadi
+JOB_EXPIRY_JSON = shard_path(os.path.join(DATA_DIR, "job_expiry.json"), WORKER_SHARD, WORKER_COUNT)
+JOB_EXPIRY_GRACE = float(os.getenv("JOB_EXPIRY_GRACE", str(3 * 24 * 3600)))
+# Yangi e'lonlar uchun kataloglar shuncha soniyada bir tekshiriladi
+ALERT_POLL_INTERVAL = float(os.getenv("ALERT_POLL_INTERVAL", "60"))
+# Kunlik dayjest: yuborish oynasi (mahalliy soat, UTC+DIGEST_TZ_OFFSET) bo'laklarga bo'linadi
+DIGEST_JSON = shard_path(os.path.join(DATA_DIR, "digests.json"), WORKER_SHARD, WORKER_COUNT)
+DIGEST_START_HOUR = float(os.getenv("DIGEST_START_HOUR", "9"))
+DIGEST_WINDOW_MINUTES = float(os.getenv("DIGEST_WINDOW_MINUTES", "120"))
+DIGEST_TZ_OFFSET = float(os.getenv("DIGEST_TZ_OFFSET", "5"))
+DIGEST_BUCKETS = 60
+# Barcha chiquvchi xabarlar (ommaviy, ogohlantirish, dayjest) uchun umumiy limit
+BROADCAST_DIR = os.path.join(DATA_DIR, "broadcasts")
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+# Bir nechta ishchida: limitning shu qismi saqlangan ommaviy yuborishlarni bajaradigan
+# 0-ishchiga, qolgani ogohlantirish/dayjest uchun barcha ishchilarga teng bo'linadi
+BROADCAST_SHARE = float(os.getenv("BROADCAST_SHARE", "0.5")) if WORKER_COUNT > 1 else 0.0
+BROADCAST_CONCURRENCY = 8
+# Update lar: bir vaqtda bajariladiganlar va navbat chegarasi (to'lsa polling kutadi)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "32"))
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", "1000"))
+# Bir vaqtda bajariladigan Bot API so'rovlari (qolganlari ustuvorlik navbatida)
+OUTBOUND_SLOTS = int(os.getenv("OUTBOUND_SLOTS", "16"))
+
+# Fon tozalovchisi: ishga tushish oralig'i, partiya hajmi va partiyalar orasidagi pauza
+COMPACT_INTERVAL = float(os.getenv("COMPACT_INTERVAL", "3600"))
+COMPACT_BATCH_SIZE = 200
+COMPACT_PAUSE = 0.5
+
 # ------------------ Bot init (aiogram 3.7+) ------------------
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
 dp = Dispatcher()
+# Barcha Bot API so'rovlari ustuvorlik bo'yicha: callback javobi > tahrir > yuborish > ommaviy
+OUTBOUND = OutboundScheduler(slots=OUTBOUND_SLOTS)
+bot.session.middleware(OUTBOUND)
+# Xabarni har doim to'liq qayta chizadigan callbacklar: navbatda shunday yangiroq
+# callback bo'lsa, oldingisining tahriri yuborilmaydi (EDIT_COALESCER)
+RENDER_CALLBACKS = ("src:", "page:", "dislike:", "cart:", "crm:", "dg:")
+
+
+def render_target(update: Update) -> Optional[Tuple[int, int]]:
+    clb = update.callback_query
+    if clb is None or clb.message is None or not (clb.data or "").startswith(RENDER_CALLBACKS):
+        return None
+    return clb.message.chat.id, clb.message.message_id
+
+
+# Kiruvchi update lar: per-user FIFO, umumiy parallellik chegarasi
+UPDATES = UpdateExecutor(concurrency=UPDATE_CONCURRENCY, max_pending=UPDATE_MAX_PENDING, target=render_target)
+# ishchilar umumiy limitni bo'lishadi; 0-ishchi ommaviy yuborish ulushini ham oladi
+OUTBOX_RATE = BROADCAST_RATE * (1 - BROADCAST_SHARE) / WORKER_COUNT + (BROADCAST_RATE * BROADCAST_SHARE if WORKER_SHARD == 0 else 0)
+OUTBOX = BroadcastEngine(bot, BROADCAST_DIR, rate=OUTBOX_RATE, concurrency=BROADCAST_CONCURRENCY)
 
 
 # ------------------ Languages ------------------
@@ -61,6 +162,7 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "ask_join": "Assalomu alaykum!\n\nBotdan toʻliq foydalanish uchun iltimos, avval @maabuz kanaliga aʼzo boʻling.",
         "btn_goto_channel": "🔗 @maabuz kanaliga o‘tish",
         "btn_joined": "✅ Aʼzo bo‘ldim",
+        "join_check_failed": "Aʼzolikni hozir tekshirib bo‘lmadi. Birozdan keyin qayta urinib ko‘ring.",
         "not_joined": "Siz hali aʼzo boʻlmadingiz. Iltimos avval kanalga aʼzo boʻling, keyin \"Aʼzo bo‘ldim\"ni bosing.",
 
         "ask_password": "A’zo ekanligingiz tasdiqlandi ✅\n\nEndi botdan toʻliq foydalanish uchun <b>MAAB INNOVATION</b> tomonidan berilgan maxsus parolni kiriting.",
@@ -78,9 +180,18 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "menu_change_lang": "🌐 Tilni o‘zgartirish",
 
         "cart_empty": "🛒 Sizning savatingiz hozircha bo‘sh.",
+        "cart_header": "🛒 <b>Savat</b>: {total} ta ish\n<i>Sahifa: {page}/{pages} | Ko‘rsatilmoqda: {start}–{end}</i>",
+        "cart_footer": "<i>Savatdan olib tashlash uchun raqamni bosing ⬇️</i>",
+        "cart_item_gone": "<i>E'lon endi mavjud emas</i>",
+        "cart_removed": "✅ Savatdan olib tashlandi.",
+        "btn_export_csv": "📄 CSV yuklab olish",
+        "btn_export_html": "🌐 HTML yuklab olish",
+        "cart_export_caption": "🛒 Savat: {count} ta ish",
+        "cart_export_title": "Savat",
         "cart_item_line": "<b>{name}</b>\n🏢 {company}\n📍 {location}\n🔗 <a href=\"{link}\">Topshirish (Link)</a>",
         "btn_remove_from_cart": "❌ Savatdan olib tashlash",
         "btn_back_menu": "↩️ Menyuga qaytish",
+        "src_all": "🌐 Hammasi",
 
         "jobs_none": "Hozircha ishlar mavjud emas.",
         "jobs_header": "Quyidagi ish ro‘yxatidan tanlang:\n<i>Topildi: {total} ta | Sahifa: {page}/{pages} | Ko‘rsatilmoqda: {start}–{end}</i>",
@@ -92,6 +203,9 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "btn_add_cart": "🛒 Savatga qo‘shish",
         "btn_dislike": "❌ Yo‘qmadi",
         "btn_back_list": "⬅️ Ro‘yxatga qaytish",
+        "btn_similar": "🔎 O‘xshash ishlar",
+        "similar_header": "🔎 <b>{name}</b> ga o‘xshash ishlar:",
+        "similar_none": "O‘xshash ishlar topilmadi.",
         "added_ok": "Ish savatga qo‘shildi.",
         "added_dup": "Bu ish allaqachon savatda.",
         "added_limit": "Savat limiti {limit} ta.",
@@ -101,7 +215,23 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "disliked_dup": "Bu ish allaqachon sizga yoqmagan deb belgilangan.",
         "no_visible_jobs": "👏 Siz barcha mavjud ishlarni koʻrib chiqqansiz yoki rad etgansiz.",
 
-        "not_registered": "Avval ro‘yxatdan o‘ting: /start"
+        "not_registered": "Avval ro‘yxatdan o‘ting: /start",
+
+        "sub_usage": "Obuna: <code>/subscribe python django skill:sql loc:tashkent src:hh</code>\nKalit so‘zlar, <code>skill:</code>, <code>loc:</code> va <code>src:</code> ({sources}) ixtiyoriy, lekin kamida bittasi kerak.\nObunalarim: /alerts",
+        "sub_added": "🔔 Obuna saqlandi: <code>{query}</code>\nMos yangi ishlar chiqsa xabar beramiz.",
+        "sub_limit": "Obunalar limiti {limit} ta. Keraksizini /alerts orqali o‘chiring.",
+        "sub_none": "Sizda obunalar yo‘q. Qo‘shish: /subscribe",
+        "sub_list_header": "🔔 Obunalaringiz (o‘chirish uchun bosing):",
+        "sub_removed": "Obuna o‘chirildi.",
+        "alert_header": "🔔 Obunangizga mos yangi ishlar:",
+        "digest_on": "📬 Kunlik dayjest yoqildi: mos yangi ishlar har kuni bitta xabarda keladi. O‘chirish: <code>/digest off</code>",
+        "digest_off": "🔔 Dayjest o‘chirildi: yangi ishlar darhol yuboriladi.",
+        "digest_header": "📬 <b>Kunlik dayjest</b>: {total} ta yangi ish\n<i>Sahifa: {page}/{pages}</i>",
+        "digest_empty": "Dayjest bo‘sh.",
+        "bc_usage": "Ommaviy xabar: <code>/broadcast matn</code>\nHolat: <code>/broadcast_status [id]</code>",
+        "bc_queued": "📣 Navbatga qo‘yildi: <code>{job_id}</code>, {total} ta qabul qiluvchi.",
+        "bc_status": "📣 <code>{job_id}</code>: {done}/{total} (✅ {ok}, 🚫 {blocked}, ⚠️ {failed}){finished}",
+        "bc_none": "Ommaviy xabarlar yo‘q."
     },
     "en": {
         "choose_language_title": "Choose a language — Tilni tanlang — Выберите язык",
@@ -113,6 +243,7 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "ask_join": "Welcome!\n\nTo use the bot fully, please join the @maabuz channel first.",
         "btn_goto_channel": "🔗 Go to @maabuz channel",
         "btn_joined": "✅ I joined",
+        "join_check_failed": "Couldn’t check your membership right now. Please try again in a moment.",
         "not_joined": "You haven’t joined yet. Please join the channel first, then press \"I joined\".",
 
         "ask_password": "Membership confirmed ✅\n\nNow enter the special access password provided by <b>MAAB INNOVATION</b>.",
@@ -130,9 +261,18 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "menu_change_lang": "🌐 Change language",
 
         "cart_empty": "🛒 Your cart is empty.",
+        "cart_header": "🛒 <b>Cart</b>: {total} jobs\n<i>Page: {page}/{pages} | Showing: {start}–{end}</i>",
+        "cart_footer": "<i>Tap a number below to remove it from the cart ⬇️</i>",
+        "cart_item_gone": "<i>This posting is no longer available</i>",
+        "cart_removed": "✅ Removed from cart.",
+        "btn_export_csv": "📄 Download CSV",
+        "btn_export_html": "🌐 Download HTML",
+        "cart_export_caption": "🛒 Cart: {count} jobs",
+        "cart_export_title": "Cart",
         "cart_item_line": "<b>{name}</b>\n🏢 {company}\n📍 {location}\n🔗 <a href=\"{link}\">Apply (Link)</a>",
         "btn_remove_from_cart": "❌ Remove from cart",
         "btn_back_menu": "↩️ Back to menu",
+        "src_all": "🌐 All sources",
 
         "jobs_none": "No jobs available yet.",
         "jobs_header": "Choose from the list below:\n<i>Found: {total} | Page: {page}/{pages} | Showing: {start}–{end}</i>",
@@ -144,6 +284,9 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "btn_add_cart": "🛒 Add to cart",
         "btn_dislike": "❌ Not interested",
         "btn_back_list": "⬅️ Back to list",
+        "btn_similar": "🔎 Similar jobs",
+        "similar_header": "🔎 Jobs similar to <b>{name}</b>:",
+        "similar_none": "No similar jobs found.",
         "added_ok": "Job added to cart.",
         "added_dup": "This job is already in the cart.",
         "added_limit": "Cart limit is {limit}.",
@@ -153,7 +296,23 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "disliked_dup": "This job is already marked as not interested.",
         "no_visible_jobs": "👏 You have viewed or dismissed all available jobs.",
 
-        "not_registered": "Please register first: /start"
+        "not_registered": "Please register first: /start",
+
+        "sub_usage": "Subscribe: <code>/subscribe python django skill:sql loc:tashkent src:hh</code>\nKeywords, <code>skill:</code>, <code>loc:</code> and <code>src:</code> ({sources}) are optional, but at least one is required.\nMy alerts: /alerts",
+        "sub_added": "🔔 Subscription saved: <code>{query}</code>\nWe will notify you about matching new jobs.",
+        "sub_limit": "Subscription limit is {limit}. Remove one via /alerts.",
+        "sub_none": "You have no subscriptions. Add one: /subscribe",
+        "sub_list_header": "🔔 Your subscriptions (tap to remove):",
+        "sub_removed": "Subscription removed.",
+        "alert_header": "🔔 New jobs matching your subscription:",
+        "digest_on": "📬 Daily digest enabled: matching new jobs arrive once a day in one message. Turn off: <code>/digest off</code>",
+        "digest_off": "🔔 Digest disabled: new jobs are sent immediately.",
+        "digest_header": "📬 <b>Daily digest</b>: {total} new jobs\n<i>Page: {page}/{pages}</i>",
+        "digest_empty": "The digest is empty.",
+        "bc_usage": "Broadcast: <code>/broadcast text</code>\nStatus: <code>/broadcast_status [id]</code>",
+        "bc_queued": "📣 Queued: <code>{job_id}</code>, {total} recipients.",
+        "bc_status": "📣 <code>{job_id}</code>: {done}/{total} (✅ {ok}, 🚫 {blocked}, ⚠️ {failed}){finished}",
+        "bc_none": "No broadcasts yet."
     },
     "ru": {
         "choose_language_title": "Выберите язык — Choose a language — Tilni tanlang",
@@ -165,6 +324,7 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "ask_join": "Добро пожаловать!\n\nДля полного доступа к боту сначала вступите в канал @maabuz.",
         "btn_goto_channel": "🔗 Перейти в канал @maabuz",
         "btn_joined": "✅ Я вступил(а)",
+        "join_check_failed": "Не удалось проверить подписку. Попробуйте ещё раз чуть позже.",
         "not_joined": "Вы ещё не вступили. Пожалуйста, сначала вступите в канал и нажмите «Я вступил(а)».",
 
         "ask_password": "Подтверждено ✅\n\nТеперь введите специальный пароль доступа, выданный <b>MAAB INNOVATION</b>.",
@@ -182,9 +342,18 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "menu_change_lang": "🌐 Сменить язык",
 
         "cart_empty": "🛒 Ваша корзина пуста.",
+        "cart_header": "🛒 <b>Корзина</b>: {total} вакансий\n<i>Стр.: {page}/{pages} | Показано: {start}–{end}</i>",
+        "cart_footer": "<i>Нажмите цифру ниже, чтобы удалить из корзины ⬇️</i>",
+        "cart_item_gone": "<i>Вакансия больше недоступна</i>",
+        "cart_removed": "✅ Удалено из корзины.",
+        "btn_export_csv": "📄 Скачать CSV",
+        "btn_export_html": "🌐 Скачать HTML",
+        "cart_export_caption": "🛒 Корзина: {count} вакансий",
+        "cart_export_title": "Корзина",
         "cart_item_line": "<b>{name}</b>\n🏢 {company}\n📍 {location}\n🔗 <a href=\"{link}\">Откликнуться (ссылка)</a>",
         "btn_remove_from_cart": "❌ Удалить из корзины",
         "btn_back_menu": "↩️ В меню",
+        "src_all": "🌐 Все источники",
 
         "jobs_none": "Пока нет доступных вакансий.",
         "jobs_header": "Выберите из списка ниже:\n<i>Найдено: {total} | Стр.: {page}/{pages} | Показано: {start}–{end}</i>",
@@ -196,6 +365,9 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "btn_add_cart": "🛒 В корзину",
         "btn_dislike": "❌ Неинтересно",
         "btn_back_list": "⬅️ Назад к списку",
+        "btn_similar": "🔎 Похожие вакансии",
+        "similar_header": "🔎 Вакансии, похожие на <b>{name}</b>:",
+        "similar_none": "Похожих вакансий не найдено.",
         "added_ok": "Вакансия добавлена в корзину.",
         "added_dup": "Эта вакансия уже в корзине.",
         "added_limit": "Лимит корзины {limit}.",
@@ -205,7 +377,23 @@ LANG_TEXTS: Dict[str, Dict[str, str]] = {
         "disliked_dup": "Эта вакансия уже отмечена как неинтересная.",
         "no_visible_jobs": "👏 Вы просмотрели или отклонили все доступные вакансии.",
 
-        "not_registered": "Сначала пройдите регистрацию: /start"
+        "not_registered": "Сначала пройдите регистрацию: /start",
+
+        "sub_usage": "Подписка: <code>/subscribe python django skill:sql loc:tashkent src:hh</code>\nКлючевые слова, <code>skill:</code>, <code>loc:</code> и <code>src:</code> ({sources}) необязательны, но нужно хотя бы одно.\nМои подписки: /alerts",
+        "sub_added": "🔔 Подписка сохранена: <code>{query}</code>\nМы сообщим о подходящих новых вакансиях.",
+        "sub_limit": "Лимит подписок — {limit}. Удалите лишнюю через /alerts.",
+        "sub_none": "У вас нет подписок. Добавить: /subscribe",
+        "sub_list_header": "🔔 Ваши подписки (нажмите, чтобы удалить):",
+        "sub_removed": "Подписка удалена.",
+        "alert_header": "🔔 Новые вакансии по вашей подписке:",
+        "digest_on": "📬 Ежедневный дайджест включён: подходящие вакансии приходят раз в день одним сообщением. Выключить: <code>/digest off</code>",
+        "digest_off": "🔔 Дайджест выключен: новые вакансии отправляются сразу.",
+        "digest_header": "📬 <b>Ежедневный дайджест</b>: {total} новых вакансий\n<i>Страница: {page}/{pages}</i>",
+        "digest_empty": "Дайджест пуст.",
+        "bc_usage": "Рассылка: <code>/broadcast текст</code>\nСтатус: <code>/broadcast_status [id]</code>",
+        "bc_queued": "📣 В очереди: <code>{job_id}</code>, получателей: {total}.",
+        "bc_status": "📣 <code>{job_id}</code>: {done}/{total} (✅ {ok}, 🚫 {blocked}, ⚠️ {failed}){finished}",
+        "bc_none": "Рассылок пока нет."
     }
 }
 
@@ -225,6 +413,8 @@ def t(lang: str, key: str, **kwargs) -> str:
 # ------------------ Ensure files ------------------
 def _ensure_files():
     os.makedirs(DATA_DIR, exist_ok=True)
+    # ishchi bo'lagi birinchi marta users.json (yoki oldingi bo'laklar) dan yig'iladi
+    build_user_shard(os.path.join(DATA_DIR, "users.json"), WORKER_SHARD, WORKER_COUNT)
     if not os.path.exists(USERS_JSON):
         with open(USERS_JSON, "w", encoding="utf-8") as f:
             f.write("{}")
@@ -239,7 +429,7 @@ def _ensure_files():
             writer.writerow(["job_id","name","company","location","skills","description_html","link"])
             writer.writerow([1,"Data Scientist","BI-Group","Uzbekistan, Tashkent","Python;SQL;Power BI;Excel","<p><strong>Looking to take your first serious step?</strong></p>","https://uz.linkedin.com/jobs/view/123"])
     # Yangi manba fayllarni ham avtomatik yaratamiz
-    for p in [HH_CSV, LINKEDIN_CSV, OLX_CSV, ISHUZ_CSV]:
+    for p in [source.path for source in SOURCES]:
         if not os.path.exists(p):
             with open(p, "w", encoding="utf-8", newline="") as f:
                 writer = csv.writer(f)
@@ -260,6 +450,18 @@ def save_users(data: Dict[str, Any]) -> None:
 
 
 
+def load_all_users() -> Dict[str, Any]:
+    # barcha ishchilar bo'laklari (faqat o'qish uchun)
+    users: Dict[str, Any] = {}
+    for shard in range(WORKER_COUNT):
+        try:
+            with open(shard_path(os.path.join(DATA_DIR, "users.json"), shard, WORKER_COUNT), "r", encoding="utf-8") as f:
+                users.update(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return users
+
+
 def get_or_create_profile(tg_id: int) -> Dict[str, Any]:
     users = load_users()
     key = str(tg_id)
@@ -333,44 +535,258 @@ def load_passwords() -> set:
 #                 })
 #     jobs.sort(key=lambda x: x["job_id"])
 #     return jobs
-def load_jobs(source: Optional[str] = None) -> List[Dict[str, Any]]:
-    files = {
-        "hh": HH_CSV,
-        "linkedin": LINKEDIN_CSV,
-        "olx": OLX_CSV,
-        "ishuz": ISHUZ_CSV,
-    }
+# Katalog kesh: fayl yo'li -> ((mtime, snapshot versiyasi), ishlar). O'zgarmaguncha qayta o'qilmaydi.
+_JOBS_CACHE: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+# "Hammasi" ko'rinishi: manbalar mtime'lari -> manbalar ustidagi virtual birlashma
+_ALL_JOBS_CACHE: Dict[str, Any] = {"key": None, "jobs": None}
+
+# Ochilgan snapshot (fayl mtime o'zgarsa qayta ochiladi)
+_SNAPSHOT: Dict[str, Any] = {"mtime": None, "reader": None}
+_SHARED_CATALOG = SharedCatalog(SHARED_CATALOG_DIR, cache_size=DESCRIPTION_CACHE_SIZE) if SHARED_CATALOG_DIR else None
+
+# O'xshash ishlar indeksi (asosiy jobs.csv katalogi uchun)
+SIMILAR_JOBS = SimilarJobsIndex(k=SIMILAR_TOP_K)
+
+# Fayl yo'li -> (katalog kaliti, {job_id: ish}); find_job_by_id uchun, versiya o'zgarsa qayta quriladi
+_ID_INDEX: Dict[str, Tuple[Any, Dict[int, Dict[str, Any]]]] = {}
+
+# Fayl yo'li -> {job_id: kontent xeshi}; qayta yuklashda delta shundan hisoblanadi.
+# Snapshot manbalari uchun lug'at emas, snapshot.RowHashes (mmap ustida)
+_CATALOG_HASHES: Dict[str, Mapping[int, int]] = {}
+
+# Yo'qolgan e'lonlar vaqti (savat/yoqmaganlarni tozalash uchun)
+JOB_EXPIRY = JobExpiry(JOB_EXPIRY_JSON, grace=JOB_EXPIRY_GRACE)
+
+# Obunalar teskari indeksi va ogohlantirishlar navbati (main() da profillardan to'ldiriladi)
+SUBSCRIPTIONS = SubscriptionIndex()
+ALERTS = AlertQueue()
+DIGESTS = DigestScheduler(
+    DIGEST_JSON, start_hour=DIGEST_START_HOUR, window=DIGEST_WINDOW_MINUTES * 60,
+    buckets=DIGEST_BUCKETS, tz_offset=DIGEST_TZ_OFFSET,
+)
+
+# "Hammasi" uchun dublikat klasterlari: har manba yuklanganda delta bo'yicha yangilanadi
+CATALOG_DEDUP = DedupIndex(SOURCES.names())
+
+# Manbalarni parallel yuklash. Oddiy CSV (HTML normalizatsiyasi — CPU) ishchi
+# jarayonlarda o'qiladi; mmap ga bog'langan manbalar (snapshot, oqim rejimi)
+# jarayonlar orasida uzatilmaydi, ular oqimlar pulida. Indekslar esa faqat
+# chaqiruvchi oqimda, delta bo'yicha yangilanadi.
+CATALOG_LOAD_WORKERS = int(os.getenv("CATALOG_LOAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+_LOAD_POOL = ThreadPoolExecutor(max_workers=CATALOG_LOAD_WORKERS, thread_name_prefix="catalog")
+_LOAD_PROCESSES: Dict[str, Optional[ProcessPoolExecutor]] = {"pool": None}
+# Katalog nomi -> oxirgi yuklash: qatorlar soni, soniyalar, delta
+CATALOG_LOAD_STATS: Dict[str, Dict[str, Any]] = {}
+
+
+def _streams_csv(path: str) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) >= STREAMING_CSV_MIN_BYTES
+
+
+def _read_jobs_csv(path: str) -> List[Dict[str, Any]]:
+    if _streams_csv(path):
+        return stream_jobs_csv(path, cache_size=DESCRIPTION_CACHE_SIZE)
+    return read_jobs_csv(path)
+
+
+def _catalog_snapshot() -> Optional[SnapshotReader]:
+    if _SHARED_CATALOG is not None:
+        return _SHARED_CATALOG.current()
+    try:
+        mtime = os.stat(CATALOG_SNAPSHOT).st_mtime_ns
+    except OSError:
+        return None
+    if _SNAPSHOT["mtime"] != mtime:
+        _SNAPSHOT["mtime"] = mtime
+        _SNAPSHOT["reader"] = open_snapshot(CATALOG_SNAPSHOT, cache_size=DESCRIPTION_CACHE_SIZE)
+    return _SNAPSHOT["reader"]
+
+
+def _job_is_live(job_id: int) -> bool:
+    # yuklangan kataloglarning birortasida bo'lsa — tirik
+    return any(job_id in hashes for hashes in _CATALOG_HASHES.values())
 
-    def read_csv(path):
-        jobs = []
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    try:
-                        row["job_id"] = int(row.get("job_id", "").strip())
-                    except:
-                        continue
-                    jobs.append({
-                        "job_id": row["job_id"],
-                        "name": row.get("name", ""),
-                        "company": row.get("company", ""),
-                        "location": row.get("location", ""),
-                        "skills": row.get("skills", ""),
-                        "description_html": row.get("description_html", ""),
-                        "link": row.get("link", "")
-                    })
-        return jobs
-
-    if source and source in files:
+
+async def _refresh_catalogs() -> bool:
+    # yuklash pullarda; event loop faqat deltani o'rnatadi
+    await read_catalogs_async({"jobs": JOBS_CSV, **SOURCES.paths()})
+    # hamma katalog bo'sh bo'lsa (yuklash buzilgan) tozalamaymiz
+    return any(_CATALOG_HASHES.values())
+
+
+def _on_catalog_loaded(path: str, jobs: List[Dict[str, Any]], delta: CatalogDelta, initial: bool = False,
+                       sigs: Optional[Dict[int, Tuple[int, ...]]] = None) -> None:
+    # Katalog yangilanganda oldindan hisoblanadigan indekslar — faqat delta bo'yicha
+    if not delta:
+        return
+    JOB_EXPIRY.observe((j["job_id"] for j in delta.inserted), delta.deleted, _job_is_live)
+    if not initial and delta.inserted and len(SUBSCRIPTIONS):
+        # birinchi yuklashdagi "insert" lar yangi e'lon emas
+        source = next((src.name for src in SOURCES if src.path == path), None)
+        digest_changed = False
+        for tg_id, matched in collect_matches(SUBSCRIPTIONS, delta.inserted, source).items():
+            if tg_id in DIGESTS.enabled:
+                DIGESTS.add(tg_id, source or "jobs", [j["job_id"] for j in matched])
+                digest_changed = True
+            else:
+                ALERTS.push(tg_id, matched)
+        if digest_changed:
+            DIGESTS.save()
+    if path == JOBS_CSV:
+        SIMILAR_JOBS.sync(jobs, delta)
+    # birinchi yuklash ham — "all" ko'rinishi klasterlarni tayyor holda oladi
+    for source in SOURCES:
+        if source.path == path:
+            CATALOG_DEDUP.apply(source.name, delta, sigs)
+
+
+def _catalog_key(path: str, snapshot: Optional[SnapshotReader]) -> Tuple[float, Optional[int]]:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = -1.0
+    # kalitda snapshot versiyasi ham bor: yangi versiya e'lon qilinsa CSV nusxa tashlanadi
+    return mtime, snapshot.mtime_ns if snapshot else None
+
+
+def _load_catalog(path: str, snapshot: Optional[SnapshotReader]):
+    # oqimda bajariladi: umumiy holatni o'zgartirmaydi
+    started = time.perf_counter()
+    # snapshot CSV bilan bir xil bo'lsa — undan (mmap, xeshlar build paytida yozilgan)
+    jobs = snapshot.jobs_for_path(path) if snapshot else None
+    if jobs is not None:
+        return jobs, jobs.row_hashes(), time.perf_counter() - started
+    # aks holda CSV ni o'qiymiz; xeshlar ham shu oqimda hisoblanadi
+    jobs = _read_jobs_csv(path)
+    return jobs, [row_hash(job) for job in jobs], time.perf_counter() - started
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    if _LOAD_PROCESSES["pool"] is None:
+        # spawn: bot jarayonining oqimlari va ochiq fayllari nusxalanmaydi
+        _LOAD_PROCESSES["pool"] = ProcessPoolExecutor(
+            max_workers=CATALOG_LOAD_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _LOAD_PROCESSES["pool"]
+
+
+def _unchanged(path: str, key) -> bool:
+    # CSV o'zi o'zgarmagan, faqat snapshot versiyasi yangilangan — kontent ham o'sha
+    cached = _JOBS_CACHE.get(path)
+    return path in _CATALOG_HASHES and cached is not None and cached[0][0] == key[0]
+
+
+def _diff_loaded(previous: Dict[int, int], jobs, row_hashes) -> Tuple[CatalogDelta, Dict[int, int]]:
+    job_ids = jobs.job_ids() if isinstance(jobs, SnapshotJobs) else None
+    return diff_catalog(previous, jobs, row_hashes, job_ids)
+
+
+def _prepare_delta(path: str, previous: Dict[int, int], jobs, row_hashes):
+    # oqimda: delta va manba uchun MinHash imzolari (loop faqat indeksga qo'shadi)
+    delta, hashes = _diff_loaded(previous, jobs, row_hashes)
+    sigs = dedup_signatures(delta.changed) if path in SOURCES.paths().values() else None
+    return delta, hashes, sigs
+
+
+def _install_catalog(name: str, path: str, key, loaded) -> None:
+    jobs, row_hashes, took = loaded
+    if _unchanged(path, key):
+        _apply_catalog(name, path, key, jobs, took, CatalogDelta(), _CATALOG_HASHES[path])
+    else:
+        _apply_catalog(name, path, key, jobs, took, *_diff_loaded(_CATALOG_HASHES.get(path, {}), jobs, row_hashes))
+
+
+def _apply_catalog(name: str, path: str, key, jobs: List[Dict[str, Any]], took: float,
+                   delta: CatalogDelta, hashes: Dict[int, int], sigs=None) -> None:
+    initial = path not in _CATALOG_HASHES
+    if isinstance(jobs, SnapshotJobs):
+        # xeshlar snapshotda — workerlar o'z nusxasini saqlamaydi
+        hashes = jobs.hashes()
+    _JOBS_CACHE[path] = (key, jobs)
+    _CATALOG_HASHES[path] = hashes
+    _on_catalog_loaded(path, jobs, delta, initial, sigs)
+    CATALOG_LOAD_STATS[name] = {"rows": len(jobs), "seconds": round(took, 4), "delta": repr(delta)}
+
+
+def _stale_catalogs(paths: Dict[str, str], snapshot: Optional[SnapshotReader]) -> Dict[str, Tuple[str, Any]]:
+    stale = {}
+    for name, path in paths.items():
+        key = _catalog_key(path, snapshot)
+        cached = _JOBS_CACHE.get(path)
+        if not (cached and cached[0] == key):
+            stale[name] = (path, key)
+    return stale
+
+
+def _submit_load(path: str, snapshot: Optional[SnapshotReader]):
+    in_snapshot = snapshot is not None and snapshot.source_for_path(path) is not None
+    if in_snapshot or _streams_csv(path):
+        return _LOAD_POOL.submit(_load_catalog, path, snapshot)
+    return _process_pool().submit(load_csv_catalog, path)
+
+
+def read_catalogs(paths: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+    """nom -> fayl; eskirganlari parallel yuklanadi, natijalar shu tartibda o'rnatiladi."""
+    snapshot = _catalog_snapshot()
+    stale = _stale_catalogs(paths, snapshot)
+    if len(stale) > 1 and CATALOG_LOAD_WORKERS > 1:
+        futures = {name: _submit_load(path, snapshot) for name, (path, _) in stale.items()}
+        for name, (path, key) in stale.items():
+            _install_catalog(name, path, key, futures[name].result())
+    else:
+        for name, (path, key) in stale.items():
+            _install_catalog(name, path, key, _load_catalog(path, snapshot))
+    return {name: _JOBS_CACHE[path][1] for name, path in paths.items()}
+
+
+async def read_catalogs_async(paths: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    read_catalogs ning fon vazifalari uchun varianti: o'qish va delta hisoblash
+    pullarda, event loop faqat tayyor deltani o'rnatadi (indekslar, navbatlar).
+    """
+    loop = asyncio.get_running_loop()
+    snapshot = _catalog_snapshot()
+    stale = _stale_catalogs(paths, snapshot)
+    futures = {name: asyncio.wrap_future(_submit_load(path, snapshot)) for name, (path, _) in stale.items()}
+    for name, (path, key) in stale.items():
+        jobs, row_hashes, took = await futures[name]
+        previous = _CATALOG_HASHES.get(path)
+        if _unchanged(path, key):
+            delta, hashes, sigs = CatalogDelta(), previous, None
+        else:
+            delta, hashes, sigs = await loop.run_in_executor(
+                _LOAD_POOL, _prepare_delta, path, previous or {}, jobs, row_hashes)
+        cached = _JOBS_CACHE.get(path)
+        if (cached and cached[0] == key) or _CATALOG_HASHES.get(path) is not previous:
+            # kutish paytida handler (read_catalogs) shu faylni o'rnatib bo'lgan
+            continue
+        _apply_catalog(name, path, key, jobs, took, delta, hashes, sigs)
+    return {name: _JOBS_CACHE[path][1] for name, path in paths.items() if path in _JOBS_CACHE}
+
+
+def read_csv(path: str) -> List[Dict[str, Any]]:
+    name = os.path.splitext(os.path.basename(path))[0]
+    return read_catalogs({name: path})[name]
+
+
+def load_jobs(source: Optional[str] = None) -> List[Dict[str, Any]]:
+    selected = SOURCES.get(source)
+    if selected:
         # faqat tanlangan manbadan o‘qiydi
-        return read_csv(files[source])
+        return read_csv(selected.path)
     elif source == "all":
-        # barcha manbalarni birlashtiradi
-        all_jobs = []
-        for fpath in files.values():
-            all_jobs.extend(read_csv(fpath))
-        return all_jobs
+        # barcha manbalarni birlashtiradi, bir xil vakansiyalar bitta bo'lib qoladi
+        paths = SOURCES.paths()
+        # klasterlar yuklashda (_on_catalog_loaded) delta bo'yicha yangilangan
+        read_catalogs(paths)
+        key = tuple((name, _JOBS_CACHE[fpath][0]) for name, fpath in paths.items())
+        if _ALL_JOBS_CACHE["key"] != key:
+            # bu yerda faqat ko'rinish quriladi
+            merge_key = lambda j: j["job_id"]
+            _ALL_JOBS_CACHE["key"] = key
+            _ALL_JOBS_CACHE["jobs"] = MergedJobsView(CATALOG_DEDUP.parts(list(paths)), key=merge_key)
+        return _ALL_JOBS_CACHE["jobs"]
     else:
         # eski jobs.csv dan o‘qiydi
         return read_csv(JOBS_CSV)
@@ -416,24 +832,27 @@ def contact_request_kb(lang: str) -> ReplyKeyboardMarkup:
 
 
 def pagination_kb(total_jobs: int, page: int, per_page: int = 10,
-                  jobs_list: Optional[List[Dict[str, Any]]] = None, lang: str = "uz") -> InlineKeyboardMarkup:
+                  jobs_list: Optional[List[Dict[str, Any]]] = None, lang: str = "uz",
+                  source: Optional[str] = None, pick: str = "pickid", nav: str = "page") -> InlineKeyboardMarkup:
     """
     Pastda faqat raqamli tugmalar (1..count) bo'ladi.
     Har bir raqam callbackida shu sahifadagi mos job_id yuboriladi: pickid:{job_id}:{page}
+    Navigatsiya callbacki manbani ham olib yuradi: page:{page}:{source}
+    pick / nav — callback prefikslari (savat: crm / cart).
     """
     jobs = jobs_list or load_jobs()
     builder = InlineKeyboardBuilder()
 
     start = page * per_page
     end = min(start + per_page, len(jobs))
-    count = end - start
+    page_jobs = jobs[start:end]
+    nav_suffix = f":{source}" if source else ""
 
     # 1..count raqamli tugmalar, lekin callback – job_id bilan
     row: List[InlineKeyboardButton] = []
-    for i in range(count):
-        job = jobs[start + i]
+    for i, job in enumerate(page_jobs):
         number_label = str(i + 1)  # ko'rinishi 1..count
-        row.append(InlineKeyboardButton(text=number_label, callback_data=f"pickid:{job['job_id']}:{page}"))
+        row.append(InlineKeyboardButton(text=number_label, callback_data=f"{pick}:{job['job_id']}:{page}"))
         if (i + 1) % 5 == 0:
             builder.row(*row)
             row = []
@@ -443,9 +862,9 @@ def pagination_kb(total_jobs: int, page: int, per_page: int = 10,
     # Navigatsiya
     nav_row = []
     if page > 0:
-        nav_row.append(InlineKeyboardButton(text=t(lang, "btn_prev"), callback_data=f"page:{page-1}"))
+        nav_row.append(InlineKeyboardButton(text=t(lang, "btn_prev"), callback_data=f"{nav}:{page-1}{nav_suffix}"))
     if end < len(jobs):
-        nav_row.append(InlineKeyboardButton(text=t(lang, "btn_next"), callback_data=f"page:{page+1}"))
+        nav_row.append(InlineKeyboardButton(text=t(lang, "btn_next"), callback_data=f"{nav}:{page+1}{nav_suffix}"))
     if nav_row:
         builder.row(*nav_row)
 
@@ -458,16 +877,61 @@ def job_detail_kb(job_id: int, page: int, lang: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text=t(lang, "btn_add_cart"), callback_data=f"add:{job_id}:{page}")
     builder.button(text=t(lang, "btn_dislike"), callback_data=f"dislike:{job_id}:{page}")
+    builder.button(text=t(lang, "btn_similar"), callback_data=f"similar:{job_id}:{page}")
     builder.button(text=t(lang, "btn_back_list"), callback_data=f"page:{page}")
     builder.adjust(1)
     return builder.as_markup()
 
 
-def cart_item_remove_kb(job_id: int, lang: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=t(lang, "btn_remove_from_cart"), callback_data=f"rm:{job_id}")],
-        [InlineKeyboardButton(text=t(lang, "btn_back_menu"), callback_data="back_menu")]
+def similar_jobs_kb(job_id: int, similar: List[Dict[str, Any]], page: int, lang: str) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    for i, job in enumerate(similar, start=1):
+        builder.button(text=str(i), callback_data=f"pickid:{job['job_id']}:{page}")
+    builder.adjust(5)
+    builder.row(InlineKeyboardButton(text=t(lang, "btn_back_list"), callback_data=f"pickid:{job_id}:{page}"))
+    return builder.as_markup()
+
+
+def subscriptions_kb(subs: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    for sub in subs:
+        builder.button(text=f"❌ {describe_subscription(sub)}", callback_data=f"unsub:{sub['id']}")
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def digest_kb(page: int, pages: int, lang: str) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    if page > 0:
+        builder.button(text=t(lang, "btn_prev"), callback_data=f"dg:{page - 1}")
+    if page < pages - 1:
+        builder.button(text=t(lang, "btn_next"), callback_data=f"dg:{page + 1}")
+    return builder.as_markup()
+
+
+def cart_kb(cart: List[int], page: int, lang: str) -> InlineKeyboardMarkup:
+    # pagination_kb faqat job_id ni o'qiydi — butun savat uchun e'lonlarni yuklash shart emas
+    kb = pagination_kb(len(cart), page, jobs_list=[{"job_id": jid} for jid in cart], lang=lang,
+                       pick="crm", nav="cart")
+    # eksport tugmalari menyu qatoridan oldin
+    kb.inline_keyboard.insert(len(kb.inline_keyboard) - 1, [
+        InlineKeyboardButton(text=t(lang, "btn_export_csv"), callback_data="cartx:csv"),
+        InlineKeyboardButton(text=t(lang, "btn_export_html"), callback_data="cartx:html"),
     ])
+    return kb
+
+
+# ------------------ Message edits ------------------
+# Ekrandagi (matn, klaviatura) xeshi — bir xil tahrirlar API ga yuborilmaydi
+EDITS = MessageStateCache()
+# Tez bosilgan navigatsiya: bitta xabarga faqat oxirgi render yetkaziladi. Executor
+# bir foydalanuvchi callbacklarini ketma-ket bajaradi, shuning uchun navbatdagi
+# yangiroq render bo'lsa joriysi tashlanadi (UPDATES.has_queued)
+EDIT_COALESCER = EditCoalescer(EDITS, superseded=UPDATES.has_queued)
+
+
+async def edit_message(message: Message, text: str, **kwargs) -> str:
+    return await EDIT_COALESCER.edit(message, text, **kwargs)
 
 
 # ------------------ FSM states ------------------
@@ -479,19 +943,46 @@ class Reg(StatesGroup):
 
 
 # ------------------ Membership check ------------------
-async def is_member(user_id: int) -> bool:
+def _member_status_ok(member) -> bool:
+    # cheklangan (restricted) foydalanuvchi ham kanalda qolgan bo'lishi mumkin
+    return member.status in MEMBER_STATUSES or (member.status == "restricted" and getattr(member, "is_member", False))
+
+
+async def _fetch_membership(user_id: int) -> bool:
+    chat = CHANNEL_ID if CHANNEL_ID is not None else (CHANNEL_USERNAME or None)
     try:
-        chat = CHANNEL_ID if CHANNEL_ID is not None else (CHANNEL_USERNAME or None)
-        if not chat:
-            return True
         member = await bot.get_chat_member(chat_id=chat, user_id=user_id)
-        status = member.status
-        return status in ("member", "administrator", "creator")
-    except Exception:
+    except TelegramBadRequest:
+        # foydalanuvchi kanalda umuman topilmadi — aniq javob
         return False
+    return _member_status_ok(member)
+
+
+MEMBERSHIP = MembershipCache(_fetch_membership, positive_ttl=MEMBERSHIP_POSITIVE_TTL,
+                             negative_ttl=MEMBERSHIP_NEGATIVE_TTL)
+
+
+async def is_member(user_id: int) -> bool:
+    """Vaqtinchalik xatolar (tarmoq, 5xx, flood) chaqiruvchiga ko'tariladi."""
+    if CHANNEL_ID is None and not CHANNEL_USERNAME:
+        return True
+    return await MEMBERSHIP.is_member(user_id)
+
+
+def _is_gate_channel(chat) -> bool:
+    if CHANNEL_ID is not None:
+        return chat.id == CHANNEL_ID
+    return bool(CHANNEL_USERNAME) and (chat.username or "").lower() == CHANNEL_USERNAME.lstrip("@").lower()
 
 
 # ------------------ Domain helpers ------------------
+def _learn_preference(prof: Dict[str, Any], job_id: int, label: float) -> None:
+    # Savat (1) / yoqmadi (0) bosishlari — foydalanuvchi modeliga bitta qadam
+    job = find_job_by_id(job_id)
+    if job:
+        prof["rank_model"] = ranking.update_model(prof.get("rank_model"), job, label)
+
+
 def add_to_cart(tg_id: int, job_id: int) -> Tuple[bool, str]:
     users = load_users()
     key = str(tg_id)
@@ -505,6 +996,7 @@ def add_to_cart(tg_id: int, job_id: int) -> Tuple[bool, str]:
         return False, "limit"
     cart.append(job_id)
     prof["cart"] = cart
+    _learn_preference(prof, job_id, 1.0)
     users[key] = prof
     save_users(users)
     return True, "ok"
@@ -537,16 +1029,130 @@ def dislike_job(tg_id: int, job_id: int) -> Tuple[bool, str]:
         return False, "dup"
     disliked.append(job_id)
     prof["disliked"] = disliked
+    _learn_preference(prof, job_id, 0.0)
     users[key] = prof
     save_users(users)
     return True, "ok"
 
 
+def add_subscription(tg_id: int, sub: Dict[str, Any]) -> Tuple[bool, str]:
+    users = load_users()
+    key = str(tg_id)
+    prof = users.get(key)
+    if not prof:
+        return False, "Profile not found."
+    subs: List[Dict[str, Any]] = prof.get("subscriptions", [])
+    if len(subs) >= MAX_SUBSCRIPTIONS:
+        return False, "limit"
+    prof["sub_seq"] = prof.get("sub_seq", 0) + 1
+    sub = dict(sub, id=prof["sub_seq"])
+    subs.append(sub)
+    prof["subscriptions"] = subs
+    users[key] = prof
+    save_users(users)
+    SUBSCRIPTIONS.add(f"{tg_id}:{sub['id']}", tg_id, sub)
+    return True, "ok"
+
+
+def remove_subscription(tg_id: int, sub_id: int) -> Tuple[bool, str]:
+    users = load_users()
+    key = str(tg_id)
+    prof = users.get(key)
+    if not prof:
+        return False, "Profile not found."
+    subs: List[Dict[str, Any]] = prof.get("subscriptions", [])
+    kept = [sub for sub in subs if sub["id"] != sub_id]
+    if len(kept) == len(subs):
+        return False, "not_in"
+    prof["subscriptions"] = kept
+    users[key] = prof
+    save_users(users)
+    SUBSCRIPTIONS.remove(f"{tg_id}:{sub_id}")
+    return True, "ok"
+
+
+def find_jobs_by_ids(source: str, job_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    # bitta manbadan bir nechta id — bitta o'tishda
+    jobs = read_csv(JOBS_CSV) if source == "jobs" else load_jobs(source)
+    return _find_in(jobs, job_ids)
+
+
+def _find_in(jobs, job_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    # katalog holatini o'zgartirmaydi — oqimda ham chaqirish mumkin
+    if isinstance(jobs, SnapshotJobs):
+        found = {jid: jobs.get_by_id(jid) for jid in job_ids}
+        return {jid: job for jid, job in found.items() if job is not None}
+    wanted = set(job_ids)
+    found: Dict[int, Dict[str, Any]] = {}
+    for j in jobs:
+        if j["job_id"] in wanted and j["job_id"] not in found:
+            found[j["job_id"]] = j
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def _job_lookup(path: str) -> Callable[[int], Optional[Dict[str, Any]]]:
+    """job_id -> ish; ro'yxat kataloglar uchun id indeksi versiyasiga bittadan quriladi."""
+    jobs = read_csv(path)
+    if isinstance(jobs, SnapshotJobs):
+        # snapshotda job_id bo'yicha tayyor indeks bor
+        return jobs.get_by_id
+    key = _JOBS_CACHE[path][0]
+    cached = _ID_INDEX.get(path)
+    if not (cached and cached[0] == key):
+        by_id: Dict[int, Dict[str, Any]] = {}
+        for j in jobs:
+            by_id.setdefault(j["job_id"], j)
+        cached = _ID_INDEX[path] = (key, by_id)
+    return cached[1].get
+
+
 def find_job_by_id(job_id: int) -> Optional[Dict[str, Any]]:
-    for j in load_jobs():
-        if j["job_id"] == job_id:
-            return j
-    return None
+    return _job_lookup(JOBS_CSV)(job_id)
+
+
+def find_similar_jobs(job_id: int) -> List[Dict[str, Any]]:
+    # _job_lookup indeksni kerak bo'lsa yangilaydi; qolgani — tayyor jadvaldan o'qish
+    get = _job_lookup(JOBS_CSV)
+    found = (get(jid) for jid in SIMILAR_JOBS.similar(job_id))
+    return [job for job in found if job is not None]
+
+
+def visible_jobs_for(prof: Dict[str, Any], jobs) -> List[Dict[str, Any]]:
+    disliked = prof.get("disliked", [])
+    if isinstance(jobs, MergedJobsView):
+        # virtual ko'rinish — ro'yxat yig'ilmaydi
+        return jobs.without(disliked)
+    return [j for j in jobs if j["job_id"] not in disliked]
+
+
+def rank_visible_jobs(prof: Dict[str, Any], visible_jobs: List[Dict[str, Any]],
+                      page: int, per_page: int = 10) -> List[Dict[str, Any]]:
+    # Faqat shu sahifagacha bo'lgan qism to'liq saralanadi
+    return ranking.rank_jobs(prof.get("rank_model"), visible_jobs, top=(page + 1) * per_page)
+
+
+def source_links(job: Dict[str, Any]) -> str:
+    # "Hammasi" ko'rinishidagi kanonik e'lon: boshqa manbalardagi nusxalar havolalari
+    others = [s for s in job.get("sources") or () if s["link"] and s["link"] != job.get("link")]
+    return ", ".join(f"<a href=\"{html.escape(s['link'])}\">{html.escape(s['source'] or '?')}</a>"
+                     for s in others)
+
+
+def job_card_text(job: Dict[str, Any]) -> str:
+    # description_html ingest paytida Telegram-xavfsiz qilingan (telegram_html.py),
+    # bu yerda faqat qisqa maydonlar escape qilinadi
+    text = (
+        f"<b>{html.escape(job['name'], quote=False)}</b>\n"
+        f"🏢 {html.escape(job['company'], quote=False)}\n"
+        f"📍 {html.escape(job['location'], quote=False)}\n"
+        f"🛠️ {html.escape(job['skills'], quote=False)}\n\n"
+        f"{job.get('description_html', '')}\n\n"
+        f"🔗 <a href=\"{html.escape(job['link'])}\">Topshirish (Link)</a>"
+    )
+    others = source_links(job)
+    return f"{text}\n🔁 {others}" if others else text
 
 
 def jobs_header_text(lang: str, total: int, page: int, per_page: int = 10) -> str:
@@ -556,12 +1162,37 @@ def jobs_header_text(lang: str, total: int, page: int, per_page: int = 10) -> st
     return t(lang, "jobs_header", total=total, page=page + 1, pages=pages, start=start, end=end)
 
 
+def cart_page(prof: Dict[str, Any], lang: str, page: int, per_page: int = 10) -> Tuple[str, InlineKeyboardMarkup]:
+    cart: List[int] = prof.get("cart") or []
+    pages = max(1, (len(cart) + per_page - 1) // per_page)
+    page = max(0, min(page, pages - 1))
+    page_ids = cart[page * per_page:(page + 1) * per_page]
+    # sahifa uchun bitta o'tish (savat id lari asosiy katalogdan, find_job_by_id kabi)
+    found = find_jobs_by_ids("jobs", page_ids)
+    lines = []
+    for i, jid in enumerate(page_ids, start=1):
+        job = found.get(jid)
+        if job:
+            item = t(lang, "cart_item_line",
+                     name=html.escape(job["name"], quote=False), company=html.escape(job["company"], quote=False),
+                     location=html.escape(job["location"], quote=False), link=html.escape(job["link"]))
+        else:
+            item = t(lang, "cart_item_gone")
+        lines.append(f"{i}. {item}")
+    header = t(lang, "cart_header", total=len(cart), page=page + 1, pages=pages,
+               start=page * per_page + 1, end=page * per_page + len(page_ids))
+    text = f"{header}\n\n" + "\n\n".join(lines) + f"\n\n{t(lang, 'cart_footer')}"
+    return text, cart_kb(cart, page, lang)
+
+
 def jobs_page_text(jobs_list: List[Dict[str, Any]], page: int, per_page: int = 10) -> str:
     start = page * per_page
     end = min(start + per_page, len(jobs_list))
     lines = []
     for i, job in enumerate(jobs_list[start:end], start=1):
-        lines.append(f"{i}. {job.get('name', '')}")
+        line = f"{i}. {html.escape(job.get('name', ''), quote=False)}"
+        others = source_links(job)
+        lines.append(f"{line} ({others})" if others else line)
     return "\n".join(lines)
 
 
@@ -599,29 +1230,40 @@ async def set_language(clb: CallbackQuery):
     user = get_or_create_profile(clb.from_user.id)
     if user.get("registered"):
         full_name = (user.get("first_name") or "") + " " + (user.get("last_name") or "")
-        await clb.message.edit_text(t(lang_code, "hello_registered", full_name=full_name.strip()))
+        await edit_message(clb.message, t(lang_code, "hello_registered", full_name=full_name.strip()))
         await clb.message.answer(t(lang_code, "menu_view_jobs"), reply_markup=main_menu_kb(lang_code))
         await clb.answer()
         return
 
-    await clb.message.edit_text(t(lang_code, "ask_join"), reply_markup=join_channel_kb(lang_code))
+    await edit_message(clb.message, t(lang_code, "ask_join"), reply_markup=join_channel_kb(lang_code))
     await clb.answer()
 
 
 @dp.callback_query(F.data == "check_join")
 async def on_check_join(clb: CallbackQuery, state: FSMContext):
     lang = get_or_create_profile(clb.from_user.id).get("lang") or "uz"
-    ok = await is_member(clb.from_user.id)
+    try:
+        ok = await is_member(clb.from_user.id)
+    except TelegramAPIError:
+        await clb.answer(t(lang, "join_check_failed"), show_alert=True)
+        return
     if not ok:
-        await clb.message.edit_text(t(lang, "not_joined"), reply_markup=join_channel_kb(lang))
+        await edit_message(clb.message, t(lang, "not_joined"), reply_markup=join_channel_kb(lang))
         await clb.answer()
         return
 
     await state.set_state(Reg.waiting_password)
-    await clb.message.edit_text(t(lang, "ask_password"))
+    await edit_message(clb.message, t(lang, "ask_password"))
     await clb.answer()
 
 
+@dp.chat_member()
+async def on_chat_member(event: ChatMemberUpdated):
+    # bot kanal admini bo'lsa keladi: keshni so'rovsiz yangilaymiz
+    if _is_gate_channel(event.chat):
+        MEMBERSHIP.observe(event.new_chat_member.user.id, _member_status_ok(event.new_chat_member))
+
+
 @dp.message(Reg.waiting_password)
 async def on_password(msg: Message, state: FSMContext):
     lang = get_or_create_profile(msg.from_user.id).get("lang") or "uz"
@@ -706,25 +1348,13 @@ async def on_phone_text(msg: Message, state: FSMContext):
     await msg.answer(t(lang, "reg_success"), reply_markup=main_menu_kb(lang))
 
 def job_source_kb(lang: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔸 Hh.uz", callback_data="src:hh")],
-        [InlineKeyboardButton(text="🔸 LinkedIn", callback_data="src:linkedin")],
-        [InlineKeyboardButton(text="🔸 Olx.uz", callback_data="src:olx")],
-        [InlineKeyboardButton(text="🔸 Ish.UZ", callback_data="src:ishuz")],
-        [InlineKeyboardButton(text="🌐 Hammasi", callback_data="src:all")],
-    ])
-
-# -------- Main menu actions --------
-# def job_source_kb(lang: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔸 Hh.uz", callback_data="src:hh")],
-        [InlineKeyboardButton(text="🔸 LinkedIn", callback_data="src:linkedin")],
-        [InlineKeyboardButton(text="🔸 Olx.uz", callback_data="src:olx")],
-        [InlineKeyboardButton(text="🔸 Ish.UZ", callback_data="src:ishuz")],
-        [InlineKeyboardButton(text="🌐 Hammasi", callback_data="src:all")],
-    ])
+    # tugmalar manbalar reyestridan (sources.py)
+    rows = [[InlineKeyboardButton(text=source.label, callback_data=f"src:{source.name}")] for source in SOURCES]
+    rows.append([InlineKeyboardButton(text=t(lang, "src_all"), callback_data="src:all")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+# -------- Main menu actions --------
 @dp.message(F.text.in_({
     LANG_TEXTS["uz"]["menu_view_jobs"],
     LANG_TEXTS["en"]["menu_view_jobs"],
@@ -748,18 +1378,11 @@ async def on_view_jobs(msg: Message):
 async def on_my_cart(msg: Message):
     prof = get_or_create_profile(msg.from_user.id)
     lang = prof.get("lang") or "uz"
-    cart = prof.get("cart", [])
-    if not cart:
+    if not prof.get("cart"):
         await msg.answer(t(lang, "cart_empty"))
         return
-
-    for jid in list(cart):
-        job = find_job_by_id(jid)
-        if not job:
-            continue
-        txt = t(lang, "cart_item_line", name=job["name"], company=job["company"], location=job["location"], link=job["link"])
-        await msg.answer(txt, reply_markup=cart_item_remove_kb(job_id=jid, lang=lang))
-    await msg.answer(t(lang, "btn_back_menu"), reply_markup=main_menu_kb(lang))
+    text, kb = cart_page(prof, lang, 0)
+    await msg.answer(text, reply_markup=kb, disable_web_page_preview=True)
 
 
 @dp.message(F.text.in_({LANG_TEXTS["uz"]["menu_change_lang"], LANG_TEXTS["en"]["menu_change_lang"], LANG_TEXTS["ru"]["menu_change_lang"]}))
@@ -772,51 +1395,54 @@ async def on_source_select(clb: CallbackQuery):
     prof = get_or_create_profile(clb.from_user.id)
     lang = prof.get("lang") or "uz"
     source = clb.data.split(":")[1]
+    # spinner render (yuklash + saralash) kutmasin
+    await clb.answer()
 
     jobs = load_jobs(source if source != "all" else "all")
-    disliked = prof.get("disliked", [])
-    visible_jobs = [j for j in jobs if j["job_id"] not in disliked]
+    visible_jobs = visible_jobs_for(prof, jobs)
 
     if not visible_jobs:
-        await clb.message.edit_text(t(lang, "no_visible_jobs"))
-        await clb.answer()
+        await edit_message(clb.message, t(lang, "no_visible_jobs"))
         return
 
     page = 0
+    visible_jobs = rank_visible_jobs(prof, visible_jobs, page)
     header = jobs_header_text(lang=lang, total=len(visible_jobs), page=page, per_page=10)
     listing = jobs_page_text(visible_jobs, page, per_page=10)
     text = f"{header}\n\n{listing}\n\n{t(lang, 'jobs_list_footer')}"
 
-    await clb.message.edit_text(
+    await edit_message(
+        clb.message,
         text,
-        reply_markup=pagination_kb(len(visible_jobs), page, jobs_list=visible_jobs, lang=lang)
+        reply_markup=pagination_kb(len(visible_jobs), page, jobs_list=visible_jobs, lang=lang, source=source)
     )
-    await clb.answer()
 
 # -------- Pagination & details callbacks --------
 @dp.callback_query(F.data.startswith("page:"))
 async def on_page_nav(clb: CallbackQuery):
     prof = get_or_create_profile(clb.from_user.id)
     lang = prof.get("lang") or "uz"
-    page = int(clb.data.split(":")[1])
-    all_jobs = load_jobs()
-    disliked = prof.get("disliked", [])
-    visible_jobs = [j for j in all_jobs if j["job_id"] not in disliked]
+    parts = clb.data.split(":")
+    page = int(parts[1])
+    source = parts[2] if len(parts) > 2 else None
+    await clb.answer()
+    all_jobs = load_jobs(source)
+    visible_jobs = visible_jobs_for(prof, all_jobs)
 
     if not visible_jobs:
-        await clb.message.edit_text(t(lang, "no_visible_jobs"))
-        await clb.answer()
+        await edit_message(clb.message, t(lang, "no_visible_jobs"))
         return
 
+    visible_jobs = rank_visible_jobs(prof, visible_jobs, page)
     header = jobs_header_text(lang=lang, total=len(visible_jobs), page=page, per_page=10)
     listing = jobs_page_text(visible_jobs, page, per_page=10)
     text = f"{header}\n\n{listing}\n\n{t(lang, 'jobs_list_footer')}"
 
-    await clb.message.edit_text(
+    await edit_message(
+        clb.message,
         text,
-        reply_markup=pagination_kb(len(visible_jobs), page, jobs_list=visible_jobs, lang=lang)
+        reply_markup=pagination_kb(len(visible_jobs), page, jobs_list=visible_jobs, lang=lang, source=source)
     )
-    await clb.answer()
 
 
 @dp.callback_query(F.data.startswith("pickid:"))
@@ -833,26 +1459,39 @@ async def on_pick_item(clb: CallbackQuery):
         await clb.answer("Topilmadi.", show_alert=True)
         return
 
-    # HTML tozalash (Telegramga mos)
-    desc = job.get('description_html', '')
-    desc = desc.replace('<p>', '\n').replace('</p>', '\n')
-    desc = desc.replace('<strong>', '<b>').replace('</strong>', '</b>')
-    desc = desc.replace('<em>', '<i>').replace('</em>', '</i>')
-
-    txt = (
-        f"<b>{job['name']}</b>\n"
-        f"🏢 {job['company']}\n"
-        f"📍 {job['location']}\n"
-        f"🛠️ {job['skills']}\n\n"
-        f"{desc.strip()}\n\n"
-        f"🔗 <a href=\"{job['link']}\">Topshirish (Link)</a>"
-    )
-    await clb.message.edit_text(
-        txt,
+    await clb.answer()
+    await edit_message(
+        clb.message,
+        job_card_text(job),
         reply_markup=job_detail_kb(job_id=job_id, page=page, lang=lang),
         disable_web_page_preview=False
     )
+
+
+@dp.callback_query(F.data.startswith("similar:"))
+async def on_similar_jobs(clb: CallbackQuery):
+    prof = get_or_create_profile(clb.from_user.id)
+    lang = prof.get("lang") or "uz"
+
+    _, job_id_str, page_str = clb.data.split(":")
+    job_id = int(job_id_str)
+    page = int(page_str)
+
+    job = find_job_by_id(job_id)
+    similar = find_similar_jobs(job_id) if job else []
+    if not similar:
+        await clb.answer(t(lang, "similar_none"), show_alert=True)
+        return
+
+    esc = lambda value: html.escape(value or "", quote=False)
+    lines = [f"{i}. {esc(j['name'])} — {esc(j['company'])}" for i, j in enumerate(similar, start=1)]
+    text = f"{t(lang, 'similar_header', name=esc(job['name']))}\n\n" + "\n".join(lines)
     await clb.answer()
+    await edit_message(
+        clb.message,
+        text,
+        reply_markup=similar_jobs_kb(job_id=job_id, similar=similar, page=page, lang=lang)
+    )
 
 
 @dp.callback_query(F.data.startswith("add:"))
@@ -876,21 +1515,10 @@ async def on_add_to_cart(clb: CallbackQuery):
     # qayta tafsilot qoldiramiz (o'zgarmaydi)
     job = find_job_by_id(job_id)
     if job:
-        desc = job.get('description_html', '')
-        desc = desc.replace('<p>', '\n').replace('</p>', '\n')
-        desc = desc.replace('<strong>', '<b>').replace('</strong>', '</b>')
-        desc = desc.replace('<em>', '<i>').replace('</em>', '</i>')
-        txt = (
-            f"<b>{job['name']}</b>\n"
-            f"🏢 {job['company']}\n"
-            f"📍 {job['location']}\n"
-            f"🛠️ {job['skills']}\n\n"
-            f"{desc.strip()}\n\n"
-            f"🔗 <a href=\"{job['link']}\">Topshirish (Link)</a>"
-        )
         page = int(page_str)
-        await clb.message.edit_text(
-            txt,
+        await edit_message(
+            clb.message,
+            job_card_text(job),
             reply_markup=job_detail_kb(job_id=job_id, page=page, lang=lang),
             disable_web_page_preview=False
         )
@@ -913,26 +1541,83 @@ async def on_dislike_job(clb: CallbackQuery):
 
     # Ro'yxatni yangilab chizamiz
     all_jobs = load_jobs()
-    disliked = get_or_create_profile(clb.from_user.id).get("disliked", [])
+    prof = get_or_create_profile(clb.from_user.id)
+    disliked = prof.get("disliked", [])
     visible_jobs = [j for j in all_jobs if j["job_id"] not in disliked]
 
     if not visible_jobs:
-        await clb.message.edit_text(t(lang, "no_visible_jobs"))
+        await edit_message(clb.message, t(lang, "no_visible_jobs"))
         return
 
     if page * 10 >= len(visible_jobs):
         page = max(0, page - 1)
 
+    visible_jobs = rank_visible_jobs(prof, visible_jobs, page)
     header = jobs_header_text(lang=lang, total=len(visible_jobs), page=page, per_page=10)
     listing = jobs_page_text(visible_jobs, page, per_page=10)
     text = f"{header}\n\n{listing}\n\n{t(lang, 'jobs_list_footer')}"
 
-    await clb.message.edit_text(
+    await edit_message(
+        clb.message,
         text,
         reply_markup=pagination_kb(len(visible_jobs), page, jobs_list=visible_jobs, lang=lang)
     )
 
 
+@dp.callback_query(F.data.startswith("cart:"))
+async def on_cart_page(clb: CallbackQuery):
+    prof = get_or_create_profile(clb.from_user.id)
+    lang = prof.get("lang") or "uz"
+    await clb.answer()
+    if not prof.get("cart"):
+        await edit_message(clb.message, t(lang, "cart_empty"))
+    else:
+        text, kb = cart_page(prof, lang, int(clb.data.split(":")[1]))
+        await edit_message(clb.message, text, reply_markup=kb, disable_web_page_preview=True)
+
+
+@dp.callback_query(F.data.startswith("crm:"))
+async def on_cart_remove(clb: CallbackQuery):
+    lang = get_or_create_profile(clb.from_user.id).get("lang") or "uz"
+    _, job_id_str, page_str = clb.data.split(":")
+    ok, _ = remove_from_cart(clb.from_user.id, int(job_id_str))
+    await clb.answer(t(lang, "cart_removed") if ok else "Error", show_alert=not ok)
+    prof = get_or_create_profile(clb.from_user.id)
+    if not prof.get("cart"):
+        await edit_message(clb.message, t(lang, "cart_empty"))
+        return
+    # oxirgi sahifadagi yagona element o'chsa cart_page oldingi sahifaga o'tadi
+    text, kb = cart_page(prof, lang, int(page_str))
+    await edit_message(clb.message, text, reply_markup=kb, disable_web_page_preview=True)
+
+
+def cart_export_rows(jobs, cart: List[int]) -> Iterator[Tuple[str, str, str, str]]:
+    # eksport oqimida iteratsiya qilinadi: katalog bo'ylab bitta o'tish, qatorlar savat tartibida
+    found = _find_in(jobs, cart)
+    for jid in cart:
+        job = found.get(jid)
+        if job:
+            yield job["name"], job["company"], job["location"], job["link"]
+
+
+@dp.callback_query(F.data.startswith("cartx:"))
+async def on_cart_export(clb: CallbackQuery):
+    prof = get_or_create_profile(clb.from_user.id)
+    lang = prof.get("lang") or "uz"
+    fmt = clb.data.split(":")[1]
+    if fmt not in EXPORT_FORMATS or not prof.get("cart"):
+        await clb.answer(t(lang, "cart_empty"), show_alert=True)
+        return
+    await clb.answer()
+    # katalog loopda olinadi (kesh), id larni topish va hujjat yozish — oqimda
+    rows = cart_export_rows(read_csv(JOBS_CSV), list(prof["cart"]))
+    data, count = await asyncio.to_thread(export_cart, rows, fmt, t(lang, "cart_export_title"))
+    await clb.message.answer_document(
+        BufferedInputFile(data, filename=f"cart.{fmt}"), caption=t(lang, "cart_export_caption", count=count),
+    )
+
+
+# Eski (har element alohida xabar) savat xabarlaridagi tugmalar uchun
 @dp.callback_query(F.data.startswith("rm:"))
 async def on_remove_item(clb: CallbackQuery):
     prof = get_or_create_profile(clb.from_user.id)
@@ -943,25 +1628,230 @@ async def on_remove_item(clb: CallbackQuery):
     ok, _ = remove_from_cart(clb.from_user.id, job_id)
     if ok:
         await clb.answer(t(lang, "removed_ok"), show_alert=False)
-        await clb.message.edit_text(t(lang, "removed_ok"))
+        await edit_message(clb.message, t(lang, "removed_ok"))
         await clb.message.answer(t(lang, "btn_back_menu"), reply_markup=main_menu_kb(lang))
     else:
         await clb.answer("Error", show_alert=True)
 
 
+# -------- New-job alerts --------
+@dp.message(Command("subscribe"))
+async def on_subscribe(msg: Message, command: CommandObject):
+    prof = get_or_create_profile(msg.from_user.id)
+    lang = prof.get("lang") or "uz"
+    if not prof.get("registered"):
+        await msg.answer(t(lang, "not_registered"))
+        return
+    sub = parse_subscription(command.args or "", SOURCES.names())
+    if sub is None:
+        await msg.answer(t(lang, "sub_usage", sources=", ".join(SOURCES.names())))
+        return
+    ok, reason = add_subscription(msg.from_user.id, sub)
+    if ok:
+        await msg.answer(t(lang, "sub_added", query=html.escape(describe_subscription(sub), quote=False)))
+    elif reason == "limit":
+        await msg.answer(t(lang, "sub_limit", limit=MAX_SUBSCRIPTIONS))
+
+
+@dp.message(Command("alerts"))
+async def on_alerts(msg: Message):
+    prof = get_or_create_profile(msg.from_user.id)
+    lang = prof.get("lang") or "uz"
+    subs = prof.get("subscriptions") or []
+    if not subs:
+        await msg.answer(t(lang, "sub_none"))
+        return
+    await msg.answer(t(lang, "sub_list_header"), reply_markup=subscriptions_kb(subs))
+
+
+@dp.callback_query(F.data.startswith("unsub:"))
+async def on_unsubscribe(clb: CallbackQuery):
+    prof = get_or_create_profile(clb.from_user.id)
+    lang = prof.get("lang") or "uz"
+    _, sub_id_str = clb.data.split(":")
+    ok, _ = remove_subscription(clb.from_user.id, int(sub_id_str))
+    await clb.answer(t(lang, "sub_removed") if ok else "Error", show_alert=not ok)
+    subs = [sub for sub in prof.get("subscriptions") or [] if sub["id"] != int(sub_id_str)]
+    if subs:
+        await EDITS.edit_markup(clb.message, subscriptions_kb(subs))
+    else:
+        await edit_message(clb.message, t(lang, "sub_none"))
+
+
+async def send_job_alert(tg_id: int, jobs: List[Dict[str, Any]]) -> None:
+    prof = get_or_create_profile(tg_id)
+    lang = prof.get("lang") or "uz"
+    lines = [
+        t(lang, "cart_item_line",
+          name=html.escape(job["name"], quote=False), company=html.escape(job["company"], quote=False),
+          location=html.escape(job["location"], quote=False), link=html.escape(job["link"]))
+        for job in jobs
+    ]
+    await OUTBOX.send(tg_id, t(lang, "alert_header") + "\n\n" + "\n\n".join(lines),
+                      disable_web_page_preview=True)
+
+
+def digest_page(tg_id: int, lang: str, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    items, total, pages = DIGESTS.page(tg_id, page)
+    page = min(page, pages - 1)
+    if not total:
+        return t(lang, "digest_empty"), InlineKeyboardMarkup(inline_keyboard=[])
+    by_source: Dict[str, List[int]] = {}
+    for source, jid in items:
+        by_source.setdefault(source, []).append(jid)
+    found = {(source, jid): job for source, ids in by_source.items()
+             for jid, job in find_jobs_by_ids(source, ids).items()}
+    lines = []
+    for key in items:
+        job = found.get(key)
+        if job:
+            lines.append(t(lang, "cart_item_line",
+                           name=html.escape(job["name"], quote=False), company=html.escape(job["company"], quote=False),
+                           location=html.escape(job["location"], quote=False), link=html.escape(job["link"])))
+    header = t(lang, "digest_header", total=total, page=page + 1, pages=pages)
+    return header + "\n\n" + "\n\n".join(lines), digest_kb(page, pages, lang)
+
+
+async def send_digest(tg_id: int) -> None:
+    prof = get_or_create_profile(tg_id)
+    text, kb = digest_page(tg_id, prof.get("lang") or "uz", 0)
+    await OUTBOX.send(tg_id, text, reply_markup=kb, disable_web_page_preview=True)
+
+
+@dp.message(Command("digest"))
+async def on_digest_toggle(msg: Message, command: CommandObject):
+    prof = get_or_create_profile(msg.from_user.id)
+    lang = prof.get("lang") or "uz"
+    arg = (command.args or "").strip().lower()
+    on = arg == "on" if arg in ("on", "off") else prof.get("alert_mode") != "digest"
+    update_profile(msg.from_user.id, alert_mode="digest" if on else "instant")
+    DIGESTS.set_enabled(msg.from_user.id, on)
+    await msg.answer(t(lang, "digest_on" if on else "digest_off"))
+
+
+@dp.callback_query(F.data.startswith("dg:"))
+async def on_digest_page(clb: CallbackQuery):
+    prof = get_or_create_profile(clb.from_user.id)
+    lang = prof.get("lang") or "uz"
+    await clb.answer()
+    text, kb = digest_page(clb.from_user.id, lang, int(clb.data.split(":")[1]))
+    await edit_message(clb.message, text, reply_markup=kb, disable_web_page_preview=True)
+
+
+# -------- Broadcasts (admin) --------
+def broadcast_status_text(lang: str, job_id: str) -> Optional[str]:
+    st = OUTBOX.status(job_id)
+    if st is None:
+        return None
+    done = st.get("ok", 0) + st.get("blocked", 0) + st.get("failed", 0) + st.get("error", 0)
+    return t(lang, "bc_status", job_id=job_id, done=done, total=st["total"], ok=st.get("ok", 0),
+             blocked=st.get("blocked", 0), failed=st.get("failed", 0) + st.get("error", 0),
+             finished=" ✔" if st["finished"] else "")
+
+
+@dp.message(Command("broadcast"), F.from_user.id.in_(ADMIN_IDS))
+async def on_broadcast(msg: Message, command: CommandObject):
+    lang = get_or_create_profile(msg.from_user.id).get("lang") or "uz"
+    if not command.args:
+        await msg.answer(t(lang, "bc_usage"))
+        return
+    recipients = [prof["tg_id"] for prof in load_all_users().values() if prof.get("registered")]
+    job_id = OUTBOX.create(command.args, recipients)
+    await msg.answer(t(lang, "bc_queued", job_id=job_id, total=len(recipients)))
+
+
+@dp.message(Command("broadcast_status"), F.from_user.id.in_(ADMIN_IDS))
+async def on_broadcast_status(msg: Message, command: CommandObject):
+    lang = get_or_create_profile(msg.from_user.id).get("lang") or "uz"
+    ids = [command.args.strip()] if command.args else OUTBOX.job_ids()[-5:]
+    lines = [line for line in (broadcast_status_text(lang, job_id) for job_id in ids) if line]
+    await msg.answer("\n".join(lines) if lines else t(lang, "bc_none"))
+
+
+@dp.message(Command("outbound_stats"), F.from_user.id.in_(ADMIN_IDS))
+async def on_outbound_stats(msg: Message):
+    # sinf bo'yicha navbatda kutish (ms) va SLO dan oshishlar
+    lines = [f"{name}: {st['count']} | avg {st['avg_ms']:.0f} | p95 {st['p95_ms']:.0f} | "
+             f"max {st['max_ms']:.0f} | slo✗ {st['slo_violations']} | queued {OUTBOUND.queued()[name]}"
+             for name, st in OUTBOUND.summary().items()]
+    await msg.answer("<pre>" + html.escape("\n".join(lines)) + "</pre>")
+
+
+@dp.message(Command("update_stats"), F.from_user.id.in_(ADMIN_IDS))
+async def on_update_stats(msg: Message):
+    # navbat chuqurligi, faol update lar va kutish vaqti
+    st = UPDATES.summary()
+    lines = [f"{key}: {value:.1f}" if isinstance(value, float) else f"{key}: {value}" for key, value in st.items()]
+    await msg.answer("<pre>" + html.escape("\n".join(lines)) + "</pre>")
+
+
+async def watch_catalogs(interval: float) -> None:
+    # o'zgargan kataloglar qayta yuklanadi; yangi e'lonlar _on_catalog_loaded orqali navbatga tushadi.
+    # Birinchi aylanish darhol: kataloglar va indekslar birinchi so'rovdan oldin pullarda tayyorlanadi
+    while True:
+        try:
+            await _refresh_catalogs()
+        except Exception as e:
+            print(f"catalog watch failed: {e!r}")
+        await asyncio.sleep(interval)
+
+
 @dp.callback_query(F.data == "back_menu")
 async def on_back_menu(clb: CallbackQuery):
     lang = get_or_create_profile(clb.from_user.id).get("lang") or "uz"
-    await clb.message.edit_text(t(lang, "btn_back_menu"))
+    await edit_message(clb.message, t(lang, "btn_back_menu"))
     await clb.message.answer(t(lang, "btn_back_menu"), reply_markup=main_menu_kb(lang))
     await clb.answer()
 
 
 # ------------------ Entry point ------------------
-async def main():
+def start_background() -> List[asyncio.Task]:
     _ensure_files()
+    compactor = ProfileCompactor(
+        JOB_EXPIRY, _job_is_live, load_users, save_users, refresh=_refresh_catalogs,
+        batch_size=COMPACT_BATCH_SIZE, pause=COMPACT_PAUSE,
+    )
+    users = load_users()
+    SUBSCRIPTIONS.load(users)
+    for prof in users.values():
+        if prof.get("alert_mode") == "digest":
+            DIGESTS.set_enabled(prof["tg_id"], True)
+    background = [
+        asyncio.create_task(compactor.run(COMPACT_INTERVAL)),
+        asyncio.create_task(watch_catalogs(ALERT_POLL_INTERVAL)),
+        # tezlikni OUTBOX boshqaradi, navbatlar o'zi kutmaydi; so'rovlari eng past sinfda
+        asyncio.create_task(with_priority(BULK, ALERTS.run(send_job_alert, pause=0))),
+        asyncio.create_task(with_priority(BULK, DIGESTS.run(send_digest, pause=0))),
+    ]
+    if WORKER_SHARD == 0:
+        # saqlangan ommaviy yuborishlar umumiy papkada — faqat bitta ishchi bajaradi
+        background.append(asyncio.create_task(with_priority(BULK, OUTBOX.run())))
+    return background
+
+
+async def run_worker(sock_path: str) -> None:
+    # cluster.py: update lar old jarayondan unix socket orqali keladi
+    background = start_background()
+    print(f"Worker {WORKER_SHARD}/{WORKER_COUNT} is starting...")
+    try:
+        await serve_worker(dp, bot, sock_path, executor=UPDATES)
+    finally:
+        for task in background:
+            task.cancel()
+
+
+async def main():
+    background = start_background()
     print("Bot is starting...")
-    await dp.start_polling(bot)
+    try:
+        if WEBHOOK_URL:
+            await run_until_signal(run_webhook(dp, bot, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+                                               secret=WEBHOOK_SECRET, executor=UPDATES))
+        else:
+            await run_until_signal(poll_updates(dp, bot, UPDATES))
+    finally:
+        for task in background:
+            task.cancel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+# membership.py
+"""
+Kanal a'zoligi keshi: ijobiy va salbiy natijalar alohida TTL bilan saqlanadi,
+bitta foydalanuvchi uchun bir vaqtdagi so'rovlar bitta get_chat_member
+chaqiruviga birlashtiriladi. Bot kanal admini bo'lsa, chat_member update lari
+keshni darhol yangilaydi (observe). Vaqtinchalik API xatolari keshlanmaydi va
+chaqiruvchiga ko'tariladi — ular "a'zo emas" degani emas.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Set, Tuple
+
+MEMBER_STATUSES = ("member", "administrator", "creator")
+
+
+class MembershipCache:
+    def __init__(self, lookup: Callable[[int], Awaitable[bool]], positive_ttl: float = 600.0,
+                 negative_ttl: float = 10.0, max_size: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.lookup = lookup
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[int, Tuple[bool, float]]" = OrderedDict()  # user -> (a'zo, muddati)
+        self._inflight: Dict[int, asyncio.Task] = {}
+        # so'rov davomida chat_member update kelgan foydalanuvchilar
+        self._overridden: Set[int] = set()
+        self.stats = {"hits": 0, "lookups": 0, "coalesced": 0, "errors": 0, "updates": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int):
+        """Keshdagi amaldagi qiymat yoki None."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] <= self.clock():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[0]
+
+    def set(self, user_id: int, member: bool) -> None:
+        ttl = self.positive_ttl if member else self.negative_ttl
+        self._entries[user_id] = (member, self.clock() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def observe(self, user_id: int, member: bool) -> None:
+        """chat_member update: yangi holat API javobidan ustun."""
+        self.stats["updates"] += 1
+        if user_id in self._inflight:
+            self._overridden.add(user_id)
+        self.set(user_id, member)
+
+    async def is_member(self, user_id: int) -> bool:
+        cached = self.get(user_id)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        else:
+            self.stats["coalesced"] += 1
+        # bitta chaqiruvchi bekor qilinsa, boshqalar kutayotgan so'rov to'xtamasin
+        return await asyncio.shield(task)
+
+    async def _fetch(self, user_id: int) -> bool:
+        self.stats["lookups"] += 1
+        try:
+            member = await self.lookup(user_id)
+        except Exception:
+            self.stats["errors"] += 1
+            self._overridden.discard(user_id)
+            raise
+        if user_id in self._overridden:
+            # javob update dan oldin olingan bo'lishi mumkin
+            self._overridden.discard(user_id)
+            cached = self.get(user_id)
+            return member if cached is None else cached
+        self.set(user_id, member)
+        return member
@@ -0,0 +1,169 @@
+# message_state.py
+"""
+Xabarni tahrirlashdan oldin ekrandagi holat bilan solishtirish.
+
+Har (chat_id, message_id) uchun oxirgi ko'rsatilgan matn va klaviatura xeshi
+chegaralangan LRU keshda saqlanadi. Matn ham, klaviatura ham bir xil bo'lsa
+API chaqirilmaydi; faqat klaviatura o'zgargan bo'lsa edit_reply_markup
+yuboriladi. Keshda yo'q xabar uchun callbackdagi Message (joriy matn va
+klaviatura) bilan solishtiriladi.
+
+EditCoalescer bitta xabarga ketma-ket tahrirlarni birlashtiradi: tahrir
+bajarilayotgan paytda kelgan render lardan faqat oxirgisi kutadi, oraliqdagilari
+tashlanadi. Chaqiruvchi darhol qaytadi — callbackka javob kechikmaydi.
+
+Update lar foydalanuvchi bo'yicha ketma-ket bajarilganda (executor.py) bir
+xabarga tahrirlar ustma-ust tushmaydi va yuqoridagi birlashtirish ishlamaydi.
+Shuning uchun `superseded(key)` beriladi: shu xabarni qayta chizadigan
+yangiroq update navbatda bo'lsa, joriy render yuborilmaydi (SUPERSEDED) —
+ekranga baribir oxirgisi chiqadi.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+SKIPPED = "skipped"
+MARKUP = "markup"
+TEXT = "text"
+QUEUED = "queued"
+SUPERSEDED = "superseded"
+
+
+def _digest(*parts: str) -> bytes:
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.digest()
+
+
+def markup_key(markup: Optional[InlineKeyboardMarkup]) -> str:
+    if markup is None or not markup.inline_keyboard:
+        return ""
+    return markup.model_dump_json(exclude_none=True)
+
+
+def _not_modified(e: TelegramBadRequest) -> bool:
+    return "message is not modified" in (e.message or "")
+
+
+class MessageStateCache:
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._state: "OrderedDict[Tuple[int, int], Tuple[bytes, bytes]]" = OrderedDict()
+        self.stats = {"text": 0, "markup": 0, "skipped": 0, "not_modified": 0}
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def _remember(self, key: Tuple[int, int], text_hash: bytes, markup_hash: bytes) -> None:
+        self._state[key] = (text_hash, markup_hash)
+        self._state.move_to_end(key)
+        while len(self._state) > self.max_size:
+            self._state.popitem(last=False)
+
+    def _current(self, message: Message, key: Tuple[int, int], options: str) -> Optional[Tuple[bytes, bytes]]:
+        state = self._state.get(key)
+        if state is not None:
+            self._state.move_to_end(key)
+            return state
+        # keshda yo'q (masalan, qayta ishga tushgandan keyin) — Telegram yuborgan ko'rinish
+        current_text = message.html_text if message.text is not None else None
+        if current_text is None:
+            return None
+        markup = message.reply_markup if isinstance(message.reply_markup, InlineKeyboardMarkup) else None
+        return _digest(current_text, options), _digest(markup_key(markup))
+
+    async def edit(self, message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                   **kwargs: Any) -> str:
+        """Qaytaradi: skipped / markup / text — qaysi chaqiruv bajarilgani."""
+        key = (message.chat.id, message.message_id)
+        options = repr(sorted(kwargs.items()))
+        text_hash, markup_hash = _digest(text, options), _digest(markup_key(reply_markup))
+        current = self._current(message, key, options)
+        if current == (text_hash, markup_hash):
+            self.stats["skipped"] += 1
+            result = SKIPPED
+        else:
+            try:
+                if current is not None and current[0] == text_hash:
+                    await message.edit_reply_markup(reply_markup=reply_markup)
+                    result = MARKUP
+                else:
+                    await message.edit_text(text, reply_markup=reply_markup, **kwargs)
+                    result = TEXT
+                self.stats[result] += 1
+            except TelegramBadRequest as e:
+                if not _not_modified(e):
+                    raise
+                self.stats["not_modified"] += 1
+                result = SKIPPED
+        self._remember(key, text_hash, markup_hash)
+        return result
+
+    async def edit_markup(self, message: Message, reply_markup: Optional[InlineKeyboardMarkup]) -> str:
+        key = (message.chat.id, message.message_id)
+        state = self._state.get(key)
+        markup_hash = _digest(markup_key(reply_markup))
+        if state is not None and state[1] == markup_hash:
+            self.stats["skipped"] += 1
+            return SKIPPED
+        try:
+            await message.edit_reply_markup(reply_markup=reply_markup)
+            self.stats["markup"] += 1
+        except TelegramBadRequest as e:
+            if not _not_modified(e):
+                raise
+            self.stats["not_modified"] += 1
+            return SKIPPED
+        if state is not None:
+            self._remember(key, state[0], markup_hash)
+        return MARKUP
+
+
+class EditCoalescer:
+    def __init__(self, cache: MessageStateCache,
+                 superseded: Optional[Callable[[Tuple[int, int]], bool]] = None):
+        self.cache = cache
+        self.superseded = superseded
+        self._busy: Set[Tuple[int, int]] = set()
+        self._pending: Dict[Tuple[int, int], Tuple[Message, str, Dict[str, Any]]] = {}
+        self._drains: Set[asyncio.Task] = set()
+        self.stats = {"queued": 0, "superseded": 0}
+
+    async def edit(self, message: Message, text: str, **kwargs: Any) -> str:
+        key = (message.chat.id, message.message_id)
+        if self.superseded is not None and self.superseded(key):
+            self.stats["superseded"] += 1
+            return SUPERSEDED
+        if key in self._busy:
+            if key in self._pending:
+                self.stats["superseded"] += 1
+            self._pending[key] = (message, text, kwargs)
+            self.stats["queued"] += 1
+            return QUEUED
+        self._busy.add(key)
+        try:
+            return await self.cache.edit(message, text, **kwargs)
+        finally:
+            if key in self._pending:
+                task = asyncio.create_task(self._drain(key))
+                self._drains.add(task)
+                task.add_done_callback(self._drains.discard)
+            else:
+                self._busy.discard(key)
+
+    async def _drain(self, key: Tuple[int, int]) -> None:
+        try:
+            while key in self._pending:
+                message, text, kwargs = self._pending.pop(key)
+                try:
+                    await self.cache.edit(message, text, **kwargs)
+                except Exception as e:
+                    print(f"coalesced edit {key} failed: {e!r}")
+        finally:
+            self._busy.discard(key)
@@ -0,0 +1,133 @@
+# outbound.py
+"""
+Bot API so'rovlari uchun ustuvorlik navbati (aiogram sessiya middleware'i).
+
+Bir vaqtda `slots` tadan ko'p so'rov yuborilmaydi; bo'sh joy paydo bo'lganda
+eng yuqori sinfdagi eng eski so'rov o'tadi:
+
+    ANSWER (answerCallbackQuery) > EDIT (edit*/delete) > SEND > BULK
+
+BULK — ommaviy yuborish, ogohlantirish va dayjestlar: ular `with_priority(BULK, ...)`
+ichida ishga tushiriladi (contextvar, ichidagi vazifalarga ham o'tadi).
+getUpdates / webhook sozlash so'rovlari navbatsiz o'tadi. Har sinf uchun navbatda
+kutish vaqti va SLO dan oshishlar soni yig'iladi.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import (
+    AnswerCallbackQuery, DeleteMessage, DeleteWebhook, EditMessageCaption, EditMessageMedia,
+    EditMessageReplyMarkup, EditMessageText, GetMe, GetUpdates, GetWebhookInfo, SetWebhook,
+)
+
+ANSWER, EDIT, SEND, BULK = range(4)
+CLASS_NAMES = ("answer", "edit", "send", "bulk")
+# navbatda kutish chegarasi (soniya)
+DEFAULT_SLO = (0.1, 0.5, 1.0, 30.0)
+
+PRIORITY: ContextVar[Optional[int]] = ContextVar("outbound_priority", default=None)
+
+_EDITS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption, EditMessageMedia, DeleteMessage)
+_BYPASS = (GetUpdates, GetMe, SetWebhook, DeleteWebhook, GetWebhookInfo)
+
+
+async def with_priority(cls: int, coro: Awaitable[Any]) -> Any:
+    """Vazifani berilgan sinfda ishga tushiradi (masalan create_task(with_priority(BULK, ...)))."""
+    PRIORITY.set(cls)
+    return await coro
+
+
+def classify(method: Any) -> Optional[int]:
+    if isinstance(method, _BYPASS):
+        return None
+    if isinstance(method, AnswerCallbackQuery):
+        return ANSWER
+    override = PRIORITY.get()
+    if override is not None:
+        return override
+    if isinstance(method, _EDITS):
+        return EDIT
+    return SEND
+
+
+class ClassStats:
+    __slots__ = ("count", "total", "max", "violations", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.violations = 0
+        self.recent: deque = deque(maxlen=1000)
+
+    def add(self, delay: float, slo: float) -> None:
+        self.count += 1
+        self.total += delay
+        self.max = max(self.max, delay)
+        self.recent.append(delay)
+        if delay > slo:
+            self.violations += 1
+
+    def summary(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+        p95 = recent[int(len(recent) * 0.95) - 1] if recent else 0.0
+        return {"count": self.count, "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+                "p95_ms": p95 * 1000, "max_ms": self.max * 1000, "slo_violations": self.violations}
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    def __init__(self, slots: int = 8, slo: Tuple[float, ...] = DEFAULT_SLO):
+        self.slots = slots
+        self.slo = slo
+        self._active = 0
+        self._waiting: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.stats = [ClassStats() for _ in CLASS_NAMES]
+
+    def queued(self) -> Dict[str, int]:
+        depth = {name: 0 for name in CLASS_NAMES}
+        for cls, _, _ in self._waiting:
+            depth[CLASS_NAMES[cls]] += 1
+        return depth
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: st.summary() for name, st in zip(CLASS_NAMES, self.stats)}
+
+    async def _acquire(self, cls: int) -> None:
+        if self._active < self.slots and not self._waiting:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (cls, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # joy berilgan edi — keyingisiga o'tkazamiz
+            raise
+
+    def _release(self) -> None:
+        while self._waiting:
+            _, _, waiter = heapq.heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_result(None)  # joy to'g'ridan-to'g'ri o'tadi, _active o'zgarmaydi
+                return
+        self._active -= 1
+
+    async def __call__(self, make_request, bot, method):
+        cls = classify(method)
+        if cls is None:
+            return await make_request(bot, method)
+        queued_at = time.monotonic()
+        await self._acquire(cls)
+        self.stats[cls].add(time.monotonic() - queued_at, self.slo[cls])
+        try:
+            return await make_request(bot, method)
+        finally:
+            self._release()
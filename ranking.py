@@ -0,0 +1,127 @@
+# ranking.py
+import bisect
+import heapq
+import math
+from collections.abc import Sequence
+from typing import Dict, Any, List, Optional
+
+# Onlayn logistik regressiya parametrlari
+LEARNING_RATE = 0.3
+L2 = 0.01
+# Profilda saqlanadigan eng katta og'irliklar soni (users.json kichik qolishi uchun)
+MAX_FEATURES = 64
+WEIGHT_DIGITS = 4
+
+
+def job_features(job: Dict[str, Any]) -> List[str]:
+    """Ko'nikmalar va joylashuvdan belgilar ro'yxati."""
+    feats = []
+    for skill in (job.get("skills") or "").split(";"):
+        skill = skill.strip().lower()
+        if skill:
+            feats.append("s:" + skill)
+    location = (job.get("location") or "").strip().lower()
+    if location:
+        feats.append("l:" + location)
+        # "Uzbekistan, Tashkent" -> mamlakat darajasidagi belgi ham
+        country = location.split(",")[0].strip()
+        if country != location:
+            feats.append("l:" + country)
+    return feats
+
+
+def new_model() -> Dict[str, Any]:
+    return {"b": 0.0, "w": {}, "n": 0}
+
+
+def score(model: Optional[Dict[str, Any]], job: Dict[str, Any]) -> float:
+    if not model:
+        return 0.0
+    w = model.get("w", {})
+    return model.get("b", 0.0) + sum(w.get(f, 0.0) for f in job_features(job))
+
+
+def update_model(model: Optional[Dict[str, Any]], job: Dict[str, Any], label: float) -> Dict[str, Any]:
+    """
+    Bitta SGD qadami: label=1 — savatga qo'shildi, label=0 — yoqmadi.
+    Faqat shu ishning belgilari o'zgaradi, shuning uchun narx O(belgilar soni).
+    """
+    model = model or new_model()
+    w: Dict[str, float] = model.setdefault("w", {})
+    feats = job_features(job)
+    z = model.get("b", 0.0) + sum(w.get(f, 0.0) for f in feats)
+    grad = label - 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+    model["b"] = round(model.get("b", 0.0) + LEARNING_RATE * grad, WEIGHT_DIGITS)
+    for f in feats:
+        old = w.get(f, 0.0)
+        w[f] = round(old + LEARNING_RATE * (grad - L2 * old), WEIGHT_DIGITS)
+    if len(w) > MAX_FEATURES:
+        keep = heapq.nlargest(MAX_FEATURES, w.items(), key=lambda kv: abs(kv[1]))
+        model["w"] = dict(keep)
+    model["n"] = model.get("n", 0) + 1
+    return model
+
+
+class RankedJobs(Sequence):
+    """
+    rank_jobs natijasi: avval tanlangan `top` ta ish, keyin qolganlari asl
+    tartibda. Asl ketma-ketlik (ro'yxat yoki MergedJobsView) nusxalanmaydi —
+    sahifa so'ralganda kerakli bo'lak undan olinadi.
+    """
+
+    def __init__(self, jobs, best: List[int]):
+        self._jobs = jobs
+        self._best = [jobs[i] for i in best]
+        self._picked = sorted(best)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._range(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RankedJobs index out of range")
+        return self._range(index, index + 1)[0]
+
+    def _source_index(self, rest: int) -> int:
+        # tanlanmaganlar ichidagi `rest`-o'rin -> asl ketma-ketlikdagi indeks
+        lo, hi = rest, rest + len(self._picked)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid - bisect.bisect_right(self._picked, mid) < rest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _range(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        out = self._best[start:stop]
+        if stop <= len(self._best):
+            return out
+        begin = self._source_index(max(0, start - len(self._best)))
+        need = stop - max(start, len(self._best))
+        # oraliqdagi tanlanganlar soniga qadar ortiqcha olinadi, keyin tashlanadi
+        extra = len(self._picked) - bisect.bisect_left(self._picked, begin)
+        chunk = self._jobs[begin:begin + need + extra]
+        picked = set(self._picked)
+        out.extend(job for i, job in enumerate(chunk, start=begin) if i not in picked)
+        return out[:stop - start]
+
+
+def rank_jobs(model: Optional[Dict[str, Any]], jobs, top: int):
+    """
+    Eng mos `top` ta ishni boshiga chiqaradi (heapq bilan, O(n log top)),
+    qolganlari CSV tartibida keladi. Teng ballarda asl tartib saqlanadi.
+    Ballar ketma-ketlik bo'ylab oqimda hisoblanadi — virtual ko'rinishlar
+    (MergedJobsView) ro'yxatga aylantirilmaydi; natija RankedJobs.
+    """
+    if not model or not model.get("n") or top <= 0:
+        return jobs
+    scored = ((-score(model, job), i) for i, job in enumerate(jobs))
+    return RankedJobs(jobs, [i for _, i in heapq.nsmallest(top, scored)])
@@ -0,0 +1,159 @@
+# shared_catalog.py
+"""
+Bir nechta bot jarayoni uchun umumiy katalog.
+
+Bitta yuklovchi (publisher) snapshotni umumiy katalogga versiyalangan fayl
+sifatida yozadi va CURRENT ko'rsatkichini os.replace bilan almashtiradi.
+Workerlar faylni mmap(ACCESS_READ) bilan ochadi: sahifalar OS page cache'da
+bitta nusxada turadi, N ta worker xotirani N marta egallamaydi.
+
+Umumiy: yozuvlar, satrlar jadvali, id indeksi va qator xeshlari (workerning
+main._CATALOG_HASHES qiymati snapshot.RowHashes — mmap ustida). Katalogdan
+hosil qilinadigan qolgan indekslar — SimilarJobsIndex postinglari, DedupIndex
+klasterlari va obunalar indeksi — har workerda alohida quriladi.
+
+    python shared_catalog.py publish [--dir /dev/shm/maabhr] [--watch 30]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from snapshot import SnapshotReader, build_catalog, default_sources, open_snapshot
+
+POINTER_FILE = "CURRENT"
+# Eski versiyalar shuncha soniyadan keyin o'chiriladi (workerlar yangi versiyaga o'tib ulgurishi uchun)
+GRACE_SECONDS = 60.0
+KEEP_VERSIONS = 2
+
+
+def default_shared_dir() -> str:
+    # Linuxda /dev/shm — RAMdagi fayl tizimi; boshqa joyda data/shared
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm/maabhr"
+    from config import DATA_DIR
+    return os.path.join(DATA_DIR, "shared")
+
+
+def read_pointer(shared_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(shared_dir, POINTER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class CatalogPublisher:
+    """Yagona yuklovchi: CSV lar o'zgarganda yangi versiyani e'lon qiladi."""
+
+    def __init__(self, shared_dir: str, sources: Optional[Dict[str, str]] = None):
+        self.shared_dir = shared_dir
+        self.sources = sources or default_sources()
+        os.makedirs(shared_dir, exist_ok=True)
+
+    def is_stale(self) -> bool:
+        pointer = read_pointer(self.shared_dir)
+        if not pointer:
+            return True
+        reader = open_snapshot(os.path.join(self.shared_dir, pointer["file"]), cache_size=0, cache_rows=False)
+        if reader is None:
+            return True
+        return any(reader.source_for_path(path) is None for path in self.sources.values() if os.path.exists(path))
+
+    def publish(self) -> Dict[str, Any]:
+        version = time.time_ns()
+        name = f"catalog-{version}.bin"
+        counts = build_catalog(self.sources, os.path.join(self.shared_dir, name))
+        pointer = {"version": version, "file": name, "counts": counts}
+        tmp = os.path.join(self.shared_dir, POINTER_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(pointer, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # atomar almashtirish: workerlar yoki eski, yoki yangi versiyani ko'radi
+        os.replace(tmp, os.path.join(self.shared_dir, POINTER_FILE))
+        self.prune()
+        return pointer
+
+    def publish_if_stale(self) -> Optional[Dict[str, Any]]:
+        return self.publish() if self.is_stale() else None
+
+    def prune(self) -> None:
+        # mmap qilingan faylni o'chirish xavfsiz (POSIX): sahifalar oxirgi worker yopguncha qoladi
+        current = (read_pointer(self.shared_dir) or {}).get("file")
+        files = sorted(f for f in os.listdir(self.shared_dir) if f.startswith("catalog-") and f.endswith(".bin"))
+        now = time.time()
+        for fname in files[:-KEEP_VERSIONS]:
+            path = os.path.join(self.shared_dir, fname)
+            if fname == current:
+                continue
+            try:
+                if now - os.path.getmtime(path) > GRACE_SECONDS:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def run(self, interval: float) -> None:
+        while True:
+            pointer = self.publish_if_stale()
+            if pointer:
+                print(f"published {pointer['file']}: {pointer['counts']}")
+            time.sleep(interval)
+
+
+class SharedCatalog:
+    """
+    Worker tomoni: CURRENT ko'rsatkichini kuzatadi va versiya o'zgarganda
+    yangi faylga ulanadi. Qatorlar keshlanmaydi (cache_rows=False), shuning
+    uchun jarayon xotirasi faqat tavsiflar LRU va vaqtinchalik obyektlardan iborat.
+    """
+
+    def __init__(self, shared_dir: str, cache_size: int = 256):
+        self.shared_dir = shared_dir
+        self.cache_size = cache_size
+        self._pointer_mtime: Optional[int] = None
+        self._version: Optional[int] = None
+        self._reader: Optional[SnapshotReader] = None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def current(self) -> Optional[SnapshotReader]:
+        try:
+            mtime = os.stat(os.path.join(self.shared_dir, POINTER_FILE)).st_mtime_ns
+        except OSError:
+            return self._reader
+        if mtime != self._pointer_mtime:
+            self._pointer_mtime = mtime
+            pointer = read_pointer(self.shared_dir)
+            if pointer and pointer.get("version") != self._version:
+                reader = open_snapshot(
+                    os.path.join(self.shared_dir, pointer["file"]),
+                    cache_size=self.cache_size, cache_rows=False,
+                )
+                if reader is not None:
+                    # bitta o'zlashtirish — so'rovlar eski yoki yangi o'quvchini ko'radi
+                    self._reader, self._version = reader, pointer["version"]
+        return self._reader
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="shared_catalog.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="umumiy katalogni yangilash (yagona yuklovchi)")
+    pub.add_argument("--dir", default=os.getenv("SHARED_CATALOG_DIR") or default_shared_dir())
+    pub.add_argument("--watch", type=float, default=0.0, help="shuncha soniyada bir tekshirish")
+    args = parser.parse_args(argv)
+
+    publisher = CatalogPublisher(args.dir)
+    if args.watch > 0:
+        publisher.run(args.watch)
+    else:
+        pointer = publisher.publish()
+        print(f"published {pointer['file']}: {pointer['counts']}")
+
+
+if __name__ == "__main__":
+    main()
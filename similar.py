@@ -0,0 +1,183 @@
+# similar.py
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from catalog_delta import CatalogDelta
+
+# Ko'nikmalar tavsifdagi so'zlardan kuchliroq hisoblanadi
+SKILL_WEIGHT = 3.0
+# Juda ko'p ishda uchraydigan so'zlar nomzod qidirishda e'tiborga olinmaydi
+MAX_DF_RATIO = 0.5
+# O'zgarganlar ulushi shundan oshsa — to'liq qayta qurish
+FULL_REBUILD_RATIO = 0.3
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def job_terms(job: Dict[str, Any]) -> Dict[str, float]:
+    """Ishdan TF (term -> og'irlik) lug'atini tuzadi: ko'nikmalar + nom + tavsif."""
+    tf: Dict[str, float] = defaultdict(float)
+    for skill in (job.get("skills") or "").split(";"):
+        skill = skill.strip().lower()
+        if skill:
+            tf["s:" + skill] += SKILL_WEIGHT
+    text = (job.get("name") or "") + " " + _TAG_RE.sub(" ", job.get("description_html") or "")
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) > 2:
+            tf["w:" + word] += 1.0
+    return tf
+
+
+def job_fingerprint(job: Dict[str, Any]) -> int:
+    return hash((job.get("name"), job.get("skills"), job.get("description_html")))
+
+
+class SimilarJobsIndex:
+    """
+    TF-IDF vektorlar va har bir ish uchun oldindan hisoblangan top-k qo'shnilar jadvali.
+    Katalog yuklanganda sync() chaqiriladi: birinchi marta hammasi hisoblanadi,
+    keyingi safar faqat o'zgargan/o'chirilgan ishlar va ularga bog'liq qo'shnilar yangilanadi.
+    """
+
+    def __init__(self, k: int = 5):
+        self.k = k
+        self._reset()
+
+    def _reset(self) -> None:
+        self._fp: Dict[int, int] = {}
+        self._tf: Dict[int, Dict[str, float]] = {}
+        self._vec: Dict[int, Dict[str, float]] = {}
+        self._df: Dict[str, int] = defaultdict(int)
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._neighbors: Dict[int, List[Tuple[float, int]]] = {}
+        # qaysi ishlar ro'yxatida men qo'shni sifatida turibman
+        self._rev: Dict[int, Set[int]] = defaultdict(set)
+
+    # ------------------ Public API ------------------
+    def similar(self, job_id: int, k: Optional[int] = None) -> List[int]:
+        return [jid for _, jid in self._neighbors.get(job_id, [])[:k or self.k]]
+
+    def sync(self, jobs: List[Dict[str, Any]], delta: Optional[CatalogDelta] = None) -> None:
+        """
+        delta berilsa (catalog_delta.diff_catalog) o'zgarishlar undan olinadi,
+        aks holda barmoq izlari bo'yicha butun katalog solishtiriladi.
+        """
+        if delta is not None:
+            changed, removed = delta.changed, delta.deleted
+            total = len(self._fp) + len(delta.inserted) - len(delta.deleted)
+        else:
+            new_fp = {j["job_id"]: job_fingerprint(j) for j in jobs}
+            changed = [j for j in jobs if self._fp.get(j["job_id"]) != new_fp[j["job_id"]]]
+            removed = [jid for jid in self._fp if jid not in new_fp]
+            total = len(new_fp)
+        if not changed and not removed:
+            return
+        if not self._fp or len(changed) + len(removed) > FULL_REBUILD_RATIO * max(1, total):
+            self.rebuild(jobs)
+        else:
+            self.apply_changes(changed, removed)
+
+    def rebuild(self, jobs: List[Dict[str, Any]]) -> None:
+        self._reset()
+        for job in jobs:
+            self._fp[job["job_id"]] = job_fingerprint(job)
+            self._tf[job["job_id"]] = job_terms(job)
+            for term in self._tf[job["job_id"]]:
+                self._df[term] += 1
+        for jid in self._tf:
+            self._index_vector(jid)
+        for jid in self._tf:
+            self._set_neighbors(jid, self._top_k(self._scores(jid)))
+
+    def apply_changes(self, changed: List[Dict[str, Any]], removed: List[int]) -> None:
+        changed_ids = {j["job_id"] for j in changed}
+        touched = changed_ids | set(removed)
+
+        # 1) eski vektorlarni indeksdan olib tashlash
+        for jid in touched:
+            self._drop(jid)
+        # 2) yangi vektorlar (IDF shu paytdagi df bo'yicha)
+        for job in changed:
+            jid = job["job_id"]
+            self._fp[jid] = job_fingerprint(job)
+            self._tf[jid] = job_terms(job)
+            for term in self._tf[jid]:
+                self._df[term] += 1
+        for jid in changed_ids:
+            self._index_vector(jid)
+
+        # 3) ro'yxatida o'zgargan ish turganlar — qayta hisoblanadi
+        stale: Set[int] = set()
+        for jid in touched:
+            stale |= self._rev.pop(jid, set())
+        stale -= touched
+        for jid in changed_ids:
+            scores = self._scores(jid)
+            self._set_neighbors(jid, self._top_k(scores))
+            # o'xshashlik simmetrik: qo'shnilar jadvaliga yangi ishni qo'shib ko'ramiz
+            for other, score in scores.items():
+                if other not in stale and other not in changed_ids:
+                    self._offer(other, score, jid)
+        for jid in stale:
+            if jid in self._vec:
+                self._set_neighbors(jid, self._top_k(self._scores(jid)))
+
+    # ------------------ Internals ------------------
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._tf)) / (1 + self._df.get(term, 0))) + 1.0
+
+    def _index_vector(self, jid: int) -> None:
+        vec = {term: w * self._idf(term) for term, w in self._tf[jid].items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        vec = {term: w / norm for term, w in vec.items()}
+        self._vec[jid] = vec
+        for term, w in vec.items():
+            self._postings[term][jid] = w
+
+    def _drop(self, jid: int) -> None:
+        for term in self._vec.pop(jid, {}):
+            self._postings[term].pop(jid, None)
+            if not self._postings[term]:
+                del self._postings[term]
+        for term in self._tf.pop(jid, {}):
+            self._df[term] -= 1
+            if self._df[term] <= 0:
+                del self._df[term]
+        self._fp.pop(jid, None)
+        for _, other in self._neighbors.pop(jid, []):
+            self._rev[other].discard(jid)
+
+    def _scores(self, jid: int) -> Dict[int, float]:
+        max_df = max(2, int(MAX_DF_RATIO * len(self._vec)))
+        acc: Dict[int, float] = defaultdict(float)
+        for term, w in self._vec[jid].items():
+            posting = self._postings.get(term, {})
+            if len(posting) > max_df:
+                continue
+            for other, w2 in posting.items():
+                if other != jid:
+                    acc[other] += w * w2
+        return acc
+
+    def _top_k(self, scores: Dict[int, float]) -> List[Tuple[float, int]]:
+        best = heapq.nsmallest(self.k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [(score, other) for other, score in best]
+
+    def _set_neighbors(self, jid: int, neighbors: List[Tuple[float, int]]) -> None:
+        for _, other in self._neighbors.get(jid, []):
+            self._rev[other].discard(jid)
+        self._neighbors[jid] = neighbors
+        for _, other in neighbors:
+            self._rev[other].add(jid)
+
+    def _offer(self, jid: int, score: float, candidate: int) -> None:
+        current = self._neighbors.get(jid, [])
+        if len(current) >= self.k and (score, -candidate) <= (current[-1][0], -current[-1][1]):
+            return
+        merged = [(s, o) for s, o in current if o != candidate] + [(score, candidate)]
+        merged.sort(key=lambda so: (-so[0], so[1]))
+        self._set_neighbors(jid, merged[:self.k])
@@ -0,0 +1,353 @@
+# snapshot.py
+"""
+Katalogning oldindan kompilyatsiya qilingan binar nusxasi (snapshot).
+
+    python snapshot.py build-catalog [--out data/catalog.bin]
+
+Fayl tuzilishi (barcha bo'limlar 8 baytga tekislangan):
+    header   : MAGIC, FORMAT_VERSION, meta uzunligi
+    meta     : JSON — manbalar (fayl nomi, mtime_ns, hajm), bo'limlar offsetlari
+    strings  : satrlar jadvali — u64 offsetlar + UTF-8 ma'lumot (takrorlar bitta)
+    descriptions : zlib lug'ati + u64 offsetlar + siqilgan tavsiflar blobi (blobstore.py)
+    records  : har manba uchun <q6I yozuvlar (job_id + 5 ta satr indeksi + tavsif indeksi),
+               CSV tartibida
+    ids      : har manba uchun job_id bo'yicha saralangan indeks (i64 id, u32 qator)
+    hashes   : har manba uchun u64 kontent xeshlari (catalog_delta.row_hash), CSV tartibida —
+               yuklashda qatorlar va tavsiflar qayta xeshlanmaydi
+"""
+import argparse
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Any, List, Optional
+
+from blobstore import BlobWriter, DescriptionBlobStore, train_dictionary
+from catalog_delta import row_hash
+from csv_stream import LazyJob
+from telegram_html import to_telegram_html
+
+MAGIC = b"MAABCAT\0"
+FORMAT_VERSION = 4
+FIELDS = ("name", "company", "location", "skills", "description_html", "link")
+
+_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<q6I")
+_DESC_COL = FIELDS.index("description_html")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _align(buf: bytearray) -> int:
+    buf.extend(b"\0" * (-len(buf) % 8))
+    return len(buf)
+
+
+# ------------------ Build ------------------
+def _read_rows(path: str) -> List[List[Any]]:
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                job_id = int((row.get("job_id") or "").strip())
+            except ValueError:
+                continue
+            values = [row.get(name) or "" for name in FIELDS]
+            # tavsif snapshotga Telegram HTML ko'rinishida yoziladi
+            values[_DESC_COL] = to_telegram_html(values[_DESC_COL])
+            rows.append([job_id] + values)
+    return rows
+
+
+def build_catalog(sources: Dict[str, str], out_path: str, use_dict: bool = True) -> Dict[str, int]:
+    """CSV manbalardan snapshot yozadi (tmp + os.replace). Natija: manba -> qatorlar soni."""
+    strings: Dict[str, int] = {}
+    parsed: Dict[str, List[List[Any]]] = {}
+    stats: Dict[str, Dict[str, int]] = {}
+    for name, path in sources.items():
+        st = os.stat(path) if os.path.exists(path) else None
+        parsed[name] = _read_rows(path)
+        stats[name] = {"mtime_ns": st.st_mtime_ns if st else -1, "size": st.st_size if st else -1}
+
+    # tavsiflar siqilgan blobga (bir xil matn bitta yozuv), qolganlari satrlar jadvaliga
+    samples = [row[1 + _DESC_COL] for rows in parsed.values() for row in rows[:500]]
+    blobs = BlobWriter(train_dictionary(samples) if use_dict else b"")
+    descriptions: Dict[str, int] = {}
+    for rows in parsed.values():
+        for row in rows:
+            for col, value in enumerate(row[1:]):
+                if col == _DESC_COL:
+                    if value not in descriptions:
+                        descriptions[value] = blobs.add(value)
+                else:
+                    strings.setdefault(value, len(strings))
+
+    body = bytearray()
+    str_offsets = array("Q", [0])
+    data = bytearray()
+    for value in strings:
+        data.extend(value.encode("utf-8"))
+        str_offsets.append(len(data))
+    meta: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "built_at": int(time.time()),
+        "strings": {"count": len(strings)},
+        "sources": {},
+    }
+    # offsetlar header+meta dan keyingi body boshiga nisbatan
+    meta["strings"]["offsets"] = _align(body)
+    body.extend(str_offsets.tobytes())
+    meta["strings"]["data"] = _align(body)
+    body.extend(data)
+    meta["descriptions"] = {"count": len(descriptions), "dict_len": len(blobs.zdict), "blob_len": len(blobs.blob)}
+    meta["descriptions"]["dict"] = _align(body)
+    body.extend(blobs.zdict)
+    meta["descriptions"]["offsets"] = _align(body)
+    body.extend(blobs.offsets.tobytes())
+    meta["descriptions"]["blob"] = _align(body)
+    body.extend(blobs.blob)
+
+    for name, rows in parsed.items():
+        info = {"file": os.path.basename(sources[name]), "count": len(rows), **stats[name]}
+        info["records"] = _align(body)
+        for row in rows:
+            refs = [descriptions[v] if col == _DESC_COL else strings[v] for col, v in enumerate(row[1:])]
+            body.extend(_RECORD.pack(row[0], *refs))
+        order = sorted(range(len(rows)), key=lambda i: rows[i][0])
+        info["ids"] = _align(body)
+        body.extend(array("q", [rows[i][0] for i in order]).tobytes())
+        info["id_rows"] = _align(body)
+        body.extend(array("I", order).tobytes())
+        info["hashes"] = _align(body)
+        body.extend(array("Q", [row_hash(dict(zip(FIELDS, row[1:]))) for row in rows]).tobytes())
+        meta["sources"][name] = info
+
+    meta_bytes = bytearray(json.dumps(meta).encode("utf-8"))
+    meta_bytes.extend(b" " * (-(len(meta_bytes) + _HEADER.size) % 8))
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(body)
+    os.replace(tmp, out_path)
+    return {name: len(rows) for name, rows in parsed.items()}
+
+
+# ------------------ Load ------------------
+class SnapshotReader:
+    """
+    Snapshotni mmap orqali ochadi: yuklash faqat header va meta JSON ni
+    o'qishdan iborat, yozuvlar va satrlar kerak bo'lganda fayldan olinadi.
+    """
+
+    def __init__(self, path: str, cache_size: int = 256, cache_rows: bool = True):
+        self.path = path
+        self.cache_rows = cache_rows
+        with open(path, "rb") as f:
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+        magic, version, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f"unsupported snapshot format: {magic!r} v{version}")
+        self.meta = json.loads(bytes(self._mm[_HEADER.size:_HEADER.size + meta_len]))
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise SnapshotError("snapshot was built on a different byte order")
+        self._base = _HEADER.size + meta_len
+        view = memoryview(self._mm)
+        count = self.meta["strings"]["count"]
+        start = self._base + self.meta["strings"]["offsets"]
+        self._str_offsets = view[start:start + 8 * (count + 1)].cast("Q")
+        self._str_data = self._base + self.meta["strings"]["data"]
+        desc = self.meta["descriptions"]
+        dict_at, offsets_at, blob_at = (self._base + desc[k] for k in ("dict", "offsets", "blob"))
+        self.descriptions = DescriptionBlobStore(
+            view[blob_at:blob_at + desc["blob_len"]],
+            view[offsets_at:offsets_at + 8 * (desc["count"] + 1)].cast("Q"),
+            zdict=view[dict_at:dict_at + desc["dict_len"]],
+            cache_size=cache_size,
+        )
+        self._jobs: Dict[str, SnapshotJobs] = {}
+
+    def string(self, idx: int) -> str:
+        lo, hi = self._str_offsets[idx], self._str_offsets[idx + 1]
+        return self._mm[self._str_data + lo:self._str_data + hi].decode("utf-8")
+
+    def description(self, idx: int, _length: int = 0) -> str:
+        # siqilgan blobdan, oldida LRU (kartochka ochilishi tez qolishi uchun)
+        return self.descriptions.get(idx)
+
+    def description_uncached(self, idx: int, _length: int = 0) -> str:
+        # kartochka LRU siga yozilmaydi (tavsif bu yerda allaqachon normalizatsiya qilingan)
+        return self.descriptions.get_uncached(idx)
+
+    def source_for_path(self, path: str) -> Optional[str]:
+        """Manba nomi, agar snapshotdagi nusxa CSV fayl bilan bir xil bo'lsa; aks holda None."""
+        base = os.path.basename(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        for name, info in self.meta["sources"].items():
+            if info["file"] == base:
+                if info["mtime_ns"] == st.st_mtime_ns and info["size"] == st.st_size:
+                    return name
+                return None
+        return None
+
+    def jobs(self, name: str) -> "SnapshotJobs":
+        if name not in self._jobs:
+            self._jobs[name] = SnapshotJobs(self, self.meta["sources"][name], cache_rows=self.cache_rows)
+        return self._jobs[name]
+
+    def jobs_for_path(self, path: str) -> Optional["SnapshotJobs"]:
+        name = self.source_for_path(path)
+        return self.jobs(name) if name else None
+
+
+class SnapshotJobs(Sequence):
+    """
+    Bitta manbaning yozuvlari; qatorlar murojaatda LazyJob sifatida yaratiladi.
+    cache_rows=False bo'lsa yaratilgan qatorlar saqlanmaydi — jarayonning
+    xususiy xotirasi o'smaydi (umumiy katalogdagi workerlar uchun).
+    """
+
+    def __init__(self, reader: SnapshotReader, info: Dict[str, Any], cache_rows: bool = True):
+        self._reader = reader
+        self._count = info["count"]
+        self._records = reader._base + info["records"]
+        view = memoryview(reader._mm)
+        ids = reader._base + info["ids"]
+        rows = reader._base + info["id_rows"]
+        self._ids = view[ids:ids + 8 * self._count].cast("q")
+        self._id_rows = view[rows:rows + 4 * self._count].cast("I")
+        hashes = reader._base + info["hashes"]
+        self._hashes = view[hashes:hashes + 8 * self._count].cast("Q")
+        self._rows: Optional[List[Optional[LazyJob]]] = [None] * self._count if cache_rows else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("SnapshotJobs index out of range")
+        if self._rows is None:
+            return self._materialize(index)
+        job = self._rows[index]
+        if job is None:
+            job = self._rows[index] = self._materialize(index)
+        return job
+
+    def job_ids(self) -> List[int]:
+        """job_id lar CSV tartibida — qatorlarni yaratmasdan (diff_catalog uchun)."""
+        end = self._records + self._count * _RECORD.size
+        return [values[0] for values in _RECORD.iter_unpack(self._reader._mm[self._records:end])]
+
+    def row_hashes(self) -> Sequence:
+        """build_catalog yozgan kontent xeshlari, CSV tartibida."""
+        return self._hashes
+
+    def hashes(self) -> "RowHashes":
+        """job_id -> kontent xeshi, mmap ustida (workerlar o'z lug'atini qurmaydi)."""
+        return RowHashes(self._ids, self._id_rows, self._hashes)
+
+    def get_by_id(self, job_id: int) -> Optional[Dict[str, Any]]:
+        pos = bisect.bisect_left(self._ids, job_id)
+        if pos < self._count and self._ids[pos] == job_id:
+            return self[self._id_rows[pos]]
+        return None
+
+    def _materialize(self, index: int) -> LazyJob:
+        values = _RECORD.unpack_from(self._reader._mm, self._records + index * _RECORD.size)
+        job = LazyJob(job_id=values[0])
+        for col, (name, idx) in enumerate(zip(FIELDS, values[1:])):
+            if col != _DESC_COL:
+                job[name] = self._reader.string(idx)
+        job._store, job._offset, job._length = self._reader, values[1 + _DESC_COL], 0
+        return job
+
+
+class RowHashes(Mapping):
+    """
+    diff_catalog dagi `hashes` lug'ati o'rnida: job_id bo'yicha saralangan
+    indeks orqali qidiradi. Takrorlangan id dan birinchisi (CSV tartibida) olinadi.
+    """
+
+    def __init__(self, ids, id_rows, hashes):
+        self._ids = ids
+        self._id_rows = id_rows
+        self._hashes = hashes
+        self._len: Optional[int] = None
+
+    def __getitem__(self, job_id: int) -> int:
+        pos = bisect.bisect_left(self._ids, job_id)
+        if pos < len(self._ids) and self._ids[pos] == job_id:
+            return self._hashes[self._id_rows[pos]]
+        raise KeyError(job_id)
+
+    def __iter__(self):
+        previous = None
+        for job_id in self._ids:
+            if job_id != previous:
+                yield job_id
+                previous = job_id
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self)
+        return self._len
+
+
+def open_snapshot(path: str, cache_size: int = 256, cache_rows: bool = True) -> Optional[SnapshotReader]:
+    """Snapshot mavjud va yaroqli bo'lsa — SnapshotReader, aks holda None (CSV ga qaytiladi)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return SnapshotReader(path, cache_size=cache_size, cache_rows=cache_rows)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# ------------------ CLI ------------------
+def default_sources() -> Dict[str, str]:
+    from config import JOBS_CSV
+    from sources import SOURCES
+    return {"jobs": JOBS_CSV, **SOURCES.paths()}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from config import CATALOG_SNAPSHOT
+
+    parser = argparse.ArgumentParser(prog="snapshot.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-catalog", help="data/*.csv dan binar snapshot yasash")
+    build.add_argument("--out", default=CATALOG_SNAPSHOT)
+    build.add_argument("--no-dict", action="store_true", help="zlib lug'atisiz siqish")
+    args = parser.parse_args(argv)
+
+    if args.command == "build-catalog":
+        sources = default_sources()
+        started = time.perf_counter()
+        counts = build_catalog(sources, args.out, use_dict=not args.no_dict)
+        took = time.perf_counter() - started
+        print(f"{args.out}: {sum(counts.values())} rows {counts} in {took:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# sources.py
+"""
+Ish manbalari reyestri. Har bir manba bitta deskriptor: nom (callback va kesh
+kaliti), tugma matni va CSV fayl yo'li. Katalog (load_jobs), manba tanlash
+klaviaturasi, snapshot va fetcherlar shu ro'yxatdan foydalanadi — yangi manba
+qo'shish uchun bitta register() chaqiruvi yetarli.
+"""
+from typing import Dict, Iterator, List, Optional
+
+
+class JobSource:
+    __slots__ = ("name", "label", "path")
+
+    def __init__(self, name: str, label: str, path: str):
+        self.name = name
+        self.label = label
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"JobSource({self.name!r}, {self.path!r})"
+
+
+class SourceRegistry:
+    def __init__(self):
+        self._sources: Dict[str, JobSource] = {}
+
+    def register(self, name: str, label: str, path: str) -> JobSource:
+        if name == "all" or ":" in name:
+            raise ValueError(f"invalid source name: {name!r}")
+        source = self._sources[name] = JobSource(name, label, path)
+        return source
+
+    def unregister(self, name: str) -> None:
+        self._sources.pop(name, None)
+
+    def get(self, name: Optional[str]) -> Optional[JobSource]:
+        return self._sources.get(name) if name else None
+
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+    def paths(self) -> Dict[str, str]:
+        return {s.name: s.path for s in self._sources.values()}
+
+    def __iter__(self) -> Iterator[JobSource]:
+        return iter(list(self._sources.values()))
+
+    def __contains__(self, name) -> bool:
+        return name in self._sources
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+def default_registry() -> SourceRegistry:
+    from config import HH_CSV, LINKEDIN_CSV, OLX_CSV, ISHUZ_CSV
+    registry = SourceRegistry()
+    registry.register("hh", "🔸 Hh.uz", HH_CSV)
+    registry.register("linkedin", "🔸 LinkedIn", LINKEDIN_CSV)
+    registry.register("olx", "🔸 Olx.uz", OLX_CSV)
+    registry.register("ishuz", "🔸 Ish.UZ", ISHUZ_CSV)
+    return registry
+
+
+SOURCES = default_registry()
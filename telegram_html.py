@@ -0,0 +1,164 @@
+# telegram_html.py
+import html
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Telegram xabar limiti 4096 belgi (entitilar ajratilgandan keyin). Kartochkada
+# nom/kompaniya/havola ham bor, shuning uchun tavsifga biroz kamroq joy qoladi.
+MESSAGE_LIMIT = 4096
+DESCRIPTION_LIMIT = 3500
+ELLIPSIS = "…"
+
+# manba teg -> Telegram tegi
+_INLINE = {
+    "b": "b", "strong": "b",
+    "i": "i", "em": "i",
+    "u": "u", "ins": "u",
+    "s": "s", "strike": "s", "del": "s",
+    "code": "code", "pre": "pre",
+    "blockquote": "blockquote",
+    "tg-spoiler": "tg-spoiler",
+}
+_HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_BLOCKS = {"p", "div", "ul", "ol", "table", "tr", "section", "article", "header", "footer"} | _HEADINGS
+_SKIP = {"script", "style", "head", "title"}
+_SAFE_SCHEMES = ("http://", "https://", "tg://", "mailto:")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class _TelegramHTMLConverter(HTMLParser):
+    """
+    Bir o'tishda: ruxsat etilgan teglar Telegram shakliga o'tkaziladi,
+    qolganlari tashlanadi (matni escape qilinib qoladi), bo'shliqlar
+    siqiladi va ko'rinadigan matn `limit` da kesiladi (ochiq teglar yopiladi).
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.out: List[str] = []
+        self.stack: List[Tuple[str, str]] = []  # (manba teg, telegram teg)
+        self.visible = 0
+        self.newlines = 2  # boshida bo'sh qatorlar chiqmasin
+        self.space = False
+        self.skip = 0
+        self.pre = 0
+        self.truncated = False
+
+    # ------------------ Output helpers ------------------
+    def _emit_text(self, text: str) -> None:
+        if self.truncated or not text:
+            return
+        room = self.limit - self.visible
+        if len(text) > room:
+            text = text[:max(0, room - len(ELLIPSIS))].rstrip() + ELLIPSIS
+            self.truncated = True
+        self.out.append(html.escape(text, quote=False))
+        self.visible += len(text)
+        stripped = text.rstrip("\n")
+        self.newlines = (self.newlines if not stripped else 0) + len(text) - len(stripped)
+
+    def _newline(self, count: int = 1) -> None:
+        # ketma-ket bo'sh qatorlar 2 tadan oshmaydi
+        while self.newlines < count and not self.truncated:
+            self._emit_text("\n")
+        self.space = False
+
+    def _open(self, src: str, tg: str, attrs: str = "") -> None:
+        if self.truncated:
+            return
+        self.out.append(f"<{tg}{attrs}>")
+        self.stack.append((src, tg))
+
+    def _close(self, src: str) -> None:
+        if not any(s == src for s, _ in self.stack):
+            return
+        while self.stack:
+            s, tg = self.stack.pop()
+            self.out.append(f"</{tg}>")
+            if s == src:
+                break
+
+    # ------------------ HTMLParser hooks ------------------
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in _SKIP:
+            self.skip += 1
+            return
+        if self.skip:
+            return
+        attrs = dict(attrs)
+        if tag == "br":
+            self._newline(1)
+        elif tag == "li":
+            self._newline(1)
+            self._emit_text("• ")
+            self.space = False
+        elif tag in _BLOCKS:
+            self._newline(2)
+            if tag in _HEADINGS:
+                self._open(tag, "b")
+        elif tag == "a":
+            href = (attrs.get("href") or "").strip()
+            if href.lower().startswith(_SAFE_SCHEMES):
+                self._open(tag, "a", f' href="{html.escape(href, quote=True)}"')
+        elif tag == "span" and "tg-spoiler" in (attrs.get("class") or ""):
+            self._open(tag, "tg-spoiler")
+        elif tag in _INLINE:
+            if tag == "pre":
+                self._newline(1)
+                self.pre += 1
+            self._open(tag, _INLINE[tag])
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        if tag == "br" and not self.skip:
+            self._newline(1)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP:
+            self.skip = max(0, self.skip - 1)
+            return
+        if self.skip:
+            return
+        if tag in _BLOCKS:
+            self._close(tag)
+            self._newline(2)
+        elif tag == "li":
+            self._newline(1)
+        else:
+            if tag == "pre" and self.pre:
+                self.pre -= 1
+            self._close(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self.skip or self.truncated:
+            return
+        if self.pre:
+            self._emit_text(data)
+            self.space = False
+            return
+        text = _SPACE_RE.sub(" ", data)
+        if text.startswith(" "):
+            self.space = True
+            text = text.lstrip(" ")
+        if not text:
+            return
+        if self.space and self.newlines == 0 and self.visible:
+            text = " " + text
+        self.space = text.endswith(" ")
+        self._emit_text(text.rstrip(" "))
+
+    def result(self) -> str:
+        self.close()
+        while self.stack:
+            self.out.append(f"</{self.stack.pop()[1]}>")
+        return "".join(self.out).strip()
+
+
+def to_telegram_html(source: Optional[str], limit: int = DESCRIPTION_LIMIT) -> str:
+    """HTML -> Telegram parse_mode=HTML uchun xavfsiz matn (ingest paytida bir marta)."""
+    if not source:
+        return ""
+    conv = _TelegramHTMLConverter(limit)
+    conv.feed(source)
+    return conv.result()
@@ -0,0 +1,82 @@
+# tests/test_alerts.py
+import asyncio
+
+from alerts import (
+    MAX_JOBS_PER_ALERT, AlertQueue, SubscriptionIndex, describe_subscription, parse_subscription,
+)
+
+SOURCES = ("hh", "olx")
+
+
+def job(name, skills="", location="Tashkent", description="<b>Remote</b> team"):
+    return {"name": name, "skills": skills, "location": location, "description_html": description}
+
+
+def test_parse_and_describe_subscription():
+    sub = parse_subscription("python skill:machine_learning loc:tashkent src:hh", SOURCES)
+    assert sub == {"keywords": ["python"], "skills": ["machine learning"], "location": "tashkent", "source": "hh"}
+    assert describe_subscription(sub) == "python skill:machine learning loc:tashkent src:hh"
+    assert parse_subscription("python src:unknown", SOURCES) is None
+    assert parse_subscription("", SOURCES) is None
+
+
+def test_match_requires_every_term():
+    index = SubscriptionIndex()
+    index.add("1:a", 1, parse_subscription("python loc:tashkent", SOURCES))
+    index.add("2:a", 2, parse_subscription("python skill:django", SOURCES))
+    index.add("3:a", 3, parse_subscription("remote src:olx", SOURCES))
+    assert index.match(job("Python developer", skills="Django; SQL"), "hh") == {1, 2}
+    assert index.match(job("Python developer", location="Samarkand"), "hh") == set()
+    # HTML teglari so'z sifatida olinmaydi, tavsif matni olinadi
+    assert index.match(job("Designer"), "olx") == {3}
+    assert index.match(job("Designer", description="<remote>"), "olx") == set()
+
+
+def test_remove_and_replace_subscription():
+    index = SubscriptionIndex()
+    index.add("1:a", 1, parse_subscription("python", SOURCES))
+    index.add("1:a", 1, parse_subscription("golang", SOURCES))
+    assert index.match(job("Python developer"), "hh") == set()
+    assert index.match(job("Golang developer"), "hh") == {1}
+    index.remove("1:a")
+    assert len(index) == 0 and not index._index
+
+
+def test_load_from_users():
+    index = SubscriptionIndex()
+    index.load({"1": {"tg_id": 1, "subscriptions": [{"id": "a", "keywords": ["python"]}]},
+                "2": {"tg_id": 2}})
+    assert index.match(job("Python developer"), None) == {1}
+
+
+def test_queue_groups_matches_per_user_and_keeps_going_after_errors():
+    index = SubscriptionIndex()
+    index.add("1:a", 1, parse_subscription("python", SOURCES))
+    index.add("2:a", 2, parse_subscription("golang", SOURCES))
+    jobs = [job(f"Python developer {i}") for i in range(MAX_JOBS_PER_ALERT + 2)] + [job("Golang developer")]
+    sent = {}
+
+    async def send(tg_id, matched):
+        if tg_id == 1:
+            raise RuntimeError("blocked")
+        sent[tg_id] = matched
+
+    async def scenario():
+        queue = AlertQueue()
+        assert queue.push_matches(index, jobs, "hh") == 2
+        consumer = asyncio.create_task(queue.run(send, pause=0))
+        await queue._queue.join()
+        consumer.cancel()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert [j["name"] for j in sent[2]] == ["Golang developer"]
+    assert queue.stats == {"queued": 2, "sent": 1, "failed": 1, "dropped": 0}
+
+
+def test_full_queue_drops():
+    async def scenario():
+        queue = AlertQueue(maxsize=1)
+        return queue.push(1, []), queue.push(2, []), queue.stats["dropped"]
+
+    assert asyncio.run(scenario()) == (True, False, 1)
@@ -0,0 +1,42 @@
+# tests/test_blobstore.py
+from blobstore import MAX_DICT_SIZE, BlobWriter, DescriptionBlobStore, train_dictionary
+
+TEXTS = [
+    "<b>Talablar:</b> Python, SQL va Django bilan ishlash tajribasi",
+    "<b>Talablar:</b> Go va PostgreSQL bilan ishlash tajribasi",
+    "",
+    "Ish joyi: Toshkent shahri, to'liq stavka — ўзбекча ва русча матн",
+]
+
+
+def make_store(zdict=b"", cache_size=2):
+    writer = BlobWriter(zdict)
+    ids = [writer.add(text) for text in TEXTS]
+    assert ids == list(range(len(TEXTS)))
+    return DescriptionBlobStore(memoryview(bytes(writer.blob)), writer.offsets, zdict=zdict, cache_size=cache_size)
+
+
+def test_round_trip_with_and_without_a_dictionary():
+    zdict = train_dictionary(TEXTS * 3)
+    assert 0 < len(zdict) <= MAX_DICT_SIZE
+    for store in (make_store(), make_store(zdict)):
+        assert len(store) == len(TEXTS)
+        assert [store.get(i) for i in range(len(TEXTS))] == TEXTS
+
+
+def test_lru_stays_within_cache_size():
+    store = make_store(cache_size=2)
+    for idx in (0, 1, 0, 3):
+        store.get(idx)
+    assert list(store._cache) == [0, 3]
+    assert (store.hits, store.misses) == (1, 3)
+    assert make_store(cache_size=0).get(1) == TEXTS[1]
+
+
+def test_get_uncached_does_not_touch_the_lru_or_counters():
+    store = make_store(cache_size=2)
+    store.get(0)
+    assert store.get_uncached(1) == TEXTS[1]
+    assert store.get_uncached(0) == TEXTS[0]
+    assert list(store._cache) == [0]
+    assert (store.hits, store.misses) == (0, 1)
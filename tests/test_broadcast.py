@@ -0,0 +1,58 @@
+# tests/test_broadcast.py
+import asyncio
+import json
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from broadcast import MAX_ROUNDS, BroadcastEngine, fake_session
+
+
+def make_engine(tmp_path, blocked=()):
+    session = fake_session(rate=1000, blocked=blocked, latency=0)
+    bot = Bot(token="42:TEST", session=session)
+    return BroadcastEngine(bot, str(tmp_path), rate=1000, chat_interval=0, group_interval=0), session
+
+
+def write_log(engine, job_id, rows):
+    with open(engine._log_path(job_id), "a", encoding="utf-8") as f:
+        for chat_id, status in rows:
+            f.write(json.dumps({"chat_id": chat_id, "status": status, "at": 0}) + "\n")
+        # oldingi jarayon shu qatorni yozib ulgurmay to'xtagan
+        f.write('{"chat_id": 5, "sta')
+
+
+def test_resume_skips_delivered_and_retries_errors(tmp_path):
+    engine, session = make_engine(tmp_path, blocked={4})
+    job_id = engine.create("Salom", [1, 2, 3, 4, 5, 2])
+    assert engine.load(job_id)["recipients"] == [1, 2, 3, 4, 5]
+    write_log(engine, job_id, [(1, "ok"), (2, "error: timeout"), (3, "blocked")])
+    assert engine.job_ids(unfinished=True) == [job_id]
+
+    summary = asyncio.run(engine.process(job_id))
+    assert sorted(session.sent) == [2, 5]
+    assert engine.results(job_id) == {1: "ok", 2: "ok", 3: "blocked", 4: "blocked", 5: "ok"}
+    assert summary == {"id": job_id, "total": 5, "finished": True, "ok": 3, "blocked": 2}
+    assert engine.job_ids(unfinished=True) == []
+
+    # qayta ishga tushirish hech kimga ikkinchi marta yubormaydi
+    asyncio.run(engine.process(job_id))
+    assert sorted(session.sent) == [2, 5]
+
+
+def test_transient_errors_keep_the_job_open_until_max_rounds(tmp_path):
+    engine, session = make_engine(tmp_path)
+    job_id = engine.create("Salom", [1, 2])
+
+    async def flaky_send(chat_id, text, **kwargs):
+        if chat_id == 2:
+            raise TelegramAPIError(method=None, message="server busy")
+        session.sent.append(chat_id)
+
+    engine.send = flaky_send
+    for round_no in range(1, MAX_ROUNDS + 1):
+        summary = asyncio.run(engine.process(job_id))
+        assert engine.load(job_id)["rounds"] == round_no
+        assert summary["finished"] == (round_no == MAX_ROUNDS)
+    assert session.sent == [1]
+    assert engine.results(job_id) == {1: "ok", 2: "error: server busy"}
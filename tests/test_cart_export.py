@@ -0,0 +1,41 @@
+# tests/test_cart_export.py
+import csv
+import io
+
+from cart_export import EXPORT_FIELDS, csv_cell, export_cart, safe_link
+
+ROWS = [
+    ("=HYPERLINK(\"http://evil\")", "Acme", "Toshkent", "https://hh.uz/vacancy/1"),
+    ("<b>Go</b> dev", "O'zbek & Co", "-", "javascript:alert(1)"),
+    ("Ишчи", "", "", ""),
+]
+
+
+def test_csv_cell_neutralizes_formulas():
+    assert [csv_cell(v) for v in ("=1+1", "+7", "-2", "@SUM", "\tx", "dev", "", None)] == \
+        ["'=1+1", "'+7", "'-2", "'@SUM", "'\tx", "dev", "", ""]
+
+
+def test_safe_link_keeps_only_http():
+    assert safe_link(" https://hh.uz/v/1 ") == "https://hh.uz/v/1"
+    assert safe_link("HTTP://a.uz") == "HTTP://a.uz"
+    assert [safe_link(v) for v in ("javascript:alert(1)", "data:text/html,x", "/relative", "", None)] == [""] * 5
+
+
+def test_csv_export_round_trips_through_excel_bom():
+    data, count = export_cart(iter(ROWS), "csv")
+    assert count == 3 and data.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert rows[1][0] == "'=HYPERLINK(\"http://evil\")" and rows[2][2] == "'-"
+    assert rows[3] == ["Ишчи", "", "", ""]
+
+
+def test_html_export_escapes_and_drops_unsafe_links():
+    data, count = export_cart(iter(ROWS), "html", title="Savat <1>")
+    text = data.decode("utf-8")
+    assert count == 3 and "<title>Savat &lt;1&gt;</title>" in text
+    assert '<a href="https://hh.uz/vacancy/1">' in text
+    assert "&lt;b&gt;Go&lt;/b&gt; dev" in text and "O&#x27;zbek &amp; Co" in text
+    assert 'href="javascript' not in text and "<td>javascript:alert(1)</td>" in text
+    assert export_cart([], "html")[1] == 0
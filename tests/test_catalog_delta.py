@@ -0,0 +1,64 @@
+# tests/test_catalog_delta.py
+import csv
+
+from catalog_delta import CatalogDelta, diff_catalog, load_csv_catalog, row_hash
+from csv_stream import stream_jobs_csv
+
+
+def job(jid, name="dev", description="<p>Tavsif</p>"):
+    return {"job_id": jid, "name": name, "company": "Acme", "location": "",
+            "skills": "", "description_html": description, "link": f"https://a/{jid}"}
+
+
+def test_insert_update_delete():
+    old = [job(1), job(2), job(3)]
+    _, previous = diff_catalog({}, old)
+    new = [job(1), job(2, name="senior dev"), job(4)]
+    delta, hashes = diff_catalog(previous, new)
+    assert [j["job_id"] for j in delta.inserted] == [4]
+    assert [j["job_id"] for j in delta.updated] == [2]
+    assert delta.deleted == [3]
+    assert [j["job_id"] for j in delta.changed] == [4, 2] and len(delta) == 3
+    assert hashes == {j["job_id"]: row_hash(j) for j in new}
+    assert len(diff_catalog(hashes, new)[0]) == 0
+
+
+def test_first_duplicate_wins():
+    delta, hashes = diff_catalog({}, [job(1), job(1, name="dublikat")])
+    assert [j["name"] for j in delta.inserted] == ["dev"]
+    assert hashes == {1: row_hash(job(1))}
+
+
+def test_precomputed_hashes_and_ids_only_touch_changed_rows():
+    new = [job(1), job(2, description="<p>Yangi</p>"), job(5)]
+    _, previous = diff_catalog({}, [job(1), job(2), job(3)])
+    touched = []
+
+    class Rows(list):
+        def __getitem__(self, i):
+            touched.append(i)
+            return list.__getitem__(self, i)
+
+        def __iter__(self):
+            raise AssertionError("fast path must not iterate over the rows")
+
+    rows = Rows(new)
+    delta, hashes = diff_catalog(previous, rows, row_hashes=[row_hash(j) for j in new],
+                                 job_ids=[j["job_id"] for j in new])
+    assert sorted(touched) == [1, 2]
+    assert [j["job_id"] for j in delta.inserted] == [5]
+    assert [j["job_id"] for j in delta.updated] == [2]
+    assert delta.deleted == [3]
+    assert hashes == diff_catalog(previous, new)[1]
+
+
+def test_stream_and_full_read_hash_the_same(tmp_path):
+    path = str(tmp_path / "jobs.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["job_id", "name", "company", "location", "skills", "description_html", "link"])
+        w.writerow([1, "dev", "Acme", "", "", "<div><p>Tavsif</p></div>", "https://a/1"])
+        w.writerow([2, "qa", "Beta", "", "", "", "https://a/2"])
+    jobs, hashes, _ = load_csv_catalog(path)
+    assert [row_hash(j) for j in stream_jobs_csv(path)] == hashes
+    assert repr(diff_catalog(dict(zip([1, 2], hashes)), jobs)[0]) == repr(CatalogDelta())
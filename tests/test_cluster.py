@@ -0,0 +1,88 @@
+# tests/test_cluster.py
+import asyncio
+import json
+import os
+import zlib
+
+from cluster import Front, build_user_shard, read_frame, shard_of, shard_path, update_user_id
+
+
+def test_shard_of_is_stable_and_spreads_users():
+    # crc32 — jarayonlar orasida bir xil (hash() PYTHONHASHSEED ga bog'liq)
+    assert [shard_of(uid, 4) for uid in (1, 42, 123456789)] == [
+        zlib.crc32(str(uid).encode()) % 4 for uid in (1, 42, 123456789)
+    ]
+    counts = [0] * 4
+    for uid in range(10000):
+        counts[shard_of(uid, 4)] += 1
+    assert all(2000 < c < 3000 for c in counts)
+    assert {shard_of(uid, 1) for uid in range(100)} == {0}
+
+
+def test_update_user_id():
+    user = {"id": 7, "is_bot": False, "first_name": "A"}
+    assert update_user_id({"update_id": 1, "message": {"message_id": 1, "from": user, "chat": {"id": -100}}}) == 7
+    assert update_user_id({"update_id": 2, "callback_query": {"id": "x", "from": user}}) == 7
+    # kanal a'zoligi: o'zgartirgan admin emas, a'zo bo'lgan foydalanuvchi
+    assert update_user_id({"update_id": 3, "chat_member": {
+        "chat": {"id": -100}, "from": {"id": 1},
+        "new_chat_member": {"status": "member", "user": user},
+    }}) == 7
+    assert update_user_id({"update_id": 4, "channel_post": {"message_id": 1, "chat": {"id": -100}}}) == -100
+    assert update_user_id({"update_id": 5}) is None
+
+
+def test_shard_path_and_build_user_shard(tmp_path):
+    path = str(tmp_path / "users.json")
+    assert shard_path(path, 0, 1) == path
+    assert shard_path(path, 1, 3) == str(tmp_path / "users.1of3.json")
+    users = {str(uid): {"tg_id": uid, "lang": "uz"} for uid in range(1, 30)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(users, f)
+    shards = []
+    for shard in range(3):
+        with open(build_user_shard(path, shard, 3), encoding="utf-8") as f:
+            shards.append(json.load(f))
+    assert sorted(k for s in shards for k in s) == sorted(users)
+    assert all(shard_of(int(k), 3) == i for i, s in enumerate(shards) for k in s)
+
+    # N o'zgarganda eski bo'laklar (asl fayldan yangiroq) birlashtiriladi
+    shards[0][next(iter(shards[0]))]["lang"] = "ru"
+    with open(shard_path(path, 0, 3), "w", encoding="utf-8") as f:
+        json.dump(shards[0], f)
+    merged = {}
+    for shard in range(2):
+        with open(build_user_shard(path, shard, 2), encoding="utf-8") as f:
+            merged.update(json.load(f))
+    assert merged == {**users, **shards[0]}
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+
+
+def test_front_routes_each_user_to_one_worker(tmp_path):
+    async def scenario():
+        received = [[], []]
+
+        def serve(shard):
+            async def on_connection(reader, writer):
+                while (frame := await read_frame(reader)) is not None:
+                    received[shard].append(json.loads(frame)["update_id"])
+            return asyncio.start_unix_server(on_connection, str(tmp_path / f"w{shard}.sock"))
+
+        servers = [await serve(0), await serve(1)]
+        front = Front([str(tmp_path / "w0.sock"), str(tmp_path / "w1.sock")], connect_timeout=1)
+        updates = [{"update_id": i, "message": {"from": {"id": 100 + i % 5}, "chat": {"id": 1}}}
+                   for i in range(20)]
+        shards = [await front.route(json.dumps(u).encode()) for u in updates]
+        await asyncio.sleep(0.05)
+        await front.close()
+        for server in servers:
+            server.close()
+        return updates, shards, received, front.routed
+
+    updates, shards, received, routed = asyncio.run(scenario())
+    for update, shard in zip(updates, shards):
+        assert shard == shard_of(update["message"]["from"]["id"], 2)
+        assert update["update_id"] in received[shard]
+    # har bir ishchida kelgan tartib saqlanadi
+    assert all(r == sorted(r) for r in received)
+    assert routed == [len(r) for r in received]
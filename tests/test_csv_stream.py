@@ -0,0 +1,73 @@
+# tests/test_csv_stream.py
+import csv
+import gc
+
+from csv_stream import CsvRowStore, LazyJob, read_jobs_csv, stream_jobs_csv
+
+HEADER = ["job_id", "name", "company", "location", "skills", "description_html", "link"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        w.writerows(rows)
+
+
+def sample_rows():
+    return [
+        [1, "Python dev", "Acme", "Tashkent", "Python;SQL", "<p>Ko'p\nqatorli tavsif</p>", "https://a/1"],
+        [2, "Go dev", "Beta", "Samarkand", "Go", "<b>qisqa</b>", "https://a/2"],
+        ["x", "yaroqsiz", "", "", "", "", ""],
+        [3, "Java dev", "Acme", "Tashkent", "Java", "", "https://a/3"],
+    ]
+
+
+def test_stream_matches_full_read(tmp_path):
+    path = str(tmp_path / "jobs.csv")
+    write_csv(path, sample_rows())
+    streamed = stream_jobs_csv(path)
+    full = read_jobs_csv(path)
+    assert [j["job_id"] for j in streamed] == [1, 2, 3]
+    assert all(isinstance(j, LazyJob) for j in streamed)
+    for lazy, eager in zip(streamed, full):
+        assert {k: lazy[k] for k in eager} == eager
+        assert lazy.description_uncached() == eager["description_html"]
+
+
+def test_description_cache_is_bounded_and_uncached_read_does_not_fill_it(tmp_path):
+    path = str(tmp_path / "jobs.csv")
+    write_csv(path, sample_rows())
+    jobs = stream_jobs_csv(path, cache_size=1)
+    store = jobs[0]._store
+    jobs[0].description_uncached()
+    assert len(store._cache) == 0
+    jobs[0]["description_html"]
+    jobs[1]["description_html"]
+    assert list(store._cache) == [jobs[1]._offset]
+
+
+def test_store_closes_when_the_last_job_is_dropped(tmp_path):
+    path = str(tmp_path / "jobs.csv")
+    write_csv(path, sample_rows())
+    jobs = stream_jobs_csv(path)
+    store = jobs[0]._store
+    finalizer, f = store._finalizer, store._file
+    kept = jobs[1]
+    del store, jobs
+    gc.collect()
+    # eski ro'yxat tashlangan, lekin bitta nusxa hali o'qiy oladi
+    assert finalizer.alive and kept["description_html"] == "<b>qisqa</b>"
+    del kept
+    gc.collect()
+    assert not finalizer.alive and f.closed
+
+
+def test_close_is_idempotent(tmp_path):
+    path = str(tmp_path / "empty.csv")
+    open(path, "w").close()
+    store = CsvRowStore(path)
+    assert stream_jobs_csv(path, store=store) == []
+    store.close()
+    store.close()
+    assert store.closed
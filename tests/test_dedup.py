@@ -0,0 +1,61 @@
+# tests/test_dedup.py
+from catalog_delta import CatalogDelta
+from dedup import DedupIndex, estimate_similarity, minhash, signatures
+
+TEXT = ("Biz jamoamizga tajribali Python dasturchisini qidirmoqdamiz. Django, "
+        "PostgreSQL va Redis bilan ishlash, REST API loyihalash, kod sharhi va "
+        "testlar yozish talab qilinadi. Masofaviy ish mumkin.")
+
+
+def job(jid, name="Python dev", description=TEXT, link=""):
+    return {"job_id": jid, "name": name, "company": "Acme", "description_html": description,
+            "link": link or f"https://x/{jid}"}
+
+
+def canonical(index):
+    return {(j["source"], j["job_id"]): sorted((s["source"], s["job_id"]) for s in j["sources"])
+            for part in index.parts() for j in part}
+
+
+def test_minhash_is_stable_and_similarity_tracks_overlap():
+    a, b = job(1), job(2, description=TEXT + " Ofis Toshkentda.")
+    assert minhash(a) == minhash(dict(a))
+    assert estimate_similarity(minhash(a), minhash(b)) > 0.7
+    assert estimate_similarity(minhash(a), minhash(job(3, "Go dev", "Butunlay boshqa matn haqida"))) < 0.3
+    assert signatures([a, b]) == {1: minhash(a), 2: minhash(b)}
+
+
+def test_merge_across_sources_prefers_the_longest_description():
+    index = DedupIndex(["hh", "olx"])
+    index.apply("hh", CatalogDelta(inserted=[job(1), job(2, "Go dev", "Butunlay boshqa matn haqida")]))
+    longer = job(10, description=TEXT + " Qo'shimcha.")
+    index.apply("olx", CatalogDelta(inserted=[longer]), signatures([longer]))
+    assert canonical(index) == {
+        ("olx", 10): [("hh", 1), ("olx", 10)],
+        ("hh", 2): [("hh", 2)],
+    }
+    merged = [j for part in index.parts(["olx"]) for j in part][0]
+    assert [s["link"] for s in merged["sources"]] == ["https://x/1", "https://x/10"]
+    # kanonik nusxa — kiruvchi lug'at o'zgartirilmaydi
+    assert "source" not in longer
+
+
+def test_unmerge_on_update_and_delete():
+    index = DedupIndex(["hh", "olx"])
+    index.apply("hh", CatalogDelta(inserted=[job(1)]))
+    index.apply("olx", CatalogDelta(inserted=[job(10), job(11)]))
+    assert canonical(index) == {("hh", 1): [("hh", 1), ("olx", 10), ("olx", 11)]}
+
+    index.apply("olx", CatalogDelta(updated=[job(10, "Go dev", "Butunlay boshqa matn haqida")]))
+    assert canonical(index) == {
+        ("hh", 1): [("hh", 1), ("olx", 11)],
+        ("olx", 10): [("olx", 10)],
+    }
+
+    # bucket boshi o'chirilganda qolganlar yangi bosh orqali bog'lanib qoladi
+    index.apply("hh", CatalogDelta(deleted=[1]))
+    assert canonical(index) == {("olx", 11): [("olx", 11)], ("olx", 10): [("olx", 10)]}
+    index.apply("hh", CatalogDelta(inserted=[job(1)]))
+    index.apply("olx", CatalogDelta(inserted=[job(12)]))
+    index.apply("hh", CatalogDelta(deleted=[1]))
+    assert canonical(index)[("olx", 11)] == [("olx", 11), ("olx", 12)]
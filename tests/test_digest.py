@@ -0,0 +1,65 @@
+# tests/test_digest.py
+import asyncio
+
+from digest import DAY, DIGEST_PAGE_SIZE, MAX_DIGEST_ITEMS, DigestScheduler, user_bucket
+
+
+def test_add_dedups_and_caps_items():
+    digest = DigestScheduler(None)
+    digest.add(1, "hh", [5, 5, 6])
+    digest.add(1, "olx", [5])
+    assert [digest.unpack(p) for p in digest.pending[1]] == [("hh", 5), ("hh", 6), ("olx", 5)]
+    digest.add(2, "hh", range(MAX_DIGEST_ITEMS + 10))
+    assert len(digest.pending[2]) == MAX_DIGEST_ITEMS
+
+
+def test_page_is_clamped():
+    digest = DigestScheduler(None)
+    digest.add(1, "hh", range(DIGEST_PAGE_SIZE + 2))
+    digest.delivered[1] = digest.pending.pop(1)
+    items, total, pages = digest.page(1, 10)
+    assert (total, pages) == (DIGEST_PAGE_SIZE + 2, 2)
+    assert items == [("hh", DIGEST_PAGE_SIZE), ("hh", DIGEST_PAGE_SIZE + 1)]
+    assert digest.page(2, 0) == ([], 0, 1)
+
+
+def test_slots_follow_the_window_and_the_time_zone():
+    digest = DigestScheduler(None, start_hour=9, window=3600, buckets=4, tz_offset=5)
+    # 1970-01-02 00:00 UTC = 05:00 Toshkent; birinchi bo'lak 09:00 Toshkent = 04:00 UTC
+    ts, bucket = digest.next_slot(DAY)
+    assert (ts, bucket) == (DAY + 4 * 3600, 0)
+    digest.last_slot = ts
+    assert digest.next_slot(DAY) == (DAY + 4 * 3600 + 900, 1)
+
+
+def test_users_spread_over_buckets():
+    buckets = [user_bucket(tg_id, 60) for tg_id in range(100000, 106000)]
+    counts = [buckets.count(b) for b in range(60)]
+    assert min(counts) > 50 and max(counts) < 150
+
+
+def test_run_sends_due_bucket_and_persists(tmp_path):
+    path = str(tmp_path / "digest.json")
+    digest = DigestScheduler(path, start_hour=0, window=60, buckets=1)
+    digest.set_enabled(1, True)
+    digest.add(1, "hh", [7])
+    digest.add(2, "hh", [8])  # yoqilmagan
+    sent = []
+
+    async def send(tg_id):
+        sent.append(tg_id)
+
+    async def scenario():
+        # soat o'zgarmaydi: birinchi bo'lak darhol, keyingisi ertaga — bitta bo'lakdan keyin to'xtatiladi
+        task = asyncio.create_task(digest.run(send, pause=0, clock=lambda: DAY + 30))
+        while digest.stats["slots"] == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert sent == [1]
+    assert 1 not in digest.pending and 2 in digest.pending
+    reloaded = DigestScheduler(path)
+    assert reloaded.last_slot == DAY
+    assert reloaded.page(1, 0)[0] == [("hh", 7)]
@@ -0,0 +1,91 @@
+# tests/test_executor.py
+import asyncio
+
+from executor import UpdateExecutor
+
+
+def test_same_user_runs_in_order_and_others_in_parallel():
+    async def scenario():
+        ex = UpdateExecutor(concurrency=4, max_pending=100)
+        order = []
+        active = {"now": 0, "max": 0}
+
+        async def job(user, n):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.01)
+            order.append((user, n))
+            active["now"] -= 1
+
+        for n in range(5):
+            for user in range(3):
+                await ex.submit(user, lambda u=user, n=n: job(u, n))
+        assert await ex.drain(5)
+        return ex, order, active["max"]
+
+    ex, order, peak = asyncio.run(scenario())
+    for user in range(3):
+        assert [n for u, n in order if u == user] == list(range(5))
+    assert 1 < peak <= 3
+    assert ex.stats["processed"] == 15 and ex.depth == 0
+
+
+def test_submit_blocks_when_queue_is_full():
+    async def scenario():
+        ex = UpdateExecutor(concurrency=1, max_pending=2)
+        gate = asyncio.Event()
+        for _ in range(2):
+            await ex.submit(1, gate.wait)
+        blocked = asyncio.create_task(ex.submit(2, gate.wait))
+        await asyncio.sleep(0.02)
+        assert not blocked.done()
+        gate.set()
+        await blocked
+        assert await ex.drain(5)
+        return ex
+
+    ex = asyncio.run(scenario())
+    assert ex.stats["backpressure"] == 1 and ex.stats["processed"] == 3
+
+
+def test_failed_job_does_not_stop_the_queue():
+    async def scenario():
+        ex = UpdateExecutor()
+        done = []
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        async def ok():
+            done.append(True)
+
+        await ex.submit(1, boom)
+        await ex.submit(1, ok)
+        assert await ex.drain(5)
+        return ex, done
+
+    ex, done = asyncio.run(scenario())
+    assert done == [True]
+    assert ex.stats["failed"] == 1 and ex.stats["processed"] == 1
+
+
+def test_has_queued_tracks_targets_until_started():
+    async def scenario():
+        ex = UpdateExecutor(concurrency=1)
+        gate = asyncio.Event()
+        seen = []
+
+        async def job():
+            seen.append(ex.has_queued((1, 7)))
+            await gate.wait()
+
+        await ex.submit(1, job, target=(1, 7))
+        await ex.submit(1, job, target=(1, 7))
+        await asyncio.sleep(0.01)
+        gate.set()
+        assert await ex.drain(5)
+        return ex, seen
+
+    ex, seen = asyncio.run(scenario())
+    assert seen == [True, False]
+    assert not ex.has_queued((1, 7))
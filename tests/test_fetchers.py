@@ -0,0 +1,118 @@
+# tests/test_fetchers.py
+import asyncio
+import csv
+import os
+
+import pytest
+
+from fetchers import IshUzAdapter, _CardParser, make_recorded_app, record_key, run_ingest
+
+ISHUZ_PAGE = """
+<div class="vacancy-card" data-id="1">
+  <a href="/vacancy/101?utm_source=list"><h3 class="vacancy-card__title">Dev<br>Senior</h3></a>
+  <span>Remote only</span>
+  <div class="vacancy-card__company">MAAB <img src="logo.png"> Innovation</div>
+  <div class="vacancy-card__location">Tashkent</div>
+  <div class="vacancy-card__description"><p>Build <b>APIs</b></p></div>
+  <p>junk</p>
+</div>
+<div class="vacancy-card">
+  <a href="https://ish.uz/vacancy/102"></a>
+  <h3 class="vacancy-card__title">Analyst</h3>
+</div>
+"""
+
+
+def parse(html, base_url="https://ish.uz"):
+    parser = _CardParser(IshUzAdapter.card_class, IshUzAdapter.fields, base_url=base_url)
+    parser.feed(html)
+    return parser.finish()
+
+
+def test_void_elements_do_not_keep_a_field_open():
+    first, second = parse(ISHUZ_PAGE)
+    assert first["name"] == "Dev Senior"
+    assert first["company"] == "MAAB Innovation"
+    assert first["location"] == "Tashkent"
+    assert "junk" not in first["description_html"] and "Remote" not in first["name"]
+    assert second["name"] == "Analyst"
+
+
+def test_relative_links_are_made_absolute():
+    first, second = parse(ISHUZ_PAGE)
+    assert first["link"] == "https://ish.uz/vacancy/101"
+    assert second["link"] == "https://ish.uz/vacancy/102"
+
+
+def test_chunked_parse_matches_whole_body():
+    adapter = IshUzAdapter(pages=1)
+    body = ISHUZ_PAGE.encode("utf-8")
+
+    async def chunks():
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    assert asyncio.run(adapter.parse_chunks(chunks())) == list(adapter.parse(body))
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    directory = tmp_path / "recorded"
+    directory.mkdir()
+    for url in IshUzAdapter(pages=2).page_urls():
+        (directory / record_key(url)).write_text(ISHUZ_PAGE, encoding="utf-8")
+    return str(directory)
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+async def serve(directory):
+    from aiohttp import web
+
+    runner = web.AppRunner(make_recorded_app(directory))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_ingest_from_recorded_pages_and_revalidate(recorded, tmp_path):
+    out = str(tmp_path / "ishuz.csv")
+    cache = str(tmp_path / "fetch_cache.json")
+
+    async def scenario():
+        runner, base = await serve(recorded)
+        try:
+            first = await run_ingest([IshUzAdapter(base, pages=2)], {"ishuz": out}, cache_path=cache)
+            # ikkinchi marta ETag mos keladi — 304, qatorlar keshdan
+            second = await run_ingest([IshUzAdapter(base, pages=2)], {"ishuz": out}, cache_path=cache)
+        finally:
+            await runner.cleanup()
+        return base, first, second
+
+    base, first, second = asyncio.run(scenario())
+    # ikki sahifada bir xil kartochkalar — job_id bo'yicha takrorlar tashlanadi
+    assert first == second == {"ishuz": 2}
+    rows = read_rows(out)
+    assert [r["name"] for r in rows] == ["Dev Senior", "Analyst"]
+    assert rows[0]["link"] == base + "/vacancy/101"
+
+
+def test_failed_pages_keep_the_previous_csv(recorded, tmp_path):
+    out = tmp_path / "ishuz.csv"
+    out.write_text("job_id,name\n1,old\n", encoding="utf-8")
+    os.remove(os.path.join(recorded, record_key(IshUzAdapter(pages=2).page_urls()[1])))
+
+    async def scenario():
+        runner, base = await serve(recorded)
+        try:
+            return await run_ingest([IshUzAdapter(base, pages=2)], {"ishuz": str(out)})
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == {"ishuz": None}
+    assert out.read_text(encoding="utf-8") == "job_id,name\n1,old\n"
@@ -0,0 +1,63 @@
+# tests/test_jobs_view.py
+import random
+
+from jobs_view import MAX_DERIVED_VIEWS, MergedJobsView
+
+
+def make_parts(rng, sources=3, size=40):
+    parts = []
+    for s in range(sources):
+        ids = sorted(rng.sample(range(200), rng.randint(0, size)))
+        parts.append([{"job_id": jid, "source": s} for jid in ids])
+    return parts
+
+
+def merged(parts, exclude=()):
+    return sorted((j for p in parts for j in p if j["job_id"] not in exclude),
+                  key=lambda j: (j["job_id"], j["source"]))
+
+
+def key(job):
+    return job["job_id"], job["source"]
+
+
+def test_ordering_matches_a_full_sort_for_any_slice():
+    rng = random.Random(5)
+    for _ in range(50):
+        parts = make_parts(rng)
+        view, want = MergedJobsView(parts, key=key), merged(parts)
+        assert len(view) == len(want) and list(view) == want
+        for _ in range(10):
+            a, b = sorted(rng.randint(-5, len(want) + 5) for _ in range(2))
+            assert view[a:b] == want[a:b]
+        if want:
+            i = rng.randrange(len(want))
+            assert view[i] == want[i] and view[-1] == want[-1]
+        assert view[::2] == want[::2]
+
+
+def test_without_hides_ids_and_is_cached():
+    rng = random.Random(9)
+    parts = make_parts(rng)
+    view = MergedJobsView(parts, key=key)
+    hidden = {j["job_id"] for p in parts for j in p[::3]}
+    derived = view.without(hidden)
+    assert list(derived) == merged(parts, hidden) and len(derived) == len(merged(parts, hidden))
+    assert derived[5:15] == merged(parts, hidden)[5:15]
+    assert view.without(set(hidden)) is derived
+    assert view.without(()) is view and derived.without(hidden) is derived
+    more = derived.without({-1, *list(hidden)[:1]})
+    assert list(more) == merged(parts, hidden)
+    # without() zanjiri to'plamlarni birlashtiradi
+    extra = next(j["job_id"] for j in merged(parts, hidden))
+    assert list(derived.without({extra})) == merged(parts, hidden | {extra})
+
+
+def test_derived_cache_is_bounded():
+    parts = [[{"job_id": i, "source": 0} for i in range(MAX_DERIVED_VIEWS + 10)]]
+    view = MergedJobsView(parts, key=key)
+    first = view.without({0})
+    for i in range(1, MAX_DERIVED_VIEWS + 1):
+        view.without({i})
+    assert len(view._derived) == MAX_DERIVED_VIEWS
+    assert view.without({0}) is not first
@@ -0,0 +1,102 @@
+# tests/test_membership.py
+import asyncio
+
+import pytest
+
+from membership import MembershipCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_checks_share_one_lookup():
+    calls = []
+
+    async def lookup(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return True
+
+    async def scenario():
+        cache = MembershipCache(lookup)
+        results = await asyncio.gather(*(cache.is_member(1) for _ in range(10)))
+        return cache, results, await cache.is_member(1)
+
+    cache, results, again = asyncio.run(scenario())
+    assert results == [True] * 10 and again is True
+    assert calls == [1]
+    assert cache.stats["coalesced"] == 9 and cache.stats["hits"] == 1
+
+
+def test_negative_results_expire_sooner():
+    clock = Clock()
+    answers = {1: True, 2: False}
+
+    async def lookup(user_id):
+        return answers[user_id]
+
+    async def scenario():
+        cache = MembershipCache(lookup, positive_ttl=600, negative_ttl=10, clock=clock)
+        await cache.is_member(1)
+        await cache.is_member(2)
+        clock.now = 11
+        return cache.get(1), cache.get(2)
+
+    assert asyncio.run(scenario()) == (True, None)
+
+
+def test_errors_are_not_cached():
+    attempts = []
+
+    async def lookup(user_id):
+        attempts.append(user_id)
+        if len(attempts) == 1:
+            raise RuntimeError("network")
+        return True
+
+    async def scenario():
+        cache = MembershipCache(lookup)
+        with pytest.raises(RuntimeError):
+            await cache.is_member(1)
+        assert cache.get(1) is None
+        return await cache.is_member(1)
+
+    assert asyncio.run(scenario()) is True
+    assert len(attempts) == 2
+
+
+def test_chat_member_update_wins_over_inflight_answer():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def lookup(user_id):
+            await gate.wait()
+            return True
+
+        cache = MembershipCache(lookup)
+        check = asyncio.create_task(cache.is_member(1))
+        await asyncio.sleep(0)
+        cache.observe(1, False)
+        gate.set()
+        return await check, cache.get(1)
+
+    assert asyncio.run(scenario()) == (False, False)
+
+
+def test_cache_is_bounded():
+    async def lookup(user_id):
+        return True
+
+    async def scenario():
+        cache = MembershipCache(lookup, max_size=3)
+        for user_id in range(10):
+            await cache.is_member(user_id)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert len(cache) == 3 and cache.get(9) is True and cache.get(0) is None
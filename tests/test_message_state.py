@@ -0,0 +1,104 @@
+# tests/test_message_state.py
+import asyncio
+import types
+
+from executor import UpdateExecutor
+from message_state import MARKUP, QUEUED, SKIPPED, SUPERSEDED, TEXT, EditCoalescer, MessageStateCache
+
+
+class FakeMessage:
+    """callback.message o'rnida: faqat kesh ishlatadigan maydonlar."""
+
+    def __init__(self, chat_id=1, message_id=7, delay=0.0):
+        self.chat = types.SimpleNamespace(id=chat_id)
+        self.message_id = message_id
+        self.text = None
+        self.reply_markup = None
+        self.delay = delay
+        self.calls = []
+
+    async def edit_text(self, text, reply_markup=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        self.calls.append(("text", text))
+
+    async def edit_reply_markup(self, reply_markup=None):
+        await asyncio.sleep(self.delay)
+        self.calls.append(("markup", reply_markup))
+
+
+def test_identical_render_is_skipped():
+    async def scenario():
+        cache = MessageStateCache()
+        message = FakeMessage()
+        first = await cache.edit(message, "page 1")
+        second = await cache.edit(message, "page 1")
+        third = await cache.edit(message, "page 2")
+        return cache, message, (first, second, third)
+
+    cache, message, results = asyncio.run(scenario())
+    assert results == (TEXT, SKIPPED, TEXT)
+    assert message.calls == [("text", "page 1"), ("text", "page 2")]
+    assert cache.stats["skipped"] == 1
+
+
+def test_markup_only_change_uses_edit_reply_markup():
+    from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+    markup = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="x", callback_data="x")]])
+
+    async def scenario():
+        cache = MessageStateCache()
+        message = FakeMessage()
+        await cache.edit(message, "card")
+        return message, await cache.edit(message, "card", reply_markup=markup)
+
+    message, result = asyncio.run(scenario())
+    assert result == MARKUP
+    assert message.calls[-1] == ("markup", markup)
+
+
+def test_cache_is_bounded():
+    async def scenario():
+        cache = MessageStateCache(max_size=3)
+        for mid in range(10):
+            await cache.edit(FakeMessage(message_id=mid), "x")
+        return cache
+
+    assert len(asyncio.run(scenario())) == 3
+
+
+def test_coalescer_keeps_only_the_last_pending_render():
+    async def scenario():
+        coalescer = EditCoalescer(MessageStateCache())
+        message = FakeMessage(delay=0.05)
+        first = asyncio.create_task(coalescer.edit(message, "page 0"))
+        await asyncio.sleep(0.01)
+        queued = [await coalescer.edit(message, f"page {i}") for i in range(1, 4)]
+        await first
+        await asyncio.gather(*coalescer._drains)
+        return coalescer, message, queued
+
+    coalescer, message, queued = asyncio.run(scenario())
+    assert queued == [QUEUED] * 3
+    assert message.calls == [("text", "page 0"), ("text", "page 3")]
+    assert coalescer.stats["superseded"] == 2
+
+
+def test_coalescer_drops_renders_superseded_in_the_executor():
+    async def scenario():
+        executor = UpdateExecutor()
+        coalescer = EditCoalescer(MessageStateCache(), superseded=executor.has_queued)
+        message = FakeMessage(delay=0.01)
+        results = []
+
+        async def tap(i):
+            results.append(await coalescer.edit(message, f"page {i}"))
+
+        for i in range(5):
+            await executor.submit(1, lambda i=i: tap(i), target=(1, 7))
+        assert await executor.drain(5)
+        return message, results
+
+    message, results = asyncio.run(scenario())
+    assert message.calls == [("text", "page 4")]
+    assert results == [SUPERSEDED] * 4 + [TEXT]
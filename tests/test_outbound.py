@@ -0,0 +1,79 @@
+# tests/test_outbound.py
+import asyncio
+
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, GetUpdates, SendMessage
+
+from outbound import ANSWER, BULK, EDIT, SEND, OutboundScheduler, classify, with_priority
+
+
+def test_classify():
+    assert classify(AnswerCallbackQuery(callback_query_id="1")) == ANSWER
+    assert classify(EditMessageText(text="x", chat_id=1, message_id=1)) == EDIT
+    assert classify(SendMessage(chat_id=1, text="x")) == SEND
+    assert classify(GetUpdates()) is None
+
+
+def test_with_priority_overrides_all_but_answers():
+    async def scenario():
+        return (classify(SendMessage(chat_id=1, text="x")),
+                classify(AnswerCallbackQuery(callback_query_id="1")))
+
+    assert asyncio.run(with_priority(BULK, scenario())) == (BULK, ANSWER)
+
+
+def test_free_slot_goes_to_the_highest_class():
+    async def scenario():
+        scheduler = OutboundScheduler(slots=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def make_request(bot, method):
+            if not order:
+                order.append("first")
+                await gate.wait()
+            else:
+                order.append(type(method).__name__)
+
+        async def bulk():
+            return await with_priority(BULK, scheduler(make_request, None, SendMessage(chat_id=1, text="b")))
+
+        first = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=1, text="a")))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(bulk()),
+                   asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=2, text="s"))),
+                   asyncio.create_task(scheduler(make_request, None, EditMessageText(text="e", chat_id=1, message_id=1))),
+                   asyncio.create_task(scheduler(make_request, None, AnswerCallbackQuery(callback_query_id="1")))]
+        await asyncio.sleep(0.01)
+        depth = scheduler.queued()
+        gate.set()
+        await asyncio.gather(first, *waiting)
+        return scheduler, order, depth
+
+    scheduler, order, depth = asyncio.run(scenario())
+    assert depth == {"answer": 1, "edit": 1, "send": 1, "bulk": 1}
+    assert order == ["first", "AnswerCallbackQuery", "EditMessageText", "SendMessage", "SendMessage"]
+    assert scheduler._active == 0
+    assert scheduler.summary()["bulk"]["count"] == 1
+
+
+def test_cancelled_waiter_releases_its_slot():
+    async def scenario():
+        scheduler = OutboundScheduler(slots=1)
+        gate = asyncio.Event()
+
+        async def make_request(bot, method):
+            await gate.wait()
+
+        first = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=1, text="a")))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=1, text="b")))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        gate.set()
+        await first
+        await asyncio.gather(cancelled, return_exceptions=True)
+        await scheduler(make_request, None, SendMessage(chat_id=1, text="c"))
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler._active == 0 and not scheduler._waiting
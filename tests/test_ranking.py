@@ -0,0 +1,52 @@
+# tests/test_ranking.py
+import random
+
+from jobs_view import MergedJobsView
+from ranking import new_model, rank_jobs, score, update_model
+
+SKILLS = ("python", "sql", "go", "java")
+
+
+def expected(model, jobs, top):
+    best = sorted(range(len(jobs)), key=lambda i: (-score(model, jobs[i]), i))[:top]
+    picked = set(best)
+    return [jobs[i] for i in best] + [j for i, j in enumerate(jobs) if i not in picked]
+
+
+def test_update_model_moves_weights_towards_the_label():
+    job = {"skills": "Python;SQL", "location": "Uzbekistan, Tashkent"}
+    model = update_model(None, job, 1.0)
+    assert model["n"] == 1 and model["w"]["s:python"] > 0 and "l:uzbekistan" in model["w"]
+    assert score(update_model(new_model(), job, 0.0), job) < 0
+
+
+def test_rank_jobs_matches_a_full_sort_on_lists_and_merged_views():
+    rng = random.Random(3)
+    for _ in range(100):
+        n, top = rng.randint(0, 60), rng.randint(1, 25)
+        jobs = [{"job_id": i, "skills": rng.choice(SKILLS), "location": ""} for i in range(n)]
+        model = {"b": 0.0, "w": {"s:" + s: rng.uniform(-1, 1) for s in SKILLS}, "n": 1}
+        want = expected(model, jobs, top)
+        view = MergedJobsView([jobs[::2], jobs[1::2]], key=lambda j: j["job_id"])
+        for source in (jobs, view):
+            ranked = rank_jobs(model, source, top)
+            assert len(ranked) == n
+            for _ in range(10):
+                a = rng.randint(0, n)
+                b = rng.randint(a, n + 3)
+                assert ranked[a:b] == want[a:b]
+
+
+def test_rank_jobs_does_not_copy_a_merged_view():
+    jobs = [{"job_id": i, "skills": "python" if i % 7 == 0 else "sql", "location": ""} for i in range(1000)]
+    view = MergedJobsView([jobs], key=lambda j: j["job_id"])
+    ranked = rank_jobs({"b": 0.0, "w": {"s:python": 1.0}, "n": 1}, view, top=10)
+    assert ranked[:3] == [jobs[0], jobs[7], jobs[14]]
+    # tanlanmaganlar asl tartibda, tanlanganlarsiz
+    assert [j["job_id"] for j in ranked[10:13]] == [1, 2, 3]
+
+
+def test_untrained_model_keeps_order():
+    jobs = [{"job_id": 1}, {"job_id": 2}]
+    assert rank_jobs(None, jobs, 10) is jobs
+    assert rank_jobs(new_model(), jobs, 10) is jobs
@@ -0,0 +1,62 @@
+# tests/test_shared_catalog.py
+import csv
+import os
+
+from shared_catalog import POINTER_FILE, CatalogPublisher, SharedCatalog, read_pointer
+from snapshot import FIELDS
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["job_id", *FIELDS])
+        w.writerows(rows)
+
+
+def bump_pointer(shared_dir, step):
+    # qo'pol vaqt belgili fayl tizimlarida ham worker o'zgarishni ko'rishi uchun
+    path = os.path.join(shared_dir, POINTER_FILE)
+    mtime = os.stat(path).st_mtime_ns + step
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_publish_and_follow_the_current_version(tmp_path):
+    shared = str(tmp_path / "shared")
+    src = str(tmp_path / "jobs.csv")
+    write_csv(src, [[1, "Python dev", "Acme", "", "Python", "<p>Tavsif</p>", "https://a/1"]])
+    publisher = CatalogPublisher(shared, {"main": src})
+    worker = SharedCatalog(shared, cache_size=4)
+    assert worker.current() is None and publisher.is_stale()
+
+    first = publisher.publish()
+    assert read_pointer(shared) == first and first["counts"] == {"main": 1}
+    assert not publisher.is_stale() and publisher.publish_if_stale() is None
+    reader = worker.current()
+    assert worker.version == first["version"]
+    assert reader.jobs_for_path(src).get_by_id(1)["name"] == "Python dev"
+    assert worker.current() is reader
+
+    write_csv(src, [[1, "Python dev", "Acme", "", "Python", "<p>Tavsif</p>", "https://a/1"],
+                    [2, "Go dev", "Beta", "", "Go", "", "https://a/2"]])
+    assert publisher.is_stale()
+    second = publisher.publish_if_stale()
+    bump_pointer(shared, 1)
+    assert second["version"] != first["version"]
+    jobs = worker.current().jobs_for_path(src)
+    assert worker.version == second["version"] and len(jobs) == 2
+    # eski o'quvchi o'z mmap i bilan ishlashda davom etadi
+    assert len(reader.jobs("main")) == 1
+
+
+def test_worker_keeps_the_old_reader_on_a_broken_pointer(tmp_path):
+    shared = str(tmp_path / "shared")
+    src = str(tmp_path / "jobs.csv")
+    write_csv(src, [[1, "Python dev", "Acme", "", "", "", ""]])
+    publisher = CatalogPublisher(shared, {"main": src})
+    publisher.publish()
+    worker = SharedCatalog(shared)
+    reader = worker.current()
+    with open(os.path.join(shared, POINTER_FILE), "w", encoding="utf-8") as f:
+        f.write('{"version": 1, "file": "catalog-missing.bin"}')
+    bump_pointer(shared, 1)
+    assert worker.current() is reader
@@ -0,0 +1,89 @@
+# tests/test_snapshot.py
+import csv
+import os
+
+from catalog_delta import row_hash
+from csv_stream import read_jobs_csv
+from snapshot import FIELDS, SnapshotReader, build_catalog, open_snapshot
+
+HEADER = ["job_id", *FIELDS]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        w.writerows(rows)
+
+
+def make_sources(tmp_path):
+    a = str(tmp_path / "a.csv")
+    b = str(tmp_path / "b.csv")
+    write_csv(a, [
+        [3, "Python dev", "Acme", "Tashkent", "Python", "<p>Birinchi</p>", "https://a/3"],
+        [1, "Go dev", "Acme", "Tashkent", "Go", "<p>Ikkinchi</p>", "https://a/1"],
+        [2, "Java dev", "Beta", "Bukhara", "Java", "<p>Birinchi</p>", "https://a/2"],
+        [1, "Dublikat", "", "", "", "", ""],
+    ])
+    write_csv(b, [[7, "Analyst", "Gamma", "", "SQL", "", "https://b/7"]])
+    return {"a": a, "b": b}
+
+
+def test_round_trip_matches_the_csv(tmp_path):
+    sources = make_sources(tmp_path)
+    out = str(tmp_path / "catalog.bin")
+    assert build_catalog(sources, out) == {"a": 4, "b": 1}
+    assert not os.path.exists(out + ".tmp")
+    reader = open_snapshot(out)
+    for name, path in sources.items():
+        jobs = reader.jobs_for_path(path)
+        expected = read_jobs_csv(path)
+        assert len(jobs) == len(expected)
+        for job, want in zip(jobs, expected):
+            assert {k: job[k] for k in want} == want
+        assert list(jobs.row_hashes()) == [row_hash(j) for j in expected]
+        assert jobs.job_ids() == [j["job_id"] for j in expected]
+
+
+def test_get_by_id_and_hashes_take_the_first_duplicate(tmp_path):
+    sources = make_sources(tmp_path)
+    out = str(tmp_path / "catalog.bin")
+    build_catalog(sources, out, use_dict=False)
+    jobs = open_snapshot(out).jobs("a")
+    assert jobs.get_by_id(1)["name"] == "Go dev"
+    assert jobs.get_by_id(5) is None
+    hashes = jobs.hashes()
+    assert list(hashes) == [1, 2, 3] and len(hashes) == 3
+    assert hashes[1] == jobs.row_hashes()[1]
+    assert 5 not in hashes
+
+
+def test_description_uncached_does_not_fill_the_lru(tmp_path):
+    sources = make_sources(tmp_path)
+    out = str(tmp_path / "catalog.bin")
+    build_catalog(sources, out)
+    reader = SnapshotReader(out, cache_size=1)
+    job = reader.jobs("a")[0]
+    assert job.description_uncached() == "Birinchi"
+    assert reader.descriptions.cache_bytes() == 0
+    assert job["description_html"] == job.description_uncached()
+    assert reader.descriptions.cache_bytes() > 0
+
+
+def test_source_for_path_rejects_a_changed_csv(tmp_path):
+    sources = make_sources(tmp_path)
+    out = str(tmp_path / "catalog.bin")
+    build_catalog(sources, out)
+    reader = open_snapshot(out)
+    assert reader.source_for_path(sources["a"]) == "a"
+    with open(sources["a"], "a", encoding="utf-8") as f:
+        f.write("9,Yangi,,,,,\n")
+    assert reader.source_for_path(sources["a"]) is None
+    assert reader.source_for_path(str(tmp_path / "missing.csv")) is None
+
+
+def test_open_snapshot_returns_none_for_a_bad_file(tmp_path):
+    bad = tmp_path / "catalog.bin"
+    bad.write_bytes(b"not a snapshot")
+    assert open_snapshot(str(bad)) is None
+    assert open_snapshot(str(tmp_path / "missing.bin")) is None
@@ -0,0 +1,263 @@
+# webhook.py
+"""
+Webhook rejimi (aiogram aiohttp integratsiyasi) — long polling o'rniga.
+
+Telegram so'roviga darhol 200 qaytariladi, update fon vazifasida ishlanadi
+(executor berilsa — uning per-user navbati orqali; navbat to'la bo'lsa javob
+kechikadi va Telegram yuborishni sekinlashtiradi). To'xtashda yangi
+so'rovlarga 503 beriladi (Telegram ularni keyin qayta yuboradi) va boshlangan
+update lar `drain_timeout` gacha kutiladi.
+
+Polling va webhook rejimlarida update kechikishini mahalliy soxta Bot API
+bilan solishtirish:
+
+    python webhook.py bench [--updates 500] [--rate 100] [--rtt 40]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from executor import UpdateExecutor
+
+DRAIN_TIMEOUT = 25.0
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: Optional[str] = None,
+                 drain_timeout: float = DRAIN_TIMEOUT, executor: Optional[UpdateExecutor] = None, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.drain_timeout = drain_timeout
+        self.executor = executor
+        self.draining = False
+
+    def pending(self) -> int:
+        if self.executor is not None:
+            return self.executor.depth
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self.executor is None:
+            return await super()._handle_request_background(bot, request)
+        update = Update.model_validate(await request.json(loads=bot.session.json_loads), context={"bot": bot})
+        await self.executor.submit_update(update, lambda: self._background_feed_update(bot, update))
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.draining:
+            return web.Response(status=503, text="shutting down")
+        return await super().handle(request)
+
+    async def close(self) -> None:
+        self.draining = True
+        if self.executor is not None and not await self.executor.drain(self.drain_timeout):
+            print(f"webhook: {self.executor.depth} updates still queued after {self.drain_timeout}s")
+        tasks = set(self._background_feed_update_tasks)
+        if tasks:
+            print(f"webhook: draining {len(tasks)} updates")
+            _, left = await asyncio.wait(tasks, timeout=self.drain_timeout)
+            if left:
+                print(f"webhook: {len(left)} updates still running after {self.drain_timeout}s, cancelling")
+                for task in left:
+                    task.cancel()
+        await super().close()
+
+
+def build_app(dp: Dispatcher, bot: Bot, path: str, secret: Optional[str] = None,
+              drain_timeout: float = DRAIN_TIMEOUT, executor: Optional[UpdateExecutor] = None,
+              **data: Any) -> web.Application:
+    app = web.Application()
+    handler = DrainingRequestHandler(dp, bot, secret_token=secret, drain_timeout=drain_timeout, executor=executor, **data)
+    handler.register(app, path=path)
+    setup_application(app, dp, bot=bot, **data)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, url: str, path: str, host: str, port: int,
+                      secret: Optional[str] = None, drain_timeout: float = DRAIN_TIMEOUT,
+                      register: bool = True, executor: Optional[UpdateExecutor] = None, **data: Any) -> None:
+    """Server bekor qilinguncha ishlaydi. Webhook o'chirilmaydi (yangilanishda boshqa nusxa qabul qilaveradi)."""
+    app = build_app(dp, bot, path, secret, drain_timeout, executor, **data)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    try:
+        if register:
+            await bot.set_webhook(url.rstrip("/") + path, secret_token=secret,
+                                  allowed_updates=dp.resolve_used_update_types())
+        print(f"webhook: listening on {host}:{port}{path}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+# ------------------ Local fake Bot API ------------------
+class FakeBotAPI:
+    """
+    getUpdates (long polling), setWebhook/deleteWebhook, sendMessage va getMe
+    ni qo'llaydigan mahalliy server. Javob xabari kelgan vaqtni yozib boradi.
+    `rtt` — tarmoq kechikishi taqlidi: har bir so'rov va javob yo'lida rtt/2.
+    """
+
+    def __init__(self, rtt: float = 0.0):
+        self.rtt = rtt
+        self.updates: List[Dict[str, Any]] = []
+        self.webhook_url: Optional[str] = None
+        self.secret: Optional[str] = None
+        self.sent_at: Dict[str, float] = {}
+        self._new = asyncio.Condition()
+        self._client = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        form = dict(await request.post())
+        await asyncio.sleep(self.rtt / 2)
+        result: Any = True
+        if method == "getme":
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        elif method == "getupdates":
+            result = await self._get_updates(int(form.get("offset") or 0), float(form.get("timeout") or 0))
+        elif method == "setwebhook":
+            self.webhook_url, self.secret = form["url"], form.get("secret_token")
+        elif method == "deletewebhook":
+            self.webhook_url = None
+        elif method == "sendmessage":
+            self.sent_at[form["text"]] = time.perf_counter()
+            result = {"message_id": len(self.sent_at), "date": int(time.time()),
+                      "chat": {"id": int(form["chat_id"]), "type": "private"}, "text": form["text"]}
+        await asyncio.sleep(self.rtt / 2)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, offset: int, timeout: float) -> List[Dict[str, Any]]:
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout:
+            async with self._new:
+                try:
+                    await asyncio.wait_for(self._new.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        return self.updates[:100]
+
+    async def push(self, update: Dict[str, Any]) -> Optional[float]:
+        """Update ni yetkazadi; webhook rejimida ack vaqtini (soniya) qaytaradi."""
+        if self.webhook_url:
+            import aiohttp
+            if self._client is None:
+                self._client = aiohttp.ClientSession()
+            headers = {"X-Telegram-Bot-Api-Secret-Token": self.secret} if self.secret else {}
+            await asyncio.sleep(self.rtt / 2)
+            started = time.perf_counter()
+            async with self._client.post(self.webhook_url, json=update, headers=headers) as resp:
+                await resp.read()
+            return time.perf_counter() - started
+        self.updates.append(update)
+        async with self._new:
+            self._new.notify_all()
+        return None
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+
+def _update(n: int) -> Dict[str, Any]:
+    user = {"id": 1000 + n % 50, "is_bot": False, "first_name": "u"}
+    return {"update_id": n, "message": {"message_id": n, "date": int(time.time()), "from": user,
+                                        "chat": {"id": user["id"], "type": "private"}, "text": f"ping {n}"}}
+
+
+async def bench(mode: str, updates: int, rate: float, rtt: float = 0.0, api_port: int = 18081, hook_port: int = 18082) -> Dict[str, float]:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Message
+
+    fake = FakeBotAPI(rtt)
+    api_runner = web.AppRunner(fake.app())
+    await api_runner.setup()
+    await web.TCPSite(api_runner, "127.0.0.1", api_port).start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}"))
+    bot = Bot("42:BENCH", session=session)
+    dp = Dispatcher()
+
+    @dp.message()
+    async def echo(msg: Message):
+        await msg.answer(msg.text)
+
+    if mode == "webhook":
+        server = asyncio.create_task(run_webhook(dp, bot, f"http://127.0.0.1:{hook_port}", "/hook",
+                                                 "127.0.0.1", hook_port, secret="s3cret"))
+    else:
+        server = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+    await asyncio.sleep(0.5)
+
+    pushed: Dict[str, float] = {}
+    acks: List[float] = []
+
+    async def push(n: int) -> None:
+        pushed[f"ping {n}"] = time.perf_counter()
+        ack = await fake.push(_update(n))
+        if ack is not None:
+            acks.append(ack)
+
+    # webhook POST lari parallel (Telegram ham bir nechta ulanish bilan yuboradi)
+    pushes = []
+    for n in range(1, updates + 1):
+        pushes.append(asyncio.create_task(push(n)))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*pushes)
+    deadline = time.perf_counter() + 10 + rtt * 4
+    while len(fake.sent_at) < updates and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    if mode == "webhook":
+        server.cancel()
+    else:
+        await dp.stop_polling()
+    await asyncio.gather(server, return_exceptions=True)
+    await fake.close()
+    await session.close()
+    await api_runner.cleanup()
+
+    latencies = sorted((fake.sent_at[text] - at) * 1000 for text, at in pushed.items() if text in fake.sent_at)
+    result = {
+        "delivered": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "max_ms": latencies[-1],
+    }
+    if acks:
+        result["ack_p50_ms"] = statistics.median(acks) * 1000
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="webhook.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="polling va webhook kechikishini soxta Bot API bilan solishtirish")
+    b.add_argument("--updates", type=int, default=500)
+    b.add_argument("--rate", type=float, default=100.0, help="sekundiga update")
+    b.add_argument("--rtt", type=float, default=40.0, help="taqlid qilingan tarmoq RTT (ms)")
+    b.add_argument("--mode", choices=("both", "polling", "webhook"), default="both")
+    args = parser.parse_args(argv)
+    modes = ("polling", "webhook") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        result = asyncio.run(bench(mode, args.updates, args.rate, args.rtt / 1000))
+        print(mode, json.dumps({k: round(v, 2) for k, v in result.items()}))
+
+
+if __name__ == "__main__":
+    main()